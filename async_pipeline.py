@@ -0,0 +1,604 @@
+# async_pipeline.py
+"""
+异步资源探索与下载流水线
+基于Playwright异步API，Tab探索、弹窗链接解析和HTTP传输在同一个事件循环中重叠执行
+"""
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Collection, Dict, List, Optional
+from playwright.async_api import async_playwright, Page, BrowserContext, Browser, Locator
+from config import Config
+from logger import logger
+from browser_manager import LOGIN_PASSWORD
+from auth_cache import AuthStateCache
+from utils import APIUtils
+from resource_detector import ResourceDetector, SNAPSHOT_SCRIPT, ELEMENT_SCRIPT, RID_ATTRIBUTE, rid_selector
+from downloader import DownloadManager, DownloadTask
+from popup_interceptor import AsyncPopupInterceptor, popup_stats
+from wait_strategy import AsyncPageWaiter, wait_stats
+from request_blocker import AsyncRequestBlocker, resolve_block_requests
+
+
+class AsyncBrowserManager:
+    """浏览器管理类（异步版）"""
+
+    def __init__(self, headless: bool = False, use_auth_cache: bool = True, block_requests: Optional[bool] = None):
+        """
+        Args:
+            block_requests: 是否拦截图片/字体/音视频/统计脚本等请求，None表示只在无头运行时拦截
+        """
+        self.headless = headless
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self.playwright = None
+
+        # 登录状态缓存
+        self.auth_cache = AuthStateCache() if use_auth_cache else None
+        self.cached_state: Optional[Dict] = None
+        self.cached_token: Optional[str] = None
+
+        # 页面就绪等待（start 后可用）
+        self.waiter: Optional[AsyncPageWaiter] = None
+
+        # 请求拦截（挂载到本管理器创建的每个上下文，包括上下文池中的）
+        self.request_blocker = AsyncRequestBlocker() if resolve_block_requests(block_requests, headless) else None
+
+    async def __aenter__(self):
+        """异步上下文管理器入口"""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器出口"""
+        await self.stop()
+
+    async def start(self):
+        """启动浏览器"""
+        logger.progress("启动Chromium浏览器（异步）...")
+
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless,
+            args=['--start-maximized', '--disable-blink-features=AutomationControlled']
+        )
+
+        self.cached_state = self.auth_cache.load() if self.auth_cache else None
+        self.context = await self.new_context(self.cached_state)
+        self.page = await self.new_page(self.context)
+        self.waiter = AsyncPageWaiter(self.page)
+
+        logger.success("浏览器启动成功")
+
+    async def new_context(self, storage_state: Optional[Dict] = None) -> BrowserContext:
+        """创建浏览器上下文（可传入已登录的storage_state）"""
+        context = await self.browser.new_context(
+            no_viewport=False,
+            user_agent=Config.USER_AGENT,
+            storage_state=storage_state
+        )
+
+        # 注入反检测脚本
+        await context.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            })
+        """)
+
+        if self.request_blocker:
+            await self.request_blocker.attach(context)
+
+        return context
+
+    @staticmethod
+    async def new_page(context: BrowserContext) -> Page:
+        """在上下文中创建页面"""
+        page = await context.new_page()
+        await page.set_viewport_size(Config.VIEWPORT_SIZE)
+        page.set_default_timeout(15000)
+        return page
+
+    async def stop(self):
+        """停止浏览器"""
+        if self.browser and self.browser.is_connected():
+            await self.browser.close()
+            logger.debug("浏览器已关闭")
+
+        if self.playwright:
+            await self.playwright.stop()
+
+        wait_stats.log_summary()
+        popup_stats.log_summary()
+        if self.request_blocker:
+            self.request_blocker.log_summary()
+
+    async def navigate_to(self, url: str, wait_for_network_idle: bool = True):
+        """导航到指定URL"""
+        logger.progress(f"导航到: {url}")
+
+        options = {}
+        if wait_for_network_idle:
+            options['wait_until'] = 'networkidle'
+
+        await self.page.goto(url, **options)
+        await self.waiter.loading_gone()
+
+    async def login(self) -> bool:
+        """执行登录流程（优先使用缓存的登录状态）"""
+        if await self._restore_cached_login():
+            return True
+
+        try:
+            logger.progress("正在访问登录页面...")
+            await self.navigate_to(Config.LOGIN_URL)
+
+            logger.progress("填写登录表单...")
+            await self.page.fill('input[placeholder="手机号"]', Config.PHONE_NUMBER)
+            await self.page.fill('input[placeholder="密码"]', LOGIN_PASSWORD)
+            await self.page.locator('input[placeholder="密码"]').press('Enter')
+            logger.info("已提交登录表单")
+
+            # 处理隐私协议弹窗
+            try:
+                await self.page.wait_for_selector('button.el-button--primary >> text=允许获取', timeout=8000)
+                await self.page.click('button.el-button--primary >> text=允许获取')
+                logger.info("已点击'允许获取'按钮")
+                await self.waiter.hidden('button.el-button--primary >> text=允许获取')
+            except Exception:
+                logger.debug("未找到弹窗或已消失")
+
+            # 等待登录完成
+            try:
+                await self.page.wait_for_selector('p.product_name:has-text("一校教培")', timeout=20000)
+                logger.success("分屏主页加载完成")
+            except Exception:
+                logger.warning("等待主页超时，尝试继续...")
+
+            await self.save_auth_state()
+            return True
+
+        except Exception as e:
+            logger.error(f"登录失败: {e}", exc_info=True)
+            return False
+
+    async def _restore_cached_login(self) -> bool:
+        """校验缓存的Token，被服务器拒绝时清除缓存"""
+        if not self.cached_state:
+            return False
+
+        token = AuthStateCache.extract_token(self.cached_state)
+        if token and await asyncio.to_thread(APIUtils.validate_token, token):
+            self.cached_token = token
+            logger.success("已恢复缓存的登录状态，跳过登录流程")
+            return True
+
+        logger.info("缓存的登录状态已被服务器拒绝，重新登录")
+        await self.context.clear_cookies()
+        self.auth_cache.clear()
+        self.cached_state = None
+        return False
+
+    async def save_auth_state(self):
+        """把当前上下文的登录状态写入缓存"""
+        if self.auth_cache:
+            self.auth_cache.save(await self.context.storage_state())
+
+    async def get_token(self) -> Optional[str]:
+        """从浏览器获取Token（Cookies → LocalStorage → SessionStorage → window → 登录状态缓存）"""
+        try:
+            for cookie in await self.context.cookies():
+                if 'token' in cookie['name'].lower():
+                    return cookie['value']
+
+            token = await self.page.evaluate(
+                "() => localStorage.getItem('token') || sessionStorage.getItem('token')"
+                " || window.token || window.TOKEN || null")
+            if token:
+                return token
+        except Exception as e:
+            logger.debug(f"从页面获取Token失败: {e}")
+
+        if self.cached_token:
+            return self.cached_token
+
+        logger.error("无法获取有效的Token")
+        return None
+
+
+class AsyncResourceDetector(ResourceDetector):
+    """
+    资源检测器（异步版）
+
+    页面端脚本、分类和资源信息构建都沿用 ResourceDetector，这里只负责等待页面调用。
+    默认使用DOM快照模式；locator模式下各元素的快照记录并发读取。
+    """
+
+    async def detect_resources_in_tab(self, tab_path: List[str]) -> List[Dict]:
+        """在指定Tab中检测资源"""
+        if self.detection_mode == "snapshot":
+            try:
+                records = await self.page.evaluate(SNAPSHOT_SCRIPT, self._snapshot_args())
+                return self._classify_snapshot(records, tab_path)
+            except Exception as e:
+                logger.warning(f"DOM快照检测失败，回退到逐元素检测: {e}")
+
+        return await self._detect_resources_by_locator(tab_path)
+
+    async def _detect_resources_by_locator(self, tab_path: List[str]) -> List[Dict]:
+        """逐元素通过locator检测资源"""
+        resources = []
+
+        try:
+            file_elements, button_elements = await asyncio.gather(
+                self._find_file_elements(), self._find_button_elements())
+
+            infos = await asyncio.gather(
+                *(self._analyze_element(element, tab_path)
+                  for element in file_elements + button_elements))
+
+            resources = [info for info in infos if info]
+            resources = self._deduplicate_resources(resources)
+
+            logger.info(f"在Tab '{' > '.join(tab_path)}' 中检测到 {len(resources)} 个目标资源")
+
+        except Exception as e:
+            logger.error(f"检测Tab资源失败: {e}")
+
+        return resources
+
+    async def _find_file_elements(self) -> List[Locator]:
+        """查找所有文件相关元素"""
+        async def find_by_extension(ext: str) -> List[Locator]:
+            try:
+                elements = await self.page.locator(f"*:has-text('{ext}')").all()
+                texts = await asyncio.gather(*(elem.inner_text() for elem in elements))
+                return [elem for elem, text in zip(elements, texts) if ext in text.strip().lower()]
+            except Exception:
+                return []
+
+        async def find_by_class(cls: str) -> List[Locator]:
+            try:
+                return await self.page.locator(f".{cls}").all()
+            except Exception:
+                return []
+
+        groups = await asyncio.gather(*(find_by_extension(ext) for ext in self.scan_extensions),
+                                      *(find_by_class(cls) for cls in self.scan_classes))
+        return [element for group in groups for element in group]
+
+    async def _find_button_elements(self) -> List[Locator]:
+        """查找所有按钮元素"""
+        async def find_by_text(text: str) -> List[Locator]:
+            try:
+                return await self.page.locator(f"span.file_btn:has-text('{text}'), "
+                                               f"button:has-text('{text}'), "
+                                               f"a:has-text('{text}')").all()
+            except Exception:
+                return []
+
+        groups = await asyncio.gather(*(find_by_text(text) for text in self.button_texts))
+        return [element for group in groups for element in group]
+
+    async def _analyze_element(self, element: Locator, tab_path: List[str]) -> Optional[Dict]:
+        """分析单个元素（一次读取元素的快照记录并打标记），分类规则与同步版相同"""
+        try:
+            return self._analyze_record(await element.evaluate(ELEMENT_SCRIPT, RID_ATTRIBUTE), tab_path)
+        except Exception as e:
+            logger.debug(f"分析元素失败: {e}")
+            return None
+
+    async def relocate(self, resource: Dict) -> Optional[Dict]:
+        """重新检测资源所在的Tab，按文本和同名序号找回同一个资源（调用方需先切换到该Tab）"""
+        return self._match_resource(resource, await self.detect_resources_in_tab(resource.get("tab_path", [])))
+
+
+class AsyncTabExplorer:
+    """Tab探索器（异步版）"""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.detector = AsyncResourceDetector(page)
+        self.waiter = AsyncPageWaiter(page)
+
+    async def explore_all_tabs(
+            self,
+            on_tab: Optional[Callable[[List[str], List[Dict]], Awaitable[None]]] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        探索所有Tab中的资源
+
+        Args:
+            on_tab: 每个Tab检测完成后立即调用（此时该Tab仍处于激活状态），
+                    调用方可以趁机解析需要点击的资源并提交下载，不必等全部Tab探索完
+
+        Returns:
+            按Tab路径分组的资源字典
+        """
+        all_resources = {}
+
+        try:
+            primary_tabs = await self.page.locator('.el-tabs__header.is-top .el-tabs__item').all()
+            logger.info(f"找到 {len(primary_tabs)} 个一级Tab")
+
+            for primary_tab in primary_tabs:
+                primary_name = ""
+                try:
+                    primary_name = (await primary_tab.inner_text()).strip()
+                    if not primary_name:
+                        continue
+
+                    logger.info(f"探索一级Tab: {primary_name}")
+                    await self._activate(primary_tab)
+
+                    secondary_resources = await self._explore_secondary_tabs(primary_name, on_tab)
+                    if not secondary_resources:
+                        tab_path = [primary_name]
+                        resources = await self.detector.detect_resources_in_tab(tab_path)
+                        if resources:
+                            all_resources[" > ".join(tab_path)] = resources
+                            if on_tab:
+                                await on_tab(tab_path, resources)
+                    else:
+                        all_resources.update(secondary_resources)
+
+                except Exception as e:
+                    logger.error(f"探索Tab '{primary_name}' 失败: {e}")
+                    continue
+
+        except Exception as e:
+            logger.error(f"探索所有Tab失败: {e}")
+
+        return all_resources
+
+    async def _explore_secondary_tabs(self, primary_name: str, on_tab) -> Dict[str, List[Dict]]:
+        """探索二级Tab"""
+        secondary_resources = {}
+
+        try:
+            secondary_containers = await self.page.locator(
+                '.tabmain.el-tabs.el-tabs--card.el-tabs--left, '
+                'div.tabmain, '
+                '.el-tabs__content .el-tabs'
+            ).all()
+            if not secondary_containers:
+                return {}
+
+            secondary_tabs = await secondary_containers[0].locator('.el-tabs__item').all()
+            logger.info(f"在 '{primary_name}' 下找到 {len(secondary_tabs)} 个二级Tab")
+
+            for secondary_tab in secondary_tabs:
+                secondary_name = ""
+                try:
+                    secondary_name = (await secondary_tab.inner_text()).strip()
+                    if not secondary_name:
+                        continue
+
+                    tab_path = [primary_name, secondary_name]
+                    tab_key = " > ".join(tab_path)
+                    logger.info(f"探索二级Tab: {tab_key}")
+
+                    await self._activate(secondary_tab)
+
+                    resources = await self.detector.detect_resources_in_tab(tab_path)
+                    if resources:
+                        secondary_resources[tab_key] = resources
+                        if on_tab:
+                            await on_tab(tab_path, resources)
+
+                except Exception as e:
+                    logger.error(f"探索二级Tab '{secondary_name}' 失败: {e}")
+                    continue
+
+        except Exception as e:
+            logger.debug(f"探索二级Tab失败: {e}")
+
+        return secondary_resources
+
+    async def _activate(self, tab: Locator):
+        """点击激活Tab"""
+        if "is-active" not in (await tab.get_attribute("class") or ""):
+            await tab.click()
+            await self.waiter.tab_ready(tab)
+
+
+class AsyncDownloadScheduler:
+    """
+    异步下载调度器
+
+    两个通道各自有并发上限：
+    - 浏览器通道（page_lock）：同一时间只有一个协程操作页面，负责Tab探索和点击解析真实链接；
+      使用上下文池时，每个课时自带独占的页面，各页面的浏览器通道互不影响
+    - HTTP通道（http_lane）：最多 max_concurrent 个传输同时进行，由 DownloadManager 的HTTP线程执行，
+      事件循环只等待其Future，因此传输期间页面可以继续探索下一个Tab
+    """
+
+    def __init__(self, page: Optional[Page], max_concurrent: int = 4, download_timeout: int = 300,
+                 resource_types: Optional[Collection[str]] = None, **manager_options):
+        """
+        Args:
+            resource_types: 只下载这些类型的资源（如 pdf、video），为None时下载全部
+        """
+        self.page = page
+        self.download_timeout = download_timeout
+        self.resource_types = set(resource_types) if resource_types else None
+        self.manager = DownloadManager(None, max_concurrent=max_concurrent,
+                                       download_timeout=download_timeout, **manager_options)
+
+        self.page_lock = asyncio.Lock()
+        self.http_lane = asyncio.Semaphore(max_concurrent)
+        self.unresolved_tasks: List[DownloadTask] = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self):
+        """启动HTTP通道并同步cookies"""
+        self.manager.start()
+        if self.page:
+            await self.sync_cookies(self.page)
+
+    async def stop(self):
+        """停止HTTP通道"""
+        await asyncio.to_thread(self.manager.stop)
+
+    async def sync_cookies(self, page: Page):
+        """把浏览器上下文的cookies同步到HTTP连接池"""
+        self.manager.http_pool.sync_cookies(await page.context.cookies())
+
+    async def explore_and_download(self, lesson_info: Dict, download_dir: Path,
+                                   page: Optional[Page] = None) -> Dict:
+        """
+        探索课时页面并下载资源
+
+        每个Tab检测完成后，带链接的资源立即进入HTTP通道；需要点击的资源趁Tab仍激活时解析出链接，
+        再进入HTTP通道。所有传输与后续Tab的探索并行进行。
+
+        Args:
+            page: 已打开该课时的页面（由调用方独占）；不传时使用调度器自己的页面
+
+        Returns:
+            本课时的统计信息
+        """
+        if page is None:
+            async with self.page_lock:
+                return await self._explore_and_download(lesson_info, download_dir, self.page)
+        return await self._explore_and_download(lesson_info, download_dir, page)
+
+    async def _explore_and_download(self, lesson_info: Dict, download_dir: Path, page: Page) -> Dict:
+        """在指定页面上探索并下载（调用方需持有页面）"""
+        transfers: List[asyncio.Task] = []
+        unresolved_count = 0
+
+        async def on_tab(tab_path: List[str], resources: List[Dict]):
+            nonlocal unresolved_count
+            for resource in resources:
+                if not (resource.get('url') or resource['resource_type'] == 'pdf'
+                        or resource['download_method'] == 'direct'):
+                    continue
+                if self.resource_types and resource['resource_type'] not in self.resource_types:
+                    continue
+
+                resource['lesson_info'] = lesson_info
+                resource['destination_dir'] = download_dir
+
+                if not resource.get('url'):
+                    resource['url'] = await self._resolve_url(page, resource)
+                    if not resource['url']:
+                        unresolved_count += 1
+                        continue
+
+                transfers.append(asyncio.create_task(self._transfer(resource)))
+
+        logger.separator("开始资源探索与下载（异步）")
+        await self.sync_cookies(page)
+        journal = self.manager.journal
+        if journal:
+            journal.mark_lesson(lesson_info, "started")
+
+        watchdog = asyncio.create_task(self._cookie_watchdog(page))
+        try:
+            await AsyncTabExplorer(page).explore_all_tabs(on_tab)
+            if journal:
+                journal.mark_lesson(lesson_info, "explored", unresolved=unresolved_count)
+            results = await asyncio.gather(*transfers)
+        except Exception:
+            # 探索中途出错：等已提交的传输结束后再抛出，不留下无人跟踪的任务
+            await asyncio.gather(*transfers, return_exceptions=True)
+            raise
+        finally:
+            watchdog.cancel()
+
+        statuses = [task.status for task in results]
+        stats = {
+            "completed": statuses.count("completed"),
+            "failed": statuses.count("failed") + unresolved_count,
+            "skipped": statuses.count("skipped"),
+        }
+        if journal:
+            journal.mark_lesson(lesson_info, "failed" if stats["failed"] else "done")
+        logger.info(f"下载统计: {stats['completed']}成功, {stats['failed']}失败, {stats['skipped']}已存在跳过")
+        return stats
+
+    async def resume_from_journal(self) -> List[DownloadTask]:
+        """把进度日志中未完成的任务重新提交到HTTP通道并等待完成"""
+        futures = self.manager.resume_from_journal()
+        return [await asyncio.wrap_future(future) for future in futures]
+
+    async def _transfer(self, task_info: Dict) -> DownloadTask:
+        """提交到HTTP通道并等待完成"""
+        async with self.http_lane:
+            return await asyncio.wrap_future(self.manager.add_task(task_info))
+
+    async def _resolve_url(self, page: Page, resource: Dict) -> Optional[str]:
+        """
+        点击资源按钮解析真实链接（调用方需持有页面）
+
+        预览类资源从弹出页的导航请求中提取OSS链接（不等待预览页加载）；直接下载类资源读取下载事件的URL后取消浏览器下载，
+        传输统一交给HTTP通道。
+        """
+        try:
+            element = await self._locate_element(page, resource)
+
+            if resource['download_method'] == 'direct':
+                async with page.expect_download(timeout=self.download_timeout * 1000) as download_info:
+                    await element.click()
+                download = await download_info.value
+                url = download.url
+                await download.cancel()
+                if not url.startswith(("http://", "https://")):
+                    raise ValueError(f"下载链接不是HTTP地址: {url[:50]}")
+                return url
+
+            url = await AsyncPopupInterceptor(page).capture_url(element.click, self.download_timeout * 1000)
+            if not url:
+                raise ValueError("无法从预览页面提取PDF链接")
+            return url
+
+        except Exception as e:
+            task = DownloadTask(f"unresolved_{len(self.unresolved_tasks) + 1}", resource)
+            task.status = "failed"
+            task.error_message = f"解析下载链接失败: {e}"
+            self.unresolved_tasks.append(task)
+            logger.error(f"下载失败: {task.resource_name} - {task.error_message}")
+            return None
+
+    @staticmethod
+    async def _locate_element(page: Page, resource: Dict) -> Locator:
+        """
+        定位资源元素：按检测时的标记直接定位；标记已不在页面上（重新渲染）时在当前Tab重新检测找回
+
+        Raises:
+            ValueError: 找不到元素
+        """
+        rid = resource.get("rid")
+        if rid:
+            element = page.locator(rid_selector(rid))
+            if await element.count() == 1:
+                return element
+
+            found = await AsyncResourceDetector(page).relocate(resource)
+            if not found or not found.get("rid"):
+                raise ValueError(f"元素标记已失效且重新检测未找到: {resource.get('element_text', '')[:50]}")
+            logger.debug(f"元素标记已失效，重新检测后定位: {found['selector']}")
+            resource.update(rid=found["rid"], selector=found["selector"])
+            return page.locator(found["selector"])
+
+        selector = resource.get("selector")
+        if not selector:
+            raise ValueError("没有有效的元素选择器")
+        element = page.locator(selector).first
+        if await element.count() == 0:
+            raise ValueError(f"找不到元素: {selector}")
+        return element
+
+    async def _cookie_watchdog(self, page: Page, interval: float = 0.5):
+        """HTTP通道报告认证失效时，在事件循环所在线程重新同步cookies"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.manager.http_pool.cookies_stale:
+                logger.info("HTTP通道认证失效，重新同步浏览器cookies")
+                await self.sync_cookies(page)
@@ -0,0 +1,108 @@
+# auth_cache.py
+"""
+登录状态缓存
+把浏览器上下文的storage_state（cookies + localStorage）保存到磁盘，
+下次启动时直接恢复，只有缓存过期或Token被服务器拒绝时才重新走登录流程
+"""
+import os
+import json
+import time
+import base64
+from pathlib import Path
+from typing import Dict, Optional
+from config import AUTH_STATE_FILE, AUTH_STATE_MAX_AGE_HOURS
+from logger import logger
+
+
+class AuthStateCache:
+    """storage_state磁盘缓存"""
+
+    def __init__(self, state_path: Path = Path(AUTH_STATE_FILE),
+                 max_age_hours: float = AUTH_STATE_MAX_AGE_HOURS):
+        self.state_path = Path(state_path)
+        self.max_age_hours = max_age_hours
+
+    def load(self) -> Optional[Dict]:
+        """读取未过期的登录状态，不存在或已过期返回None"""
+        if not self.state_path.exists():
+            return None
+
+        age_hours = (time.time() - self.state_path.stat().st_mtime) / 3600
+        if self.max_age_hours and age_hours > self.max_age_hours:
+            logger.info(f"登录状态缓存已超过 {self.max_age_hours} 小时，需要重新登录")
+            return None
+
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取登录状态缓存失败: {e}")
+            return None
+
+        token = self.extract_token(state)
+        if not token:
+            logger.debug("登录状态缓存中没有Token")
+            return None
+
+        if self._is_expired(state, token):
+            logger.info("缓存的Token已过期，需要重新登录")
+            return None
+
+        return state
+
+    def save(self, state: Dict):
+        """保存登录状态（先写临时文件再替换，仅当前用户可读）"""
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.state_path)
+            logger.debug(f"登录状态已缓存: {self.state_path}")
+        except Exception as e:
+            logger.warning(f"保存登录状态缓存失败: {e}")
+
+    def clear(self):
+        """删除缓存"""
+        try:
+            self.state_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def extract_token(state: Dict) -> Optional[str]:
+        """从storage_state中提取Token（与BrowserManager.get_token的查找顺序一致）"""
+        for cookie in state.get("cookies", []):
+            if 'token' in cookie.get('name', '').lower():
+                return cookie.get('value')
+
+        for origin in state.get("origins", []):
+            for item in origin.get("localStorage", []):
+                if item.get("name") == "token" and item.get("value"):
+                    return item["value"]
+
+        return None
+
+    @staticmethod
+    def _is_expired(state: Dict, token: str) -> bool:
+        """检查Token cookie的过期时间，以及JWT Token自带的exp字段"""
+        now = time.time()
+
+        for cookie in state.get("cookies", []):
+            if 'token' in cookie.get('name', '').lower():
+                expires = cookie.get("expires", -1)
+                if expires and 0 < expires < now:
+                    return True
+
+        parts = token.split(".")
+        if len(parts) == 3:
+            try:
+                payload = parts[1] + "=" * (-len(parts[1]) % 4)
+                exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+                if exp and exp < now:
+                    return True
+            except Exception:
+                pass
+
+        return False
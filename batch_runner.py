@@ -0,0 +1,289 @@
+# batch_runner.py
+"""
+批量任务（无交互）
+按任务文件/命令行参数选择课程、课时范围和资源类型，依次（或并行）处理多门课程，
+全程不需要输入，结束时写出JSON汇总并返回退出码，便于定时任务调用
+"""
+import json
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from config import Config, API_MAX_WORKERS, API_REQUESTS_PER_SECOND, BROWSER_POOL_SIZE
+from logger import logger
+from utils import FileUtils
+from course_catalog import open_catalog
+from lesson_builder import LessonListBuilder
+from async_pipeline import AsyncBrowserManager, AsyncDownloadScheduler
+from browser_pool import BrowserContextPool, ParallelLessonExplorer
+from progress_journal import ProgressJournal, JOURNAL_FILE_NAME
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1  # 有课程未找到/处理失败或有资源下载失败
+EXIT_INVALID_JOB = 2  # 任务配置无效，未开始处理
+
+# 任务配置默认值
+DEFAULT_JOB = {
+    "courses": [],  # 课程编码、课程ID、完整课程名或通配符模式（如 "2025-*梦想家*"）
+    "lessons": "all",  # 课时范围（按课时列表中的序号）："all"、"2-5"、"1,3,6-8" 或序号列表
+    "resource_types": None,  # 只下载这些类型（pdf / ppt / video / sb3 ...），null表示全部
+    "max_concurrent": 4,  # HTTP下载并发数
+    "browser_pool_size": BROWSER_POOL_SIZE,  # 并行探索课时的浏览器上下文数量
+    "api_workers": API_MAX_WORKERS,  # 课时列表接口并发数
+    "parallel_courses": False,  # 多门课程是否同时处理（课时并发仍受上下文池大小限制）
+    "headless": True,
+    "block_requests": None,  # 拦截图片/字体/音视频/统计脚本等请求，null表示无头运行时拦截（规则见 config.py）
+    "download_dir": None,  # 下载根目录，null表示 Config.DOWNLOAD_BASE_DIR
+    "summary_file": None,  # 汇总文件，null表示 <下载根目录>/batch_summary.json
+    "resume": False,  # 根据 <下载根目录>/progress_journal.jsonl 跳过已完成的课时并恢复未完成的下载
+    "revalidate": True,  # 已下载的资源用ETag向服务器确认是否变化，false表示直接跳过
+}
+
+
+def load_job(job_path: Optional[Path] = None, overrides: Optional[Dict] = None) -> Dict:
+    """
+    读取任务配置并与命令行参数合并（命令行中非None的值优先）
+
+    Raises:
+        ValueError: 配置无效
+    """
+    job = dict(DEFAULT_JOB)
+    if job_path:
+        with open(job_path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        unknown = set(loaded) - set(DEFAULT_JOB)
+        if unknown:
+            raise ValueError(f"任务配置中有未知字段: {', '.join(sorted(unknown))}")
+        job.update(loaded)
+
+    job.update({key: value for key, value in (overrides or {}).items() if value is not None})
+
+    if isinstance(job["courses"], str):
+        job["courses"] = [job["courses"]]
+    if not job["courses"]:
+        raise ValueError("任务配置中没有课程（courses）")
+    if isinstance(job["resource_types"], str):
+        job["resource_types"] = [item.strip() for item in job["resource_types"].split(",") if item.strip()]
+    parse_lesson_range(job["lessons"], 1)  # 提前校验格式
+    return job
+
+
+def parse_lesson_range(spec, total: int) -> List[int]:
+    """
+    解析课时范围，返回从0开始的下标（超出课时数的部分忽略）
+
+    Raises:
+        ValueError: 格式无效
+    """
+    if spec in (None, "", "all"):
+        return list(range(total))
+
+    if isinstance(spec, int):
+        parts = [str(spec)]
+    elif isinstance(spec, list):
+        parts = [str(item) for item in spec]
+    else:
+        parts = str(spec).split(",")
+
+    indexes = []
+    for part in parts:
+        part = part.strip()
+        try:
+            if "-" in part:
+                start, end = (int(value) for value in part.split("-", 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"无效的课时范围: {part}")
+        if start < 1 or end < start:
+            raise ValueError(f"无效的课时范围: {part}")
+
+        for number in range(start, min(end, total) + 1):
+            if number - 1 not in indexes:
+                indexes.append(number - 1)
+    return indexes
+
+
+def resolve_courses(patterns: List[str]) -> Tuple[List[Dict], List[str]]:
+    """
+    在课程目录中解析课程
+
+    无交互模式下不做模糊匹配：编码/ID/完整名称必须精确匹配，含通配符的模式可以匹配多门课程
+
+    Returns:
+        (课程记录列表（去重，按出现顺序）, 未找到的模式)
+    """
+    catalog = open_catalog()
+    if catalog is None:
+        return [], list(patterns)
+
+    courses, missing, seen = [], [], set()
+    with catalog:
+        for pattern in patterns:
+            pattern = str(pattern).strip()
+            if any(char in pattern for char in "*?["):
+                matched = [catalog.get(course["courseCode"]) for course in catalog.match(pattern)]
+            else:
+                course = catalog.get(pattern) or (catalog.get_by_id(int(pattern)) if pattern.isdigit() else None)
+                if course is None:
+                    matched = [catalog.get(summary["courseCode"]) for summary in catalog.search(pattern)
+                               if summary["courseName"] == pattern]
+                else:
+                    matched = [course]
+
+            matched = [course for course in matched if course]
+            if not matched:
+                missing.append(pattern)
+            for course in matched:
+                if course["courseCode"] not in seen:
+                    seen.add(course["courseCode"])
+                    courses.append(course)
+
+    return courses, missing
+
+
+class BatchRunner:
+    """无交互批量处理"""
+
+    def __init__(self, job: Dict):
+        self.job = job
+        self.download_dir = Path(job["download_dir"] or Config.DOWNLOAD_BASE_DIR)
+        self.summary_path = Path(job["summary_file"] or self.download_dir / "batch_summary.json")
+        self.journal: Optional[ProgressJournal] = None
+        self.resumed: Dict = {}
+
+    def run(self) -> int:
+        """执行任务，写出汇总，返回退出码"""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> int:
+        started_at = datetime.now()
+        start_time = time.time()
+        logger.separator("批量任务")
+
+        courses, missing = resolve_courses(self.job["courses"])
+        results = [{"pattern": pattern, "status": "not_found"} for pattern in missing]
+        for pattern in missing:
+            logger.error(f"课程目录中没有匹配的课程: {pattern}")
+
+        if courses:
+            logger.info(f"待处理课程: {len(courses)} 门")
+            FileUtils.ensure_directory(self.download_dir)
+            self.journal = ProgressJournal(self.download_dir / JOURNAL_FILE_NAME, resume=self.job["resume"])
+            try:
+                results += await self._run_courses(courses)
+            except Exception as e:
+                logger.error(f"批量任务异常: {e}", exc_info=True)
+                results.append({"status": "failed", "error": str(e)})
+            finally:
+                # 中断（包括Ctrl-C）时也把已提交的进度写入磁盘
+                self.journal.close()
+
+        summary = self._summarize(results, started_at, time.time() - start_time)
+        FileUtils.ensure_directory(self.summary_path.parent)
+        FileUtils.save_json(summary, self.summary_path)
+        logger.info(f"批量任务汇总已保存: {self.summary_path}")
+        return summary["exit_code"]
+
+    async def _run_courses(self, courses: List[Dict]) -> List[Dict]:
+        """登录一次，获取课时列表后在共享的上下文池中处理所有课程"""
+        async with AsyncBrowserManager(headless=self.job["headless"],
+                                       block_requests=self.job["block_requests"]) as browser:
+            if not await browser.login():
+                raise RuntimeError("登录失败")
+            token = await browser.get_token()
+            if not token:
+                raise RuntimeError("获取Token失败")
+
+            with LessonListBuilder(token, max_workers=self.job["api_workers"],
+                                   requests_per_second=API_REQUESTS_PER_SECOND) as builder:
+                lessons_by_course = await asyncio.to_thread(
+                    builder.build_courses, [course["courseCode"] for course in courses])
+
+            pool = BrowserContextPool(browser, size=self.job["browser_pool_size"])
+            scheduler = AsyncDownloadScheduler(None, max_concurrent=self.job["max_concurrent"],
+                                               resource_types=self.job["resource_types"],
+                                               journal=self.journal, revalidate=self.job["revalidate"])
+            async with pool, scheduler:
+                # 上次中断时未完成的下载与课时探索同时进行
+                resumed = asyncio.create_task(scheduler.resume_from_journal())
+
+                explorer = ParallelLessonExplorer(pool, scheduler, journal=self.journal)
+                jobs = [self._run_course(explorer, course, lessons_by_course[course["courseCode"]])
+                        for course in courses]
+                if self.job["parallel_courses"]:
+                    results = list(await asyncio.gather(*jobs))
+                else:
+                    results = [await job for job in jobs]
+
+                statuses = [task.status for task in await resumed]
+                self.resumed = {status: statuses.count(status) for status in ("completed", "failed", "skipped")}
+                return results
+
+    async def _run_course(self, explorer: ParallelLessonExplorer, course: Dict,
+                          lessons: Optional[List[Dict]]) -> Dict:
+        """处理一门课程（lessons 为None表示课时列表获取失败）"""
+        course_code = course["courseCode"]
+        course_name = course.get("courseName", course_code)
+        result = {"course_code": course_code, "course_name": course_name, "status": "ok",
+                  "lessons_total": len(lessons or []), "lessons_selected": 0, "lessons_opened": 0,
+                  "completed": 0, "failed": 0, "skipped": 0}
+
+        if lessons is None:
+            logger.error(f"获取课时列表失败，跳过课程: {course_name}")
+            result.update(status="failed", error="获取课时列表失败")
+            return result
+
+        selected = [{**lessons[index], "course_code": course_code, "course_name": course_name}
+                    for index in parse_lesson_range(self.job["lessons"], len(lessons))]
+        result["lessons_selected"] = len(selected)
+        if not selected:
+            logger.warning(f"课程没有选中的课时: {course_name}")
+            return result
+
+        try:
+            course_dir = self.download_dir / FileUtils.sanitize_filename(course_name)
+            stats = await explorer.run(selected, course_dir)
+            result["lessons_opened"] = stats["lessons"]
+            for key in ("completed", "failed", "skipped"):
+                result[key] = stats[key]
+            if stats["failed"] or stats["lessons"] < len(selected):
+                result["status"] = "failed"
+        except Exception as e:
+            logger.error(f"处理课程失败: {course_name} - {e}", exc_info=True)
+            result.update(status="failed", error=str(e))
+
+        return result
+
+    def _summarize(self, results: List[Dict], started_at: datetime, duration: float) -> Dict:
+        """生成汇总"""
+        totals = {key: sum(result.get(key, 0) for result in results)
+                  for key in ("lessons_selected", "lessons_opened", "completed", "failed", "skipped")}
+        ok = (bool(results) and all(result["status"] == "ok" for result in results)
+              and not self.resumed.get("failed"))
+        summary = {
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "duration_seconds": round(duration, 1),
+            "job": self.job,
+            "courses": results,
+            "resumed_tasks": self.resumed,
+            "totals": totals,
+            "exit_code": EXIT_OK if ok else EXIT_FAILED,
+        }
+        logger.info(f"批量任务结束: {sum(result['status'] == 'ok' for result in results)}/{len(results)} 门课程成功, "
+                    f"{totals['completed']}成功, {totals['failed']}失败, {totals['skipped']}已存在跳过")
+        return summary
+
+
+def run_batch_job(job_path: Optional[Path] = None, overrides: Optional[Dict] = None) -> int:
+    """读取任务配置并执行，返回退出码"""
+    try:
+        job = load_job(job_path, overrides)
+    except (OSError, ValueError) as e:
+        logger.error(f"任务配置无效: {e}")
+        return EXIT_INVALID_JOB
+
+    return BatchRunner(job).run()
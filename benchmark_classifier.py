@@ -0,0 +1,182 @@
+# benchmark_classifier.py
+"""
+资源分类器基准测试
+生成大批模拟的DOM快照记录，对比原 ResourceDetector 的逐条规则查找与共用的
+ResourceClassifier 的吞吐量，并校验两者对每条记录的分类结果完全一致
+
+用法: python benchmark_classifier.py [--records 50000] [--repeat 3] [--seed 0]
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from resource_classifier import (
+    ResourceClassifier, EXTENSION_TYPES, KEYWORD_TYPES, ICON_TYPES, TARGET_TYPES, TARGET_EXTENSIONS,
+    TARGET_KEYWORDS, DOWNLOAD_KEYWORDS, DOWNLOADABLE_EXTENSIONS, FILE_NAME_EXTENSIONS, TARGET_TEXT_LIMIT
+)
+
+# ===================== 参照实现：原先逐条规则的线性查找 =====================
+_MAPPING = dict(EXTENSION_TYPES + KEYWORD_TYPES)
+_ICONS = dict(ICON_TYPES)
+
+
+def _legacy_resource_type(text, class_name, icon_src, context):
+    text_lower = text.lower()
+    context_lower = context.lower()
+    for ext, rtype in _MAPPING.items():
+        if ext.startswith(".") and ext in text_lower:
+            return rtype
+    for keyword, rtype in _MAPPING.items():
+        if not keyword.startswith(".") and keyword in text:
+            return rtype
+    if icon_src:
+        for icon_key, rtype in _ICONS.items():
+            if icon_key in icon_src:
+                return rtype
+    for keyword, rtype in _MAPPING.items():
+        if not keyword.startswith(".") and keyword in context_lower:
+            return rtype
+    if "item_ppt" in class_name:
+        if "pptx" in text_lower or "ppt" in text_lower:
+            return "ppt"
+        elif "pdf" in text_lower:
+            return "pdf"
+        elif "sb3" in text_lower:
+            return "sb3"
+    return "unknown"
+
+
+def _legacy_download_method(text, resource_type):
+    if "下载" in text:
+        return "direct"
+    elif "预览" in text:
+        return {"pdf": "preview_pdf", "video": "preview_video", "ppt": "preview_ppt",
+                "sb3": "preview_sb3"}.get(resource_type, "preview")
+    return "direct" if resource_type in ["zip", "archive", "downloadable"] else "preview"
+
+
+def _legacy_file_name(text, resource_type):
+    text = text.strip()
+    if resource_type in FILE_NAME_EXTENSIONS:
+        for ext in FILE_NAME_EXTENSIONS[resource_type]:
+            if ext in text.lower():
+                parts = text.split(ext, 1)
+                if parts[0]:
+                    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', parts[0] + ext)
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', text)[:100]
+
+
+def _legacy_is_downloadable(text):
+    return (any(keyword in text for keyword in DOWNLOAD_KEYWORDS)
+            or any(ext in text.lower() for ext in DOWNLOADABLE_EXTENSIONS))
+
+
+def _legacy_is_target(resource_type, text):
+    text = text[:TARGET_TEXT_LIMIT]
+    return (resource_type in TARGET_TYPES
+            or any(ext in text.lower() for ext in TARGET_EXTENSIONS)
+            or any(keyword in text for keyword in TARGET_KEYWORDS))
+
+
+def legacy_classify(record):
+    text = record.get("text") or ""
+    if not text:
+        return None
+    class_name = record.get("className") or ""
+    context = record.get("contextText") or ""
+    resource_type = _legacy_resource_type(text, class_name, record.get("iconSrc"), context)
+    if resource_type == "unknown" and not _legacy_is_downloadable(text):
+        return None
+    return {
+        "resource_type": resource_type,
+        "download_method": _legacy_download_method(text, resource_type),
+        "file_name": _legacy_file_name(text, resource_type),
+        "is_target": _legacy_is_target(resource_type, text),
+    }
+
+
+# ===================== 模拟数据 =====================
+WORDS = ["第1课", "认识角色", "Scratch", "编程", "小猫", "迷宫", "课堂练习", "拓展", "作品", "素材",
+         "PPT", "ppt", "课件", "讲义", "视频", "资料", "预览", "下载", "查看", "播放", "教辅", "备课", "备课件",
+         "项目文件", "预置代码", "程序", "编程题", "导出", "保存", "获取", "说明", "答案", "复习"]
+EXTENSIONS = [ext for ext, _ in EXTENSION_TYPES] + [".PDF", ".Mp4", ".avi", ".7z", ".txt"]
+ICONS = [icon for icon, _ in ICON_TYPES] + ["folder.png", "blank.svg"]
+CLASSES = ["item_ppt", "resource_box", "tag_file", "video_item", "el-button el-button--text", ""]
+# 以扩展名开头的文本：截取文件名时要跳过前面没有内容的扩展名，改用该类型的下一个扩展名
+EDGE_TEXTS = [".mp4.avi 播放", ".xls播放预览.xlsx.7z", ".pdf", ".pptx课件.ppt", ".zip.rar 下载", "PPT.ppt"]
+
+
+def make_records(count: int, seed: int):
+    """生成模拟的快照记录（文本长度从几个字到几百字不等）"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        words = rng.choices(WORDS, k=rng.randint(1, 6))
+        if rng.random() < 0.6:
+            words.append(rng.choice(["", " ", "-"]) + f"资源{i % 997}" + rng.choice(EXTENSIONS))
+        text = " ".join(words)
+        if i < len(EDGE_TEXTS):
+            text = EDGE_TEXTS[i]
+        elif rng.random() < 0.05:
+            text = rng.choice(EXTENSIONS) + text
+        if rng.random() < 0.05:
+            text = "课程说明 " * rng.randint(30, 60) + text  # 超过200字的长文本
+        context = " ".join(rng.choices(WORDS, k=rng.randint(0, 12)))
+        records.append({
+            "text": text,
+            "className": rng.choice(CLASSES),
+            "iconSrc": f"/static/img/{rng.choice(ICONS)}" if rng.random() < 0.5 else None,
+            "contextText": context,
+        })
+    return records
+
+
+def bench(name, func, records, repeat):
+    """取多次运行中最快的一次"""
+    best, results = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = func(records)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28} {best:8.3f}秒   {len(records) / best:12,.0f} 条/秒")
+    return results, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源分类器基准测试")
+    parser.add_argument("--records", type=int, default=50000, help="模拟记录数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    records = make_records(args.records, args.seed)
+    unique = len({(r["text"], r["className"], r["iconSrc"], r["contextText"]) for r in records})
+    print(f"模拟记录: {len(records)} 条（不同特征 {unique} 组）\n")
+
+    classifier = ResourceClassifier()
+    expected, legacy_time = bench("线性查找（原实现）", lambda items: [legacy_classify(r) for r in items],
+                                  records, args.repeat)
+    single, single_time = bench("ResourceClassifier.classify",
+                                lambda items: [classifier.classify(r["text"], r["className"] or "", r["iconSrc"],
+                                                                   r["contextText"] or "") for r in items],
+                                records, args.repeat)
+
+    print(f"\n加速 {legacy_time / single_time:.1f}x")
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, single)) if a != b]
+    if mismatches:
+        i = mismatches[0]
+        print(f"❌ {len(mismatches)} 条记录分类结果不一致，例如: {records[i]}\n"
+              f"   原实现: {expected[i]}\n   新实现: {single[i]}")
+        sys.exit(1)
+    print(f"✅ {len(records)} 条记录的分类结果与原实现完全一致")
+
+
+if __name__ == '__main__':
+    main()
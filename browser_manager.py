@@ -1,21 +1,50 @@
 # browser_manager.py
-import time
 from typing import Optional, Dict, Any
+from urllib.parse import urlparse
 from playwright.sync_api import sync_playwright, Page, BrowserContext, Browser
-from config import Config
+from config import Config, SNIFF_RESPONSES
 from logger import logger
+from auth_cache import AuthStateCache
+from utils import APIUtils
+from network_sniffer import NetworkResourceSniffer
+from wait_strategy import PageWaiter, wait_stats
+from popup_interceptor import popup_stats
+from request_blocker import RequestBlocker, resolve_block_requests
+
+LOGIN_PASSWORD = 'Wenji321'  # 密码应该从配置读取
 
 
 class BrowserManager:
     """浏览器管理类"""
 
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, use_auth_cache: bool = True, block_requests: Optional[bool] = None,
+                 sniff_responses: Optional[bool] = None):
+        """
+        Args:
+            block_requests: 是否拦截图片/字体/音视频/统计脚本等请求，None表示只在无头运行时拦截
+            sniff_responses: 是否在页面上挂载网络响应嗅探器，None表示按配置 SNIFF_RESPONSES
+        """
         self.headless = headless
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
 
+        # 登录状态缓存
+        self.auth_cache = AuthStateCache() if use_auth_cache else None
+        self.cached_state: Optional[Dict] = None
+        self.cached_token: Optional[str] = None
+
+        # 网络响应嗅探器（启用 sniff_responses 时 start 后可用，传给 DownloadManager 的 sniffer 参数）
+        self.sniff_responses = SNIFF_RESPONSES if sniff_responses is None else sniff_responses
+        self.sniffer: Optional[NetworkResourceSniffer] = None
+
+        # 页面就绪等待（start 后可用）
+        self.waiter: Optional[PageWaiter] = None
+
+        # 请求拦截（start 时挂载到上下文）
+        self.request_blocker = RequestBlocker() if resolve_block_requests(block_requests, headless) else None
+
     def __enter__(self):
         """上下文管理器入口"""
         self.start()
@@ -35,9 +64,13 @@ class BrowserManager:
             args=['--start-maximized', '--disable-blink-features=AutomationControlled']
         )
 
+        # 有未过期的登录状态缓存时直接恢复到上下文中
+        self.cached_state = self.auth_cache.load() if self.auth_cache else None
+
         self.context = self.browser.new_context(
             no_viewport=False,
-            user_agent=Config.USER_AGENT
+            user_agent=Config.USER_AGENT,
+            storage_state=self.cached_state
         )
 
         # 注入反检测脚本
@@ -47,9 +80,15 @@ class BrowserManager:
             })
         """)
 
+        if self.request_blocker:
+            self.request_blocker.attach(self.context)
+
         self.page = self.context.new_page()
         self.page.set_viewport_size(Config.VIEWPORT_SIZE)
         self.page.set_default_timeout(15000)
+        self.waiter = PageWaiter(self.page)
+        if self.sniff_responses:
+            self.enable_response_sniffer()
 
         logger.success("浏览器启动成功")
 
@@ -62,6 +101,18 @@ class BrowserManager:
         if self.playwright:
             self.playwright.stop()
 
+        wait_stats.log_summary()
+        popup_stats.log_summary()
+        if self.request_blocker:
+            self.request_blocker.log_summary()
+
+    def enable_response_sniffer(self) -> NetworkResourceSniffer:
+        """在页面上挂载网络响应嗅探器，从XHR响应中捕获资源链接"""
+        if not self.sniffer:
+            self.sniffer = NetworkResourceSniffer()
+            self.sniffer.attach(self.page)
+        return self.sniffer
+
     def navigate_to(self, url: str, wait_for_network_idle: bool = True):
         """导航到指定URL"""
         logger.progress(f"导航到: {url}")
@@ -71,29 +122,30 @@ class BrowserManager:
             options['wait_until'] = 'networkidle'
 
         self.page.goto(url, **options)
-        time.sleep(Config.PAGE_LOAD_WAIT)
+        self.waiter.loading_gone()
 
     def login(self) -> bool:
-        """执行登录流程"""
+        """执行登录流程（优先使用缓存的登录状态）"""
+        if self._restore_cached_login():
+            return True
+
         try:
             logger.progress("正在访问登录页面...")
             self.navigate_to(Config.LOGIN_URL)
 
             logger.progress("填写登录表单...")
             self.page.fill('input[placeholder="手机号"]', Config.PHONE_NUMBER)
-            self.page.fill('input[placeholder="密码"]', 'Wenji321')  # 密码应该从配置读取
+            self.page.fill('input[placeholder="密码"]', LOGIN_PASSWORD)
             self.page.locator('input[placeholder="密码"]').press('Enter')
             logger.info("已提交登录表单")
 
-            time.sleep(Config.PAGE_LOAD_WAIT)
-
             # 处理隐私协议弹窗
             logger.progress("处理隐私协议弹窗...")
             try:
                 self.page.wait_for_selector('button.el-button--primary >> text=允许获取', timeout=8000)
                 self.page.click('button.el-button--primary >> text=允许获取')
                 logger.info("已点击'允许获取'按钮")
-                time.sleep(Config.CLICK_WAIT)
+                self.waiter.hidden('button.el-button--primary >> text=允许获取')
             except:
                 logger.debug("未找到弹窗或已消失")
 
@@ -105,14 +157,35 @@ class BrowserManager:
             except:
                 logger.warning("等待主页超时，尝试继续...")
 
-            time.sleep(Config.PAGE_LOAD_WAIT)
-
+            self.save_auth_state()
             return True
 
         except Exception as e:
             logger.error(f"登录失败: {e}", exc_info=True)
             return False
 
+    def _restore_cached_login(self) -> bool:
+        """校验缓存的Token，被服务器拒绝时清除缓存"""
+        if not self.cached_state:
+            return False
+
+        token = AuthStateCache.extract_token(self.cached_state)
+        if token and APIUtils.validate_token(token):
+            self.cached_token = token
+            logger.success("已恢复缓存的登录状态，跳过登录流程")
+            return True
+
+        logger.info("缓存的登录状态已被服务器拒绝，重新登录")
+        self.context.clear_cookies()
+        self.auth_cache.clear()
+        self.cached_state = None
+        return False
+
+    def save_auth_state(self):
+        """把当前上下文的登录状态写入缓存"""
+        if self.auth_cache:
+            self.auth_cache.save(self.context.storage_state())
+
     def navigate_to_course_management(self) -> bool:
         """导航到课程管理页面"""
         try:
@@ -121,12 +194,10 @@ class BrowserManager:
             element = self.page.locator('li:has(p.product_name:has-text("一校教培"))')
             if element.count() > 0:
                 element.scroll_into_view_if_needed()
-                time.sleep(Config.CLICK_WAIT)
                 element.click()
                 logger.success("已点击'一校教培'图标")
 
-                self.page.wait_for_load_state('networkidle', timeout=10000)
-                time.sleep(Config.PAGE_LOAD_WAIT)
+                self.waiter.page_ready()
                 return True
             else:
                 logger.warning("未找到'一校教培'入口，尝试直接导航")
@@ -154,6 +225,7 @@ class BrowserManager:
             self._get_token_from_localstorage,
             self._get_token_from_sessionstorage,
             self._get_token_from_window,
+            self._get_token_from_cached_state,
         ]
 
         for source in token_sources:
@@ -188,6 +260,10 @@ class BrowserManager:
         """从window对象获取Token"""
         return self.page.evaluate("() => window.token || window.TOKEN || null")
 
+    def _get_token_from_cached_state(self) -> Optional[str]:
+        """从已校验的登录状态缓存获取Token（恢复登录后页面尚未打开站点时使用）"""
+        return self.cached_token
+
     # 在 browser_manager.py 中添加以下方法
 
     def navigate_to_course_detail(self, course_code: str) -> bool:
@@ -201,9 +277,6 @@ class BrowserManager:
             logger.progress(f"导航到课程详情页: {course_code}")
             self.navigate_to(course_detail_url)
 
-            # 等待课程详情页加载
-            time.sleep(Config.PAGE_LOAD_WAIT * 2)
-
             # 检查是否成功进入课程详情页
             # 可以检查一些课程详情页特有的元素
             try:
@@ -239,7 +312,7 @@ class BrowserManager:
 
             # 等待课程列表加载（设置96条/页后可能会刷新）
             self.page.wait_for_selector('div.course_name', timeout=15000)
-            time.sleep(Config.CLICK_WAIT)
+            self.waiter.stable_count('div.course_name')
 
             # 获取所有课程元素（设置后应为全部课程）
             course_elements = self.page.locator('div.course_name').all()
@@ -258,15 +331,13 @@ class BrowserManager:
 
                         # 滚动到视图
                         course_elem.scroll_into_view_if_needed()
-                        time.sleep(Config.CLICK_WAIT)
 
                         # 点击课程
                         course_elem.click()
                         logger.success(f"已点击课程: {elem_text}")
 
                         # 等待页面跳转
-                        self.page.wait_for_load_state('networkidle')
-                        time.sleep(Config.PAGE_LOAD_WAIT * 2)
+                        self.waiter.page_ready()
 
                         # 验证是否进入了课程详情页
                         current_url = self.page.url
@@ -313,7 +384,7 @@ class BrowserManager:
                         if "课程" in elem_text or len(elem_text) > 5:  # 简单判断
                             elem.click()
                             logger.success(f"已点击XPath找到的课程: {elem_text}")
-                            time.sleep(Config.PAGE_LOAD_WAIT * 2)
+                            self.waiter.page_ready()
                             return True
                     except:
                         continue
@@ -379,7 +450,7 @@ class BrowserManager:
 
             page_size_input.click()
             logger.debug("已点击分页条数选择框，等待下拉列表弹出...")
-            time.sleep(1)  # 等待下拉动画
+            self.waiter.visible('li.el-select-dropdown__item:has-text("96条/页")')
 
             # 3. 在全局范围内选择下拉列表中包含“96条/页”文本的选项
             # 注意：弹出的下拉列表可能在body末尾，不一定在分页组件内部
@@ -390,14 +461,14 @@ class BrowserManager:
                 self.page.screenshot(path="debug_dropdown_failed.png")
                 return False
 
-            option_96.click()
+            # 选择后，页面会重新请求课程列表接口并刷新列表
+            self.waiter.response(option_96.click, urlparse(Config.COURSE_LIST_URL).path)
             logger.success("✅ 已成功选择‘96条/页’。")
 
-            # 4. 重要：等待页面数据刷新
-            # 选择后，页面会重新请求数据并刷新列表
+            # 4. 重要：等待列表渲染完成（加载遮罩消失且行数不再变化）
             logger.info("等待课程列表刷新...")
-            self.page.wait_for_load_state('networkidle')
-            time.sleep(2)  # 额外等待确保DOM渲染完成
+            self.waiter.loading_gone()
+            self.waiter.stable_count('div.course_name')
 
             # 5. （可选）验证：检查分页器是否消失或页码只剩下1
             # 如果成功，通常页码列表会消失或只有一页，并且“共 X 条”的X应该是总课程数
@@ -416,7 +487,6 @@ class BrowserManager:
         try:
             # 首先确保在课程管理页面
             self.navigate_to(Config.COURSE_MANAGE_URL)
-            time.sleep(Config.PAGE_LOAD_WAIT)
 
             # 等待课程列表加载
             self.page.wait_for_selector('div.course_name', timeout=15000)
@@ -443,8 +513,7 @@ class BrowserManager:
                     logger.info(f"已点击课程: {course_text}")
 
                     # 等待页面跳转
-                    self.page.wait_for_load_state('networkidle')
-                    time.sleep(Config.PAGE_LOAD_WAIT * 2)
+                    self.waiter.page_ready()
 
                     return True
 
@@ -0,0 +1,290 @@
+# browser_pool.py
+"""
+浏览器上下文池
+登录一次后把已认证的storage_state克隆到多个上下文，多个课时在各自的上下文中并行探索
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from playwright.async_api import BrowserContext, Page
+from config import (
+    BROWSER_POOL_SIZE,
+    BROWSER_POOL_RECYCLE_LESSONS,
+    BROWSER_POOL_MEMORY_LIMIT_MB
+)
+from logger import logger
+from utils import FileUtils
+from async_pipeline import AsyncBrowserManager, AsyncDownloadScheduler
+from progress_journal import ProgressJournal
+from request_blocker import format_block_stats
+from wait_strategy import AsyncPageWaiter
+
+# 回收时重建上下文的尝试次数，都失败时放弃该位置
+RECREATE_ATTEMPTS = 3
+
+COURSE_DETAIL_URL = "https://manage.shengtongedu.cn/curriculum/#/curriculum/courseDetail?courseCode={course_code}"
+
+
+class PooledContext:
+    """池中的一个上下文（独立的cookies、存储和Tab状态）"""
+
+    def __init__(self, slot: int, context: BrowserContext, page: Page):
+        self.slot = slot
+        self.context = context
+        self.page = page
+        self.lessons_done = 0
+        self.created_at = time.time()
+
+
+class BrowserContextPool:
+    """浏览器上下文池"""
+
+    def __init__(self,
+                 browser_manager: AsyncBrowserManager,
+                 size: int = BROWSER_POOL_SIZE,
+                 recycle_after_lessons: int = BROWSER_POOL_RECYCLE_LESSONS,
+                 memory_limit_mb: int = BROWSER_POOL_MEMORY_LIMIT_MB):
+        """
+        Args:
+            browser_manager: 已登录的浏览器管理器，其上下文的storage_state会被克隆
+            size: 上下文数量
+            recycle_after_lessons: 每个上下文处理多少个课时后重建（0表示不按课时数回收）
+            memory_limit_mb: 单个上下文JS堆内存上限（0表示不限制）
+        """
+        self.browser_manager = browser_manager
+        self.size = max(1, size)
+        self.recycle_after_lessons = recycle_after_lessons
+        self.memory_limit_mb = memory_limit_mb
+
+        self.storage_state: Optional[Dict] = None
+        self._idle: "asyncio.Queue[Optional[PooledContext]]" = asyncio.Queue()  # None 表示所有上下文都已放弃
+        self._slots: List[PooledContext] = []
+
+        # 统计信息
+        self.lessons_processed = 0
+        self.recycled_count = 0
+        self.memory_recycled_count = 0
+        self.dropped_count = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self):
+        """克隆登录状态并创建所有上下文"""
+        self.storage_state = await self.browser_manager.context.storage_state()
+
+        contexts = await asyncio.gather(*(self._create(slot) for slot in range(self.size)))
+        for pooled in contexts:
+            self._slots.append(pooled)
+            self._idle.put_nowait(pooled)
+
+        logger.success(f"浏览器上下文池已就绪: {self.size} 个上下文")
+
+    async def close(self):
+        """关闭所有上下文"""
+        for pooled in self._slots:
+            try:
+                await pooled.context.close()
+            except Exception as e:
+                logger.debug(f"关闭上下文失败: {e}")
+        self._slots.clear()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        独占一个上下文
+
+        用完归还时检查回收条件：处理课时数达到上限或JS堆内存超限，则关闭并用同一份登录状态重建。
+        重建失败的位置不再归还（不会把已关闭的上下文交给后续课时）。
+
+        Raises:
+            RuntimeError: 所有上下文都已放弃
+        """
+        pooled = await self._idle.get()
+        if pooled is None:
+            # 传给其他等待者
+            self._idle.put_nowait(None)
+            raise RuntimeError("上下文池中已没有可用的上下文")
+
+        try:
+            yield pooled
+        finally:
+            pooled.lessons_done += 1
+            self.lessons_processed += 1
+            pooled = await self._recycle_if_needed(pooled)
+            if pooled is not None:
+                self._idle.put_nowait(pooled)
+            elif not self._slots:
+                # 最后一个位置也已放弃，唤醒等待中的课时
+                self._idle.put_nowait(None)
+
+    async def _create(self, slot: int) -> PooledContext:
+        """创建一个带登录状态的上下文"""
+        context = await self.browser_manager.new_context(self.storage_state)
+        page = await self.browser_manager.new_page(context)
+        return PooledContext(slot, context, page)
+
+    async def _recycle_if_needed(self, pooled: PooledContext) -> Optional[PooledContext]:
+        """按课时数和内存判断是否重建上下文，重建失败时放弃该位置并返回None"""
+        reason = None
+        if self.recycle_after_lessons and pooled.lessons_done >= self.recycle_after_lessons:
+            reason = f"已处理 {pooled.lessons_done} 个课时"
+        elif self.memory_limit_mb:
+            used_mb = await self._js_heap_mb(pooled.page)
+            if used_mb is not None and used_mb > self.memory_limit_mb:
+                reason = f"JS堆内存 {used_mb:.0f}MB 超过上限 {self.memory_limit_mb}MB"
+                self.memory_recycled_count += 1
+
+        if not reason:
+            return pooled
+
+        logger.info(f"回收上下文 #{pooled.slot}: {reason}")
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"关闭上下文失败: {e}")
+
+        index = self._slots.index(pooled)
+        for attempt in range(1, RECREATE_ATTEMPTS + 1):
+            try:
+                fresh = await self._create(pooled.slot)
+            except Exception as e:
+                logger.warning(f"重建上下文 #{pooled.slot} 失败（第{attempt}次）: {e}")
+                continue
+            self._slots[index] = fresh
+            self.recycled_count += 1
+            return fresh
+
+        del self._slots[index]
+        self.dropped_count += 1
+        logger.error(f"上下文 #{pooled.slot} 无法重建，已放弃（剩余 {len(self._slots)} 个）")
+        return None
+
+    @staticmethod
+    async def _js_heap_mb(page: Page) -> Optional[float]:
+        """读取页面JS堆内存（仅Chromium提供performance.memory）"""
+        try:
+            used = await page.evaluate(
+                "() => performance.memory ? performance.memory.usedJSHeapSize : null")
+            return used / 1024 / 1024 if used is not None else None
+        except Exception:
+            return None
+
+    def get_stats(self) -> Dict:
+        """获取池统计信息"""
+        return {
+            "size": self.size,
+            "lessons_processed": self.lessons_processed,
+            "recycled": self.recycled_count,
+            "memory_recycled": self.memory_recycled_count,
+            "dropped": self.dropped_count,
+        }
+
+
+async def open_lesson(page: Page, lesson_info: Dict) -> bool:
+    """在页面中进入课程详情并点击课时树节点"""
+    course_code = lesson_info.get("course_code")
+    session_name = lesson_info.get("session_name")
+    if not course_code or not session_name:
+        logger.error(f"课时信息缺少课程编码或课时名称: {lesson_info.get('full_name')}")
+        return False
+
+    try:
+        await page.goto(COURSE_DETAIL_URL.format(course_code=course_code), wait_until="networkidle")
+
+        node = page.locator(".el-tree-node__label", has_text=session_name).first
+        await node.wait_for(timeout=10000)
+        await node.click()
+        await AsyncPageWaiter(page).page_ready()
+        return True
+
+    except Exception as e:
+        logger.error(f"进入课时失败: {lesson_info.get('full_name')} - {e}")
+        return False
+
+
+class ParallelLessonExplorer:
+    """多个课时在上下文池中并行探索，资源统一交给下载调度器的HTTP通道"""
+
+    def __init__(self,
+                 pool: BrowserContextPool,
+                 scheduler: AsyncDownloadScheduler,
+                 lesson_opener: Callable[[Page, Dict], Awaitable[bool]] = open_lesson,
+                 journal: Optional[ProgressJournal] = None):
+        """
+        Args:
+            journal: 恢复运行时的进度日志，已完成或可直接恢复任务的课时不再打开页面
+        """
+        self.pool = pool
+        self.scheduler = scheduler
+        self.lesson_opener = lesson_opener
+        self.journal = journal
+
+    async def run(self, lessons: List[Dict], base_download_dir: Path) -> Dict:
+        """
+        并行处理所有课时
+
+        Returns:
+            汇总统计 {"lessons": 成功进入的课时数, "completed": ..., "failed": ..., "skipped": ...}
+        """
+        logger.separator(f"并行探索 {len(lessons)} 个课时（{self.pool.size} 个上下文）")
+        start_time = time.time()
+
+        results = await asyncio.gather(*(self._process_lesson(lesson, base_download_dir)
+                                         for lesson in lessons))
+
+        summary = {"lessons": 0, "completed": 0, "failed": 0, "skipped": 0}
+        for stats in results:
+            if stats is None:
+                continue
+            summary["lessons"] += 1
+            for key in ("completed", "failed", "skipped"):
+                summary[key] += stats[key]
+
+        logger.info(f"并行探索完成: {summary['lessons']}/{len(lessons)} 个课时, "
+                    f"{summary['completed']}成功, {summary['failed']}失败, {summary['skipped']}已存在跳过, "
+                    f"耗时 {time.time() - start_time:.1f}秒")
+        logger.info(f"上下文池: {self.pool.get_stats()}")
+        return summary
+
+    async def _process_lesson(self, lesson_info: Dict, base_download_dir: Path) -> Optional[Dict]:
+        """在独占的上下文中处理一个课时（异常只影响本课时，记为失败返回None）"""
+        if self.journal and not self.journal.needs_exploration(lesson_info):
+            logger.info(f"进度日志中已处理，跳过课时: {lesson_info.get('full_name')}")
+            return {"completed": 0, "failed": 0, "skipped": 0}
+
+        try:
+            return await self._explore_lesson(lesson_info, base_download_dir)
+        except Exception as e:
+            logger.error(f"处理课时失败: {lesson_info.get('full_name')} - {e}", exc_info=True)
+            if self.journal:
+                self.journal.mark_lesson(lesson_info, "failed")
+            return None
+
+    async def _explore_lesson(self, lesson_info: Dict, base_download_dir: Path) -> Optional[Dict]:
+        """获取上下文，进入课时并探索下载"""
+        async with self.pool.acquire() as pooled:
+            logger.info(f"[上下文 #{pooled.slot}] 处理课时: {lesson_info.get('full_name')}")
+            try:
+                if not await self.lesson_opener(pooled.page, lesson_info):
+                    return None
+
+                download_dir = FileUtils.create_lesson_folder(base_download_dir, lesson_info)
+                return await self.scheduler.explore_and_download(lesson_info, download_dir, page=pooled.page)
+            finally:
+                self._log_blocked(pooled, lesson_info)
+
+    def _log_blocked(self, pooled: PooledContext, lesson_info: Dict):
+        """输出课时页面的请求拦截统计"""
+        blocker = self.pool.browser_manager.request_blocker
+        if not blocker:
+            return
+        stats = blocker.take_lesson_stats(pooled.context)
+        if stats["requests"]:
+            logger.info(f"[上下文 #{pooled.slot}] {lesson_info.get('full_name')}: {format_block_stats(stats)}")
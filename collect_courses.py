@@ -4,11 +4,14 @@
 """
 import time
 import json
+import itertools
 from pathlib import Path
 from config import Config
 from logger import logger
 from browser_manager import BrowserManager
 from utils import APIUtils, FileUtils
+from course_sync import sync_courses, changed_course_codes
+from course_catalog import open_catalog
 
 
 def collect_courses_data():
@@ -36,18 +39,36 @@ def collect_courses_data():
 
             logger.success("登录成功，Token已获取")
 
-            # 3. 通过API获取所有课程
+            # 3. 通过API获取所有课程（逐页到达）
             logger.progress("开始收集课程数据...")
-            courses_data = APIUtils.get_all_courses(token)
+            courses_iter = APIUtils.iter_courses(token)
+            first_course = next(courses_iter, None)
 
-            if not courses_data:
+            if first_course is None:
                 logger.error("未能获取任何课程数据")
                 return
 
-            # 4. 保存课程数据
+            # 4. 边获取边保存课程数据
             logger.progress("保存课程数据到文件...")
-
-            if FileUtils.save_json(courses_data, Config.COURSES_DATA_FILE):
+            courses_data = []
+
+            def collected():
+                for course in itertools.chain([first_course], courses_iter):
+                    courses_data.append(course)
+                    yield course
+
+            try:
+                FileUtils.save_json_stream(collected(), Config.COURSES_DATA_FILE)
+                saved = True
+            except RuntimeError as e:
+                # 课程列表不完整时保留原有的课程数据文件
+                logger.error(f"获取课程数据失败，未保存: {e}")
+                saved = False
+            except Exception as e:
+                logger.error(f"保存JSON文件失败: {e}", exc_info=True)
+                saved = False
+
+            if saved:
                 logger.success(f"课程数据收集完成，共 {len(courses_data)} 门课程")
                 logger.success(f"数据已保存到: {Config.COURSES_DATA_FILE}")
 
@@ -76,33 +97,62 @@ def collect_courses_data():
         logger.info("程序结束")
 
 
+def sync_courses_data(full: bool = False):
+    """增量同步课程数据，只记录并输出发生变化的课程"""
+    try:
+        with BrowserManager(headless=True) as browser:
+            if not browser.login():
+                logger.error("登录失败")
+                return
+
+            if not browser.navigate_to_course_management():
+                logger.error("导航到课程管理页面失败")
+                return
+
+            token = browser.get_token()
+            if not token:
+                logger.error("获取Token失败")
+                return
+
+        entry = sync_courses(token, full=full)
+        if entry:
+            codes = changed_course_codes(entry)
+            logger.info(f"需要重新抓取的课程: {len(codes)} 门")
+            if codes:
+                logger.info("可执行: python lesson_builder.py --changed")
+
+    except KeyboardInterrupt:
+        logger.info("用户中断程序")
+    except Exception as e:
+        logger.error(f"同步课程数据出错: {e}", exc_info=True)
+
+
 def load_and_display_courses():
     """加载并显示已保存的课程数据"""
     logger.separator("课程数据查看工具")
 
-    courses_data = FileUtils.load_json(Config.COURSES_DATA_FILE)
-    if not courses_data:
+    # 通过课程目录索引读取，只加载统计和显示需要的字段
+    catalog = open_catalog()
+    total = catalog.count() if catalog else 0
+    if not total:
+        if catalog:
+            catalog.close()
         logger.error("没有可用的课程数据")
         return
 
-    logger.success(f"成功加载 {len(courses_data)} 门课程")
+    logger.success(f"成功加载 {total} 门课程")
 
     # 显示课程统计
     logger.separator("课程统计")
 
     # 按课程类型统计
-    course_types = {}
-    for course in courses_data:
-        course_type = course.get('courseType', '未知类型')
-        course_types[course_type] = course_types.get(course_type, 0) + 1
-
     logger.info("课程类型分布:")
-    for ctype, count in course_types.items():
+    for ctype, count in catalog.type_counts("course_type").items():
         logger.info(f"  {ctype}: {count}门")
 
     # 显示课程详情
     logger.separator("课程详情")
-    for i, course in enumerate(courses_data[:20], 1):  # 只显示前20个
+    for i, course in enumerate(catalog.list_courses(limit=20), 1):  # 只显示前20个
         course_name = course.get('courseName', '未知课程')
         course_id = course.get('id', '未知ID')
         course_code = course.get('courseCode', '未知编码')
@@ -116,8 +166,9 @@ def load_and_display_courses():
         if i % 5 == 0:  # 每5个课程加一个分隔
             logger.info("-" * 60)
 
-    if len(courses_data) > 20:
-        logger.info(f"... 还有 {len(courses_data) - 20} 门课程未显示")
+    if total > 20:
+        logger.info(f"... 还有 {total - 20} 门课程未显示")
+    catalog.close()
 
 
 if __name__ == '__main__':
@@ -129,6 +180,9 @@ if __name__ == '__main__':
     elif len(sys.argv) > 1 and sys.argv[1] == 'view':
         # 查看已保存的课程数据
         load_and_display_courses()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'sync':
+        # 增量同步课程数据（--full 读完所有页面以发现已删除的课程）
+        sync_courses_data(full='--full' in sys.argv)
     else:
         # 默认执行收集
         collect_courses_data()
\ No newline at end of file
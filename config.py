@@ -37,4 +37,42 @@ VALIDATE_CORE_STRUCTURE_XPATH = "//div[contains(@class,'el-tree') or contains(@c
 MAX_CONCURRENT = 3
 RETRY_TIMES = 3
 RETRY_DELAY = 2
-SUPPORT_FILE_TYPES = ["pdf", "ppt", "pptx", "doc", "docx", "xls", "xlsx", "mp4", "mp3", "jpg", "png", "zip", "rar"]
\ No newline at end of file
+SUPPORT_FILE_TYPES = ["pdf", "ppt", "pptx", "doc", "docx", "xls", "xlsx", "mp4", "mp3", "jpg", "png", "zip", "rar"]
+
+# ===================== 浏览器上下文池配置 =====================
+BROWSER_POOL_SIZE = 3  # 并行探索课时的浏览器上下文数量
+BROWSER_POOL_RECYCLE_LESSONS = 20  # 每个上下文处理多少个课时后关闭重建，0表示不按课时数回收
+BROWSER_POOL_MEMORY_LIMIT_MB = 512  # 单个上下文JS堆内存上限（MB），超过后回收，0表示不限制
+
+# ===================== 登录状态缓存配置 =====================
+AUTH_STATE_FILE = "./auth_state.json"  # 浏览器storage_state缓存文件（含登录凭证，勿提交）
+AUTH_STATE_MAX_AGE_HOURS = 12  # 缓存有效期（小时），超过后重新登录
+
+# ===================== 课时资源接口配置 =====================
+# 课时资源列表接口地址：打开课时页面时由前端请求，启用网络嗅探后日志中的“从网络响应捕获 N 个资源: <路径>”即是该接口
+# 默认为空，未配置时 course_manifest.py 直接退出；请求体沿用课时列表接口的字段
+# （courseCode/courseUnitCode/sessionCode），与实际接口不一致时需调整 APIUtils.fetch_session_resources
+SESSION_RESOURCE_URL = ""
+# 探索课时页面时监听XHR/fetch响应，从资源列表JSON中直接提取下载链接（捕获到的资源不再点击页面）
+SNIFF_RESPONSES = False
+
+# ===================== 接口并发配置 =====================
+API_MAX_WORKERS = 8  # 单元/课时/资源接口的并发请求线程数
+API_REQUESTS_PER_SECOND = 5  # 所有线程合计的接口请求速率上限（代替固定的请求间隔）
+
+# ===================== 页面等待配置 =====================
+WAIT_TIMEOUT_MS = 10000  # 等待页面就绪信号（加载遮罩消失、Tab面板显示、列表稳定）的超时时间（毫秒）
+WAIT_STABLE_MS = 300  # 列表行数保持不变多久视为渲染完成（毫秒）
+
+# ===================== 请求拦截配置 =====================
+# 探索课时页面时拦截发现资源用不到的请求（图片、字体、音视频、统计脚本），只读取属性不需要加载内容；
+# 无头运行（批量任务）默认开启，显示浏览器调试时默认关闭
+BLOCK_REQUESTS = True  # 总开关，False时无头运行也不拦截
+BLOCK_RESOURCE_TYPES = ["image", "media", "font"]  # 拦截的请求类型（Playwright的 request.resource_type）
+BLOCK_HOSTS = ["hm.baidu.com", "google-analytics.com", "googletagmanager.com", "cnzz.com", "umeng.com",
+               "growingio.com", "sensorsdata.cn", "clarity.ms"]  # 拦截的域名（含子域名）
+ALLOW_RESOURCE_TYPES = ["document", "xhr", "fetch"]  # 这些类型一律放行（页面导航和资源列表接口）
+ALLOW_HOSTS = []  # 这些域名（含子域名）一律放行
+# 被拦截请求的估算大小（字节），请求未发出无法得知实际大小，按类型估算节省的流量
+BLOCK_ESTIMATED_BYTES = {"image": 30 * 1024, "media": 512 * 1024, "font": 64 * 1024, "script": 40 * 1024}
+BLOCK_ESTIMATED_BYTES_DEFAULT = 10 * 1024
@@ -0,0 +1,205 @@
+# course_catalog.py
+"""
+课程目录索引
+把 courses_data.json 导入SQLite（按 id、课程编码、课程名称、课程类型建索引），
+列表/查找只读取需要的字段，完整记录按需反序列化；JSON文件变化后自动重建
+"""
+import json
+import sqlite3
+import difflib
+from pathlib import Path
+from typing import Dict, List, Optional
+from config import Config
+from logger import logger
+from utils import FileUtils
+
+CATALOG_FILE_NAME = "courses_catalog.db"
+
+# 索引列: (列名, 课程记录字段)
+COLUMNS = [
+    ("id", "id"),
+    ("course_code", "courseCode"),
+    ("course_name", "courseName"),
+    ("config_course_type", "configCourseType"),
+    ("course_type", "courseType"),
+    ("campus_name", "campusName"),
+    ("unit_num", "unitNum"),
+    ("session_num", "sessionNum"),
+]
+SUMMARY_COLUMNS = ", ".join(column for column, _ in COLUMNS)
+
+
+class CourseCatalog:
+    """基于SQLite的课程目录"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS courses (
+                position INTEGER PRIMARY KEY,
+                id INTEGER,
+                course_code TEXT,
+                course_name TEXT,
+                config_course_type TEXT,
+                course_type TEXT,
+                campus_name TEXT,
+                unit_num INTEGER,
+                session_num INTEGER,
+                record TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_id ON courses(id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_code ON courses(course_code)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_name ON courses(course_name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_type ON courses(config_course_type)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """关闭数据库"""
+        self._conn.close()
+
+    def _source_signature(self, json_path: Path) -> str:
+        stat = json_path.stat()
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def is_stale(self, json_path: Path) -> bool:
+        """索引是否落后于课程JSON文件"""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        return row is None or row["value"] != self._source_signature(json_path)
+
+    def rebuild(self, json_path: Path) -> int:
+        """从课程JSON文件重建索引，返回课程数"""
+        courses = FileUtils.load_json(json_path) or []
+
+        rows = []
+        for position, course in enumerate(courses):
+            # 完整记录只保留非空字段（大部分字段为null）
+            record = {key: value for key, value in course.items() if value is not None}
+            rows.append((position, *(course.get(field) for _, field in COLUMNS),
+                         json.dumps(record, ensure_ascii=False, separators=(",", ":"))))
+
+        with self._conn:
+            self._conn.execute("DELETE FROM courses")
+            self._conn.executemany(
+                f"INSERT INTO courses (position, {SUMMARY_COLUMNS}, record) "
+                f"VALUES ({', '.join('?' * (len(COLUMNS) + 2))})", rows)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?)",
+                               (self._source_signature(json_path),))
+
+        logger.debug(f"课程目录索引已重建: {len(rows)} 门课程")
+        return len(rows)
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict:
+        """索引行转换为课程摘要（字段名与课程记录一致）"""
+        return {field: row[column] for column, field in COLUMNS}
+
+    def count(self) -> int:
+        """课程总数"""
+        return self._conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0]
+
+    def list_courses(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """按原始顺序列出课程摘要"""
+        rows = self._conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM courses ORDER BY position LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset)).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def type_counts(self, column: str = "course_type") -> Dict:
+        """按类型列统计课程数"""
+        if column not in dict(COLUMNS):
+            raise ValueError(f"未知的索引列: {column}")
+        rows = self._conn.execute(
+            f"SELECT {column} AS value, COUNT(*) AS total FROM courses GROUP BY {column} "
+            f"ORDER BY MIN(position)").fetchall()
+        return {row["value"]: row["total"] for row in rows}
+
+    def get(self, course_code: str) -> Optional[Dict]:
+        """按课程编码获取完整课程记录"""
+        row = self._conn.execute(
+            "SELECT record FROM courses WHERE course_code = ? LIMIT 1", (course_code,)).fetchone()
+        return json.loads(row["record"]) if row else None
+
+    def get_by_id(self, course_id: int) -> Optional[Dict]:
+        """按课程ID获取完整课程记录"""
+        row = self._conn.execute(
+            "SELECT record FROM courses WHERE id = ? LIMIT 1", (course_id,)).fetchone()
+        return json.loads(row["record"]) if row else None
+
+    def match(self, pattern: str) -> List[Dict]:
+        """按通配符模式（* ? [...]，区分大小写）匹配课程名称，返回课程摘要"""
+        rows = self._conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM courses WHERE course_name GLOB ? ORDER BY position",
+            (pattern,)).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        按名称查找课程摘要
+
+        依次尝试：课程编码/ID精确匹配 → 名称前缀（走索引）→ 名称包含 → 相似名称
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        rows = self._conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM courses WHERE course_code = ? OR id = ? ORDER BY position LIMIT ?",
+            (query, int(query) if query.isdigit() else None, limit)).fetchall()
+        if rows:
+            return [self._summary(row) for row in rows]
+
+        # 前缀范围查询可以使用 course_name 索引
+        rows = self._conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM courses WHERE course_name >= ? AND course_name < ? "
+            f"ORDER BY course_name LIMIT ?",
+            (query, query + "\uffff", limit)).fetchall()
+        if rows:
+            return [self._summary(row) for row in rows]
+
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rows = self._conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM courses WHERE course_name LIKE ? ESCAPE '\\' "
+            f"ORDER BY position LIMIT ?", (pattern, limit)).fetchall()
+        if rows:
+            return [self._summary(row) for row in rows]
+
+        # 相似名称（只读取名称列）
+        names = [row[0] for row in self._conn.execute(
+            "SELECT DISTINCT course_name FROM courses WHERE course_name IS NOT NULL")]
+        matches = difflib.get_close_matches(query, names, n=limit, cutoff=0.4)
+        if not matches:
+            return []
+        rows = self._conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM courses WHERE course_name IN ({', '.join('?' * len(matches))})",
+            matches).fetchall()
+        rank = {name: i for i, name in enumerate(matches)}
+        return [self._summary(row) for row in sorted(rows, key=lambda row: rank[row["course_name"]])][:limit]
+
+
+def open_catalog(json_path: Optional[Path] = None) -> Optional[CourseCatalog]:
+    """
+    打开课程目录索引，课程JSON更新过时先重建
+
+    Returns:
+        课程目录，课程JSON不存在时返回None
+    """
+    json_path = Path(json_path or Config.COURSES_DATA_FILE)
+    if not json_path.exists():
+        return None
+
+    catalog = CourseCatalog(json_path.with_name(CATALOG_FILE_NAME))
+    if catalog.is_stale(json_path):
+        catalog.rebuild(json_path)
+    return catalog
@@ -0,0 +1,146 @@
+# course_manifest.py
+"""
+课程资源清单
+只通过REST接口构建整门课程的资源清单（每个课时、每个Tab、每个文件及其下载链接），
+浏览器只用于获取Token，下载时直接把清单转换为HTTP通道任务
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from config import Config, SESSION_RESOURCE_URL
+from logger import logger
+from utils import FileUtils
+from lesson_builder import LessonListBuilder
+from course_catalog import open_catalog
+
+
+def build_course_manifest(course: Dict, token: str, lessons_info: Optional[List[Dict]] = None) -> Dict:
+    """
+    构建课程资源清单
+
+    Args:
+        course: courses_data.json 中的课程记录（至少包含 courseCode）
+        token: API Token
+        lessons_info: 已有的课时列表（lessons_info.json 格式），为None时通过接口获取
+
+    Returns:
+        {"course_code", "course_name", "generated_at", "lessons": [{...课时信息, "resources": [...]}]}
+
+    Raises:
+        RuntimeError: 获取课时列表或任一课时的资源失败（不返回缺少课时资源的不完整清单）
+    """
+    course_code = course["courseCode"]
+    course_name = course.get("courseName", course_code)
+    logger.separator(f"构建资源清单: {course_name}")
+
+    if not SESSION_RESOURCE_URL:
+        raise ValueError("未配置课时资源接口 SESSION_RESOURCE_URL，无法通过接口构建资源清单")
+
+    with LessonListBuilder(token) as builder:
+        if lessons_info is None:
+            lessons_info = builder.build_course(course_code)
+            if lessons_info is None:
+                raise RuntimeError(f"获取课时列表失败: {course_code}")
+        resources_list = builder.fetch_resources(course_code, lessons_info)
+
+    failed = [lesson for lesson, resources in zip(lessons_info, resources_list) if resources is None]
+    if failed:
+        for lesson in failed:
+            logger.error(f"[{lesson['session_num']:02d}] {lesson['session_name']}: 获取资源失败")
+        raise RuntimeError(f"{len(failed)}/{len(lessons_info)} 个课时获取资源失败: "
+                           + ", ".join(lesson["session_code"] for lesson in failed))
+
+    lessons = []
+    for lesson, resources in zip(lessons_info, resources_list):
+        lessons.append({**lesson, "course_code": course_code, "course_name": course_name,
+                        "resources": resources})
+        logger.progress(f"[{lesson['session_num']:02d}] {lesson['session_name']}: {len(resources)} 个资源")
+
+    resource_count = sum(len(lesson["resources"]) for lesson in lessons)
+    logger.success(f"资源清单构建完成: {len(lessons)} 个课时, {resource_count} 个资源")
+
+    return {
+        "course_code": course_code,
+        "course_name": course_name,
+        "generated_at": datetime.now().isoformat(),
+        "lessons": lessons,
+    }
+
+
+def manifest_to_tasks(manifest: Dict, lesson_codes: Optional[List[str]] = None) -> List[Dict]:
+    """
+    把资源清单转换为下载管理器的HTTP通道任务
+
+    注意：清单中的OSS链接带有会过期的签名，应在下载前重新构建清单。
+
+    Args:
+        lesson_codes: 只转换这些课时编码的资源，为None时转换全部
+    """
+    tasks = []
+    for lesson in manifest["lessons"]:
+        if lesson_codes is not None and lesson["session_code"] not in lesson_codes:
+            continue
+
+        lesson_info = {key: value for key, value in lesson.items() if key != "resources"}
+        for resource in lesson["resources"]:
+            tasks.append({
+                "resource_type": resource["resource_type"],
+                "resource_name": resource["file_name"],
+                "file_name": resource["file_name"],
+                "download_method": "http",
+                "url": resource["url"],
+                "expected_size": resource.get("size"),
+                "tab_path": resource.get("group_path") or ["接口资源"],
+                "lesson_info": lesson_info,
+                "source": "api",
+            })
+
+    return tasks
+
+
+def manifest_path(course_code: str) -> Path:
+    """资源清单文件路径"""
+    return Config.DOWNLOAD_BASE_DIR / f"资源清单_{course_code}.json"
+
+
+if __name__ == '__main__':
+    import sys
+    from browser_manager import BrowserManager
+
+    # 默认配置中接口地址为空，未配置时在登录前直接退出
+    if not SESSION_RESOURCE_URL:
+        logger.error("未配置课时资源接口 SESSION_RESOURCE_URL（config.py），无法通过接口构建资源清单")
+        logger.info("开启 SNIFF_RESPONSES 后打开任一课时页面，日志中“从网络响应捕获 N 个资源: <路径>”即是该接口")
+        sys.exit(1)
+
+    catalog = open_catalog()
+    courses = [course for course in (catalog.get(code) for code in sys.argv[1:]) if course] if catalog else []
+    if not courses:
+        logger.info("用法: python course_manifest.py <课程编码> [课程编码 ...]")
+        sys.exit(1)
+
+    # 浏览器只用于获取Token（有登录状态缓存时无需重新登录）
+    with BrowserManager(headless=True) as browser:
+        if not browser.login():
+            sys.exit(1)
+        token = browser.get_token()
+
+    if not token:
+        logger.error("获取Token失败")
+        sys.exit(1)
+
+    failed_courses = []
+    for course in courses:
+        try:
+            manifest = build_course_manifest(course, token)
+        except RuntimeError as e:
+            # 不保存不完整的清单，保留已有的清单文件
+            logger.error(f"构建资源清单失败: {e}")
+            failed_courses.append(course["courseCode"])
+            continue
+        FileUtils.save_json(manifest, manifest_path(course["courseCode"]))
+        logger.success(f"资源清单已保存: {manifest_path(course['courseCode'])}")
+
+    if failed_courses:
+        logger.error(f"{len(failed_courses)} 门课程的资源清单构建失败: {', '.join(failed_courses)}")
+        sys.exit(1)
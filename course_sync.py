@@ -0,0 +1,174 @@
+# course_sync.py
+"""
+课程目录增量同步
+按课程编码把新拉取的课程页与本地 courses_data.json 比对，遇到连续未变化的记录后提前停止翻页，
+并把新增/删除/修改的课程写入变更记录，后续的课时/资源抓取只需处理发生变化的课程
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import Config, API_REQUESTS_PER_SECOND
+from logger import logger
+from utils import APIUtils, FileUtils
+
+CHANGELOG_FILE_NAME = "courses_changelog.jsonl"
+
+# 接口提供更新时间时优先用它判断是否变化（目前课程列表只返回创建时间）
+UPDATE_TIME_KEYS = ["gmtModified", "updateTime", "gmtUpdate"]
+
+
+def course_key(course: Dict) -> str:
+    """课程唯一键（课程编码，缺失时用ID）"""
+    return course.get("courseCode") or f"id:{course.get('id')}"
+
+
+def changed_fields(old: Dict, new: Dict) -> List[str]:
+    """比较两条课程记录，返回发生变化的字段名；有更新时间字段时只比较更新时间"""
+    for key in UPDATE_TIME_KEYS:
+        if key in old and key in new:
+            return [key] if old[key] != new[key] else []
+
+    return sorted(key for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+
+
+def diff_courses(stored: List[Dict], fresh: Iterable[Dict],
+                 stop_after_unchanged: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+    """
+    比对本地目录和新拉取的课程
+
+    Args:
+        stored: 本地课程目录
+        fresh: 新拉取的课程（按接口顺序逐条产出）；产出过程中抛出的异常原样传出，不返回部分结果
+        stop_after_unchanged: 连续遇到这么多条未变化的记录后停止读取 fresh（None表示读完）；
+                              提前停止时未读到的本地课程原样保留，无法判断删除
+
+    Returns:
+        (合并后的课程目录, 变更 {"added", "removed", "modified", "complete"})
+    """
+    stored_by_key = {course_key(course): course for course in stored}
+    seen = set()
+    merged = []
+    changes = {"added": [], "removed": [], "modified": [], "complete": True}
+    unchanged_run = 0
+
+    for course in fresh:
+        key = course_key(course)
+        seen.add(key)
+        merged.append(course)
+
+        old = stored_by_key.get(key)
+        if old is None:
+            changes["added"].append(_summary(course))
+            unchanged_run = 0
+            continue
+
+        fields = changed_fields(old, course)
+        if fields:
+            changes["modified"].append({**_summary(course), "fields": fields})
+            unchanged_run = 0
+            continue
+
+        unchanged_run += 1
+        if stop_after_unchanged and unchanged_run >= stop_after_unchanged:
+            changes["complete"] = False
+            break
+
+    if changes["complete"]:
+        changes["removed"] = [_summary(course) for course in stored if course_key(course) not in seen]
+    else:
+        # 提前停止：剩余的本地课程按原顺序保留
+        merged.extend(course for course in stored if course_key(course) not in seen)
+
+    return merged, changes
+
+
+def _summary(course: Dict) -> Dict:
+    """变更记录中的课程摘要"""
+    return {"courseCode": course.get("courseCode"), "id": course.get("id"),
+            "courseName": course.get("courseName")}
+
+
+def changed_course_codes(changes: Dict) -> List[str]:
+    """需要重新抓取课时/资源的课程编码（新增和修改）"""
+    return [course["courseCode"] for course in changes["added"] + changes["modified"]
+            if course.get("courseCode")]
+
+
+def changelog_path() -> Path:
+    """变更记录文件路径（与课程目录放在同一目录）"""
+    return Path(Config.COURSES_DATA_FILE).with_name(CHANGELOG_FILE_NAME)
+
+
+def append_changelog(changes: Dict, mode: str) -> Dict:
+    """追加一条变更记录"""
+    entry = {"time": datetime.now().isoformat(), "mode": mode, **changes}
+    with open(changelog_path(), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+
+def read_latest_changes() -> Optional[Dict]:
+    """读取最近一次同步的变更记录"""
+    path = changelog_path()
+    if not path.exists():
+        return None
+
+    latest = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                latest = json.loads(line)
+    return latest
+
+
+def sync_courses(token: str, full: bool = False) -> Optional[Dict]:
+    """
+    增量同步课程目录
+
+    Args:
+        full: 读完所有页面（可以发现已删除的课程）；否则在连续一整页未变化后停止翻页
+
+    Returns:
+        本次变更记录，失败返回None
+    """
+    logger.separator("课程目录增量同步")
+
+    stored = FileUtils.load_json(Path(Config.COURSES_DATA_FILE)) or []
+    if not stored:
+        logger.info("本地没有课程目录，执行完整同步")
+        full = True
+
+    # 增量模式只预取少量页面，提前停止时不会浪费请求
+    fresh = APIUtils.iter_courses(token, max_workers=8 if full else 2,
+                                  requests_per_second=API_REQUESTS_PER_SECOND)
+    try:
+        merged, changes = diff_courses(stored, fresh, None if full else Config.PAGE_SIZE)
+    except RuntimeError as e:
+        # 课程列表不完整时无法判断新增和删除，不写变更记录也不更新课程目录
+        logger.error(f"同步失败: {e}")
+        return None
+    finally:
+        fresh.close()
+
+    if not merged:
+        logger.error("未能获取任何课程数据")
+        return None
+
+    mode = "full" if full else "incremental"
+    entry = append_changelog(changes, mode)
+
+    if changes["added"] or changes["removed"] or changes["modified"]:
+        FileUtils.save_json_stream(merged, Path(Config.COURSES_DATA_FILE))
+
+    logger.info(f"同步完成: 新增 {len(changes['added'])}, 删除 {len(changes['removed'])}, "
+                f"修改 {len(changes['modified'])}"
+                f"{'' if changes['complete'] else '（遇到连续未变化的课程，已提前停止）'}")
+    for course in changes["added"]:
+        logger.info(f"  + {course['courseName']}")
+    for course in changes["removed"]:
+        logger.info(f"  - {course['courseName']}")
+    for course in changes["modified"]:
+        logger.info(f"  * {course['courseName']}: {', '.join(course['fields'][:5])}")
+
+    return entry
@@ -0,0 +1,192 @@
+# download_index.py
+"""
+持久化下载索引
+记录每个已下载资源的URL/OSS对象键、ETag、大小和内容哈希，
+重复运行同一课程时跳过已下载且未变化的文件
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, unquote
+from logger import logger
+from config import Config
+from utils import FileUtils
+
+INDEX_FILE_NAME = "download_index.db"
+
+
+class DownloadIndex:
+    """基于SQLite的下载索引（线程安全）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS resources (
+                resource_key TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                size INTEGER,
+                file_hash TEXT,
+                hash_algorithm TEXT,
+                file_path TEXT,
+                resource_name TEXT,
+                updated_at TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resources_path ON resources(file_path)")
+        self._conn.commit()
+
+    @staticmethod
+    def resource_key(task_info: Dict) -> str:
+        """
+        生成资源唯一键
+
+        有URL时使用OSS对象键（主机+路径，去掉会过期的签名参数）；
+        没有URL时使用课时编码 + Tab路径 + 文件名 + 元素文本和同名序号（同一Tab内文件名相同的不同资源不会共用一个键）。
+        """
+        url = task_info.get("url") or task_info.get("resource_url")
+        if url:
+            parsed = urlparse(url)
+            return f"url:{parsed.netloc}{unquote(parsed.path)}"
+
+        lesson_info = task_info.get("lesson_info") or {}
+        lesson_key = (lesson_info.get("session_code")
+                      or f"{lesson_info.get('course_name', '')}/{lesson_info.get('session_num', '')}")
+        tab_path = " > ".join(task_info.get("tab_path") or [])
+        element_key = f"{task_info.get('element_text', '')}#{task_info.get('occurrence', 0)}"
+        return f"page:{lesson_key}|{tab_path}|{task_info.get('file_name', '')}|{element_key}"
+
+    def lookup(self, resource_key: str) -> Optional[Dict]:
+        """查询资源记录"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM resources WHERE resource_key = ?", (resource_key,)).fetchone()
+        return dict(row) if row else None
+
+    def owner_of(self, file_path: Path) -> Optional[str]:
+        """查询占用某个文件路径的资源键"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT resource_key FROM resources WHERE file_path = ?", (str(file_path),)).fetchone()
+        return row["resource_key"] if row else None
+
+    def find_intact(self, resource_key: str) -> Optional[Dict]:
+        """查询已下载且本地文件仍完整（存在且大小一致）的资源记录"""
+        entry = self.lookup(resource_key)
+        if not entry or not entry["file_path"]:
+            return None
+
+        file_path = Path(entry["file_path"])
+        if not file_path.exists() or file_path.stat().st_size != entry["size"]:
+            return None
+
+        return entry
+
+    def record(self, resource_key: str, file_path: Path, file_hash: str,
+               hash_algorithm: str = "md5", url: Optional[str] = None,
+               etag: Optional[str] = None, resource_name: Optional[str] = None):
+        """写入或更新资源记录"""
+        size = os.path.getsize(file_path)
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO resources
+                    (resource_key, url, etag, size, file_hash, hash_algorithm,
+                     file_path, resource_name, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (resource_key, url, etag, size, file_hash, hash_algorithm,
+                  str(file_path), resource_name, datetime.now().isoformat()))
+            self._conn.commit()
+
+    def entries(self) -> List[Dict]:
+        """获取全部资源记录"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM resources ORDER BY file_path").fetchall()
+        return [dict(row) for row in rows]
+
+    def verify(self) -> Dict[str, List[Dict]]:
+        """
+        重新计算本地文件哈希并与索引比对
+
+        Returns:
+            {"ok": [...], "missing": [...], "mismatch": [...]}
+        """
+        result = {"ok": [], "missing": [], "mismatch": []}
+
+        for entry in self.entries():
+            file_path = Path(entry["file_path"] or "")
+            if not entry["file_path"] or not file_path.exists():
+                result["missing"].append(entry)
+                continue
+
+            actual_hash = FileUtils.hash_file(file_path, entry["hash_algorithm"] or "md5")
+            if actual_hash == entry["file_hash"] and file_path.stat().st_size == entry["size"]:
+                result["ok"].append(entry)
+            else:
+                entry["actual_hash"] = actual_hash
+                result["mismatch"].append(entry)
+
+        return result
+
+    def remove(self, resource_key: str):
+        """删除资源记录"""
+        with self._lock:
+            self._conn.execute("DELETE FROM resources WHERE resource_key = ?", (resource_key,))
+            self._conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def verify_download_index(base_dir: Path) -> bool:
+    """校验下载目录中的所有文件，返回是否全部一致"""
+    logger.separator("下载索引校验")
+
+    index_path = Path(base_dir) / INDEX_FILE_NAME
+    if not index_path.exists():
+        logger.error(f"下载索引不存在: {index_path}")
+        return False
+
+    index = DownloadIndex(index_path)
+    try:
+        result = index.verify()
+    finally:
+        index.close()
+
+    for entry in result["missing"]:
+        logger.warning(f"文件缺失: {entry['file_path']} ({entry['resource_name']})")
+    for entry in result["mismatch"]:
+        logger.warning(f"哈希不一致: {entry['file_path']} "
+                       f"(索引: {entry['file_hash']}, 实际: {entry['actual_hash']})")
+
+    logger.info(f"校验完成: {len(result['ok'])}个一致, {len(result['missing'])}个缺失, "
+                f"{len(result['mismatch'])}个不一致")
+    return not result["missing"] and not result["mismatch"]
+
+
+if __name__ == '__main__':
+    import sys
+
+    base_dir = Config.DOWNLOAD_BASE_DIR
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if args:
+        base_dir = Path(args[0])
+
+    if "--verify" in sys.argv:
+        sys.exit(0 if verify_download_index(base_dir) else 1)
+    else:
+        index = DownloadIndex(Path(base_dir) / INDEX_FILE_NAME)
+        entries = index.entries()
+        index.close()
+        logger.info(f"下载索引共 {len(entries)} 条记录: {Path(base_dir) / INDEX_FILE_NAME}")
+        logger.info("使用 --verify 重新计算哈希并校验本地文件")
@@ -10,15 +10,28 @@ import hashlib
 import threading
 import queue
 import re
-from urllib.parse import urlparse, parse_qs, unquote
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from datetime import datetime
-import requests
-from playwright.sync_api import Page, BrowserContext, Response, expect
+from playwright.sync_api import Page, BrowserContext, Response, Locator, expect
 from logger import logger
 from config import Config
-from resource_detector import ResourceDetector, TabExplorer
+from http_client import HttpSessionPool
+from download_index import DownloadIndex, INDEX_FILE_NAME
+from record_log import DownloadRecordLog, RECORD_LOG_NAME
+from utils import FileUtils
+from resource_detector import ResourceDetector, TabExplorer, rid_selector
+from network_sniffer import NetworkResourceSniffer
+from progress_journal import ProgressJournal
+from wait_strategy import PageWaiter
+from popup_interceptor import PopupInterceptor, extract_pdf_url_from_preview
+
+# cookies同步失败后的重试间隔（秒），连续失败时加倍，不超过上限
+COOKIE_SYNC_RETRY_DELAY = 2.0
+COOKIE_SYNC_RETRY_MAX_DELAY = 30.0
+
 
 class DownloadTask:
     """单个下载任务的数据结构"""
@@ -33,6 +46,9 @@ class DownloadTask:
         self.error_message = None
         self.file_path = None
 
+        # 任务结束（完成/失败/跳过）时返回本任务对象
+        self.future: Future = Future()
+
         # 解析任务信息
         self.resource_type = task_info.get("resource_type", "unknown")
         self.resource_name = task_info.get("resource_name", "unnamed")
@@ -43,70 +59,216 @@ class DownloadTask:
         self.tab_path = task_info.get("tab_path", ["未知Tab"])
         self.destination_dir = task_info.get("destination_dir")
 
+        # HTTP传输状态（重试时用于断点续传）
+        self.target_path: Optional[Path] = None
+        self.total_size: Optional[int] = None
+        self.downloaded_bytes = 0
+        # 资源列表接口给出的文件大小，服务器响应没有给出总大小时用于校验下载是否完整
+        self.expected_size: Optional[int] = task_info.get("expected_size")
+        self.etag: Optional[str] = None
+
+        # 下载索引相关（资源唯一键、索引中已有的记录、服务器确认未变化）
+        self.resource_key = DownloadIndex.resource_key(task_info)
+        self.cached_entry: Optional[Dict] = None
+        self.not_modified = False
+
+        # 写入过程中同步计算的内容摘要
+        self.file_hash: Optional[str] = None
+        self.hash_algorithm: Optional[str] = None
+
+        # 已知的真实下载链接（OSS链接、data-url/href等），有链接的任务无需点击页面
+        self.url = task_info.get("url") or task_info.get("resource_url")
+
+    @property
+    def lane(self) -> str:
+        """执行通道：有URL的任务走HTTP通道，其余需要在浏览器中点击"""
+        return "http" if self.url else "browser"
+
     def to_dict(self) -> Dict:
         """转换为字典格式"""
         return {
             "task_id": self.task_id,
+            "resource_key": self.resource_key,
             "resource_name": self.resource_name,
             "resource_type": self.resource_type,
             "file_name": self.file_name,
             "tab_path": " > ".join(self.tab_path),
+            "lane": self.lane,
+            "url": self.url,
             "status": self.status,
             "progress": self.progress,
             "file_path": str(self.file_path) if self.file_path else None,
+            "file_hash": self.file_hash,
+            "hash_algorithm": self.hash_algorithm,
             "error_message": self.error_message,
             "duration": (self.end_time - self.start_time).total_seconds()
             if self.start_time and self.end_time else None
         }
 
 
+class TabAffinityQueue(queue.Queue):
+    """
+    浏览器通道任务队列
+
+    按Tab路径分组，先取完当前Tab的任务再切换到下一个Tab（各Tab按首次入队的顺序），
+    同时统计实际的Tab切换次数和按入队顺序执行时需要的切换次数
+    """
+
+    def _init(self, maxsize):
+        self.groups: "OrderedDict[Tuple[str, ...], deque]" = OrderedDict()
+        self.current_tab: Optional[Tuple[str, ...]] = None
+        self.switches = 0  # 实际切换次数
+        self.fifo_switches = 0  # 按入队顺序执行时的切换次数
+        self._last_put_tab: Optional[Tuple[str, ...]] = None
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, task: "DownloadTask"):
+        tab = tuple(task.tab_path)
+        self.groups.setdefault(tab, deque()).append(task)
+        self._size += 1
+        if tab != self._last_put_tab:
+            self.fifo_switches += 1
+            self._last_put_tab = tab
+
+    def _get(self) -> "DownloadTask":
+        tab = self.current_tab if self.current_tab in self.groups else next(iter(self.groups))
+        group = self.groups[tab]
+        task = group.popleft()
+        if not group:
+            del self.groups[tab]
+        self._size -= 1
+        if tab != self.current_tab:
+            self.switches += 1
+            self.current_tab = tab
+        return task
+
+    def get_stats(self) -> Dict:
+        """Tab切换统计"""
+        with self.mutex:
+            return {
+                "tab_switches": self.switches,
+                "tab_switches_saved": max(0, self.fifo_switches - self.switches),
+            }
+
+
 class DownloadManager:
     """下载管理器 - 增强版"""
 
     def __init__(self,
-                 browser_page: Page,
+                 browser_page: Optional[Page],
                  max_concurrent: int = 2,
                  download_timeout: int = 300,
-                 max_retries: int = 3):
+                 max_retries: int = 3,
+                 chunk_size: int = 1024 * 1024,
+                 split_threshold: int = 64 * 1024 * 1024,
+                 split_parts: int = 4,
+                 use_index: bool = True,
+                 revalidate: bool = True,
+                 hash_algorithm: str = "md5",
+                 sniffer: Optional[NetworkResourceSniffer] = None,
+                 journal: Optional[ProgressJournal] = None):
         """
         初始化下载管理器
 
+        下载分两个通道执行：
+        - HTTP通道：任务已带有真实URL，由 max_concurrent 个线程并行直接请求，不触碰浏览器
+        - 浏览器通道：任务需要点击页面元素，由调用 wait_for_tasks 的线程（创建Page的线程）串行执行，
+          同一Tab的任务集中执行，取完一个Tab再切换到下一个
+
         Args:
-            browser_page: Playwright页面对象
-            max_concurrent: 最大并发下载数
+            browser_page: Playwright页面对象，为None时只启用HTTP通道
+            max_concurrent: HTTP通道最大并发下载数
             download_timeout: 下载超时时间（秒）
             max_retries: 最大重试次数
+            chunk_size: HTTP流式写入的块大小（字节）
+            split_threshold: 超过该大小且服务器支持Range时分段并行下载（字节）
+            split_parts: 分段数量，1表示不分段
+            use_index: 是否使用持久化下载索引跳过已下载的资源
+            revalidate: 已下载的HTTP资源是否用ETag发送条件请求（304时不重新传输，变化时重新下载）；
+                        False或索引中没有ETag时直接跳过
+            hash_algorithm: 文件摘要算法（md5 / sha256 / blake2b 等hashlib支持的算法）
+            sniffer: 已挂载到页面的网络响应嗅探器，探索时捕获到的资源直接进入HTTP通道
+            journal: 进度日志，记录每个任务的入队和结果，中断后可从中恢复未完成的任务
         """
         self.page = browser_page
-        self.context = browser_page.context
+        self.context = browser_page.context if browser_page else None
         self.max_concurrent = max_concurrent
         self.download_timeout = download_timeout
         self.max_retries = max_retries
-
-        # 任务管理
-        self.task_queue = queue.Queue()
+        self.chunk_size = chunk_size
+        self.split_threshold = split_threshold
+        self.split_parts = max(1, split_parts)
+        self.revalidate = revalidate
+        hashlib.new(hash_algorithm)  # 提前校验算法名
+        self.hash_algorithm = hash_algorithm
+
+        # 任务管理（task_queue为浏览器通道，http_queue为HTTP通道）
+        self.task_queue = TabAffinityQueue()
+        self.http_queue = queue.Queue()
         self.active_tasks: Dict[str, DownloadTask] = {}
         self.completed_tasks: List[DownloadTask] = []
         self.failed_tasks: List[DownloadTask] = []
+        self.skipped_tasks: List[DownloadTask] = []
 
-        # 统计信息
+        # 统计信息（由 _state_cond 保护，任务结束时通知等待方）
         self.total_tasks = 0
         self.completed_count = 0
         self.failed_count = 0
+        self.skipped_count = 0
+        self._state_cond = threading.Condition()
 
         # 线程控制
+        self._progress_lock = threading.Lock()
+        self._path_lock = threading.Lock()
+        self._reserved_paths: Dict[Path, str] = {}
         self.worker_threads = []
         self.is_running = False
         self.download_event = threading.Event()
 
+        # HTTP通道共享的连接池（连接数 = 并发数 × 分段数，cookies由浏览器线程同步）
+        self.http_pool = HttpSessionPool(
+            pool_size=max_concurrent * self.split_parts,
+            headers={
+                'User-Agent': Config.USER_AGENT,
+                'Accept': '*/*',
+                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7',
+                'Referer': 'https://manage.shengtongedu.cn/',
+            }
+        )
+
         # 工具类
-        self.detector = ResourceDetector(browser_page)
-        self.tab_explorer = TabExplorer(browser_page)
+        self.detector = ResourceDetector(browser_page) if browser_page else None
+        self.tab_explorer = TabExplorer(browser_page) if browser_page else None
+        self.waiter = PageWaiter(browser_page) if browser_page else None
+        self.popup_interceptor = PopupInterceptor(browser_page) if browser_page else None
+
+        # 网络响应嗅探（Tab切换时更新捕获资源的归属Tab）
+        self.sniffer = sniffer
+        if sniffer and self.tab_explorer:
+            self.tab_explorer.tab_listeners.append(sniffer.set_tab)
+
+        # 页面当前所在的Tab（探索时由Tab监听更新，下载时由 _ensure_tab_context 更新），
+        # 与任务的Tab相同时不再读取页面的 is-active 状态
+        self._active_tab: Optional[List[str]] = None
+        if self.tab_explorer:
+            self.tab_explorer.tab_listeners.append(self._set_active_tab)
 
         # 下载路径配置
         self.base_download_dir = Config.DOWNLOAD_BASE_DIR
         self.base_download_dir.mkdir(exist_ok=True)
 
+        # 下载记录日志（追加写入，单线程批量落盘）
+        self.record_log = DownloadRecordLog()
+
+        # 持久化下载索引（跨多次运行跳过已下载的资源）
+        self.index = DownloadIndex(self.base_download_dir / INDEX_FILE_NAME) if use_index else None
+
+        # 进度日志（断点恢复）
+        self.journal = journal
+
         # 文件类型映射
         self.file_type_extensions = Config.FILE_TYPE_EXTENSIONS.copy()
 
@@ -121,17 +283,22 @@ class DownloadManager:
         self.is_running = True
         self.download_event.clear()
 
-        # 启动工作线程
+        # 工作线程不能调用Playwright，先在当前线程同步一次cookies
+        self.sync_cookies()
+
+        # 启动HTTP通道工作线程（浏览器通道不开线程，由 wait_for_tasks 在页面所在线程执行）
         for i in range(self.max_concurrent):
             thread = threading.Thread(
                 target=self._download_worker,
-                name=f"DownloadWorker-{i + 1}",
+                args=(self.http_queue, "http"),
+                name=f"HttpWorker-{i + 1}",
                 daemon=True
             )
             thread.start()
             self.worker_threads.append(thread)
 
-        logger.success("下载管理器已启动")
+        logger.success(f"下载管理器已启动 (HTTP通道 {self.max_concurrent} 线程"
+                       f"{', 浏览器通道在当前线程执行' if self.page else ''})")
 
     def stop(self):
         """停止下载管理器"""
@@ -143,9 +310,17 @@ class DownloadManager:
             thread.join(timeout=5)
 
         self.worker_threads.clear()
+
+        # 写完剩余的下载记录
+        self.record_log.close()
+
+        tab_stats = self.task_queue.get_stats()
+        if tab_stats["tab_switches"]:
+            logger.info(f"浏览器通道切换Tab {tab_stats['tab_switches']} 次，"
+                        f"按Tab分组执行节省 {tab_stats['tab_switches_saved']} 次")
         logger.info("下载管理器已停止")
 
-    def add_task(self, task_info: Dict) -> str:
+    def add_task(self, task_info: Dict) -> Future:
         """
         添加下载任务
 
@@ -153,114 +328,286 @@ class DownloadManager:
             task_info: 任务信息字典
 
         Returns:
-            任务ID
+            任务的Future，任务结束（完成/失败/跳过）时结果为对应的DownloadTask
         """
         task_id = self._generate_task_id(task_info)
         task = DownloadTask(task_id, task_info)
+        if self.journal:
+            self.journal.task_enqueued(task)
+
+        if task.lane == "browser" and not self.page:
+            task.error_message = "任务需要浏览器点击，但下载管理器未绑定页面"
+            logger.warning(f"无法添加任务: {task.resource_name} - {task.error_message}")
+            with self._state_cond:
+                self.total_tasks += 1
+            self._finish_task(task, "failed")
+            return task.future
+
+        # 查询下载索引，已下载且本地文件完整的资源不再入队
+        entry = self.index.find_intact(task.resource_key) if self.index else None
+        if entry:
+            if self.revalidate and task.lane == "http" and entry["etag"]:
+                task.cached_entry = entry
+            else:
+                task.file_path = Path(entry["file_path"])
+                logger.debug(f"已下载过，跳过: {task.resource_name} -> {task.file_path}")
+                self._finish_task(task, "skipped")
+                return task.future
 
-        self.task_queue.put(task)
-        self.total_tasks += 1
+        with self._state_cond:
+            self.total_tasks += 1
+            self._get_lane_queue(task.lane).put(task)
+            # 唤醒 wait_for_tasks 执行新的浏览器通道任务
+            self._state_cond.notify_all()
 
         logger.debug(
-            f"添加下载任务: {task.resource_name} (类型: {task.resource_type}, Tab: {' > '.join(task.tab_path)})")
-        return task_id
+            f"添加下载任务: {task.resource_name} (类型: {task.resource_type}, "
+            f"通道: {task.lane}, Tab: {' > '.join(task.tab_path)})")
+        return task.future
 
-    def add_batch_tasks(self, tasks_info: List[Dict]) -> List[str]:
+    def add_batch_tasks(self, tasks_info: List[Dict]) -> List[Future]:
         """批量添加下载任务"""
-        task_ids = []
-        for task_info in tasks_info:
-            task_id = self.add_task(task_info)
-            task_ids.append(task_id)
+        futures = [self.add_task(task_info) for task_info in tasks_info]
 
         logger.info(f"批量添加 {len(tasks_info)} 个下载任务")
-        return task_ids
+        return futures
+
+    def resume_from_journal(self) -> List[Future]:
+        """把进度日志中未完成的HTTP任务重新入队（需先启动下载管理器）"""
+        if not self.journal:
+            return []
+
+        tasks_info = self.journal.pending_tasks()
+        if not tasks_info:
+            return []
+
+        logger.info(f"从进度日志恢复 {len(tasks_info)} 个未完成的下载任务")
+        return self.add_batch_tasks(tasks_info)
 
-    def wait_for_completion(self, timeout: Optional[int] = None):
+    def wait_for_completion(self, timeout: Optional[int] = None) -> bool:
         """
         等待所有任务完成
 
         Args:
             timeout: 超时时间（秒），None表示无限等待
+
+        Returns:
+            是否在超时前全部完成
         """
-        start_time = time.time()
+        done = self.wait_for_tasks(None, timeout)
+        if done:
+            logger.success("所有下载任务已完成")
+        return done
 
-        while self.total_tasks > (self.completed_count + self.failed_count):
-            # 检查超时
-            if timeout and (time.time() - start_time) > timeout:
-                logger.warning("等待任务完成超时")
-                break
+    def wait_for_tasks(self, futures: Optional[List[Future]], timeout: Optional[float] = None,
+                       progress_interval: float = 30) -> bool:
+        """
+        等待指定任务结束（由任务完成事件唤醒，无轮询延迟）
 
-            # 打印进度
-            remaining = self.total_tasks - (self.completed_count + self.failed_count)
-            logger.info(f"等待任务完成: {self.completed_count}完成, "
-                        f"{self.failed_count}失败, {remaining}进行中")
+        必须在创建Page的线程中调用：浏览器通道的任务（点击页面元素）在这里逐个执行，
+        HTTP通道的传输同时在工作线程中进行。
+        等待期间如果HTTP通道报告认证失效，会在当前线程重新同步cookies；
+        同步失败时按递增的间隔重试，没有浏览器上下文（只有HTTP通道）时不处理。
 
-            time.sleep(2)
+        Args:
+            futures: add_task 返回的Future列表，None表示等待所有已添加的任务
+            timeout: 超时时间（秒），None表示无限等待
+            progress_interval: 打印进度日志的间隔（秒）
 
-        logger.success("所有下载任务已完成")
+        Returns:
+            是否在超时前全部结束
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+
+        def finished() -> bool:
+            if futures is None:
+                return self.total_tasks <= self.completed_count + self.failed_count
+            return all(future.done() for future in futures)
+
+        sync_retry_at = 0.0
+        sync_retry_delay = COOKIE_SYNC_RETRY_DELAY
+
+        def cookies_need_sync() -> bool:
+            return self.context is not None and self.http_pool.cookies_stale
+
+        while True:
+            self._run_browser_lane()
+
+            with self._state_cond:
+                wait_time = progress_interval
+                if deadline is not None:
+                    wait_time = min(wait_time, max(0.0, deadline - time.monotonic()))
+                if cookies_need_sync():
+                    # 上次同步失败，等到重试时间
+                    wait_time = min(wait_time, max(0.0, sync_retry_at - time.monotonic()))
+                self._state_cond.wait_for(
+                    lambda: (finished() or self.task_queue.qsize() > 0
+                             or (cookies_need_sync() and time.monotonic() >= sync_retry_at)),
+                    timeout=wait_time)
+
+                if finished():
+                    return True
+                if self.task_queue.qsize() > 0:
+                    continue
+                completed, failed = self.completed_count, self.failed_count
+                remaining = self.total_tasks - completed - failed
+
+            # HTTP通道遇到401/403时，在浏览器线程中重新同步cookies
+            if cookies_need_sync() and time.monotonic() >= sync_retry_at:
+                logger.info("HTTP通道认证失效，重新同步浏览器cookies")
+                if self.sync_cookies():
+                    sync_retry_delay = COOKIE_SYNC_RETRY_DELAY
+                else:
+                    sync_retry_at = time.monotonic() + sync_retry_delay
+                    sync_retry_delay = min(sync_retry_delay * 2, COOKIE_SYNC_RETRY_MAX_DELAY)
+                continue
+
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning("等待任务完成超时")
+                return False
+
+            logger.info(f"等待任务完成: {completed}完成, {failed}失败, {remaining}进行中")
+
+    def _finish_task(self, task: DownloadTask, status: str):
+        """记录任务结果、更新计数并唤醒等待方"""
+        with self._state_cond:
+            task.status = status
+            if status == "completed":
+                self.completed_tasks.append(task)
+                self.completed_count += 1
+            elif status == "failed":
+                self.failed_tasks.append(task)
+                self.failed_count += 1
+            else:
+                self.skipped_tasks.append(task)
+                self.skipped_count += 1
+
+            self.active_tasks.pop(task.task_id, None)
+            if self.journal:
+                self.journal.task_finished(task)
+            task.future.set_result(task)
+            self._state_cond.notify_all()
 
     def get_stats(self) -> Dict:
         """获取下载统计信息"""
-        return {
-            "total_tasks": self.total_tasks,
-            "completed": self.completed_count,
-            "failed": self.failed_count,
-            "in_progress": len(self.active_tasks),
-            "pending": self.task_queue.qsize(),
-            "success_rate": (self.completed_count / self.total_tasks * 100
-                             if self.total_tasks > 0 else 0)
-        }
+        with self._state_cond:
+            return {
+                "total_tasks": self.total_tasks,
+                "completed": self.completed_count,
+                "failed": self.failed_count,
+                "skipped": self.skipped_count,
+                "in_progress": len(self.active_tasks),
+                "pending": self.task_queue.qsize() + self.http_queue.qsize(),
+                "pending_http": self.http_queue.qsize(),
+                "pending_browser": self.task_queue.qsize(),
+                **self.task_queue.get_stats(),
+                "success_rate": (self.completed_count / self.total_tasks * 100
+                                 if self.total_tasks > 0 else 0)
+            }
 
-    def _download_worker(self):
-        """下载工作线程"""
+    def sync_cookies(self) -> bool:
+        """
+        从浏览器上下文同步cookies供HTTP通道使用
+
+        必须在创建Page的线程中调用（Playwright同步对象不是线程安全的）
+
+        Returns:
+            是否同步成功（没有浏览器上下文时返回False）
+        """
+        if not self.context:
+            return False
+
+        try:
+            self.http_pool.sync_cookies(self.context.cookies())
+            return True
+        except Exception as e:
+            logger.warning(f"同步浏览器cookies失败: {e}")
+            return False
+
+    def _get_lane_queue(self, lane: str) -> queue.Queue:
+        """获取执行通道对应的任务队列"""
+        return self.http_queue if lane == "http" else self.task_queue
+
+    def _download_worker(self, task_queue: queue.Queue, lane: str):
+        """
+        HTTP通道工作线程
+
+        Args:
+            task_queue: 本线程消费的任务队列
+            lane: 通道名称
+        """
         while self.is_running:
             try:
                 # 从队列获取任务（非阻塞）
                 try:
-                    task = self.task_queue.get(timeout=1)
+                    task = task_queue.get(timeout=1)
                 except queue.Empty:
                     continue
 
-                # 标记为激活状态
-                task.status = "downloading"
-                task.start_time = datetime.now()
-                self.active_tasks[task.task_id] = task
-
-                # 执行下载（最多重试max_retries次）
-                success = False
-                for retry in range(self.max_retries):
-                    if retry > 0:
-                        logger.info(f"重试下载 {task.resource_name} (第{retry + 1}次)")
-
-                    success = self._execute_download(task)
-
-                    if success:
-                        break
-                    else:
-                        time.sleep(2 ** retry)  # 指数退避
-
-                # 更新任务状态
-                task.end_time = datetime.now()
-                if success:
-                    task.status = "completed"
-                    task.progress = 100.0
-                    self.completed_tasks.append(task)
-                    self.completed_count += 1
-                    logger.success(f"下载完成: {task.resource_name}")
-                else:
-                    task.status = "failed"
-                    self.failed_tasks.append(task)
-                    self.failed_count += 1
-                    logger.error(f"下载失败: {task.resource_name} - {task.error_message}")
-
-                # 从激活任务中移除
-                del self.active_tasks[task.task_id]
-                self.task_queue.task_done()
+                self._process_task(task, lane)
+                task_queue.task_done()
 
             except Exception as e:
                 logger.error(f"下载工作线程异常: {e}", exc_info=True)
                 time.sleep(5)
 
+    def _run_browser_lane(self):
+        """在当前线程（创建Page的线程）依次执行浏览器通道中排队的任务"""
+        while self.is_running:
+            try:
+                task = self.task_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                self._process_task(task, "browser")
+            except Exception as e:
+                logger.error(f"浏览器通道任务异常: {e}", exc_info=True)
+                task.error_message = str(e)
+                self._finish_task(task, "failed")
+            finally:
+                self.task_queue.task_done()
+
+    def _process_task(self, task: DownloadTask, lane: str):
+        """执行单个任务（含重试），结束后记录结果"""
+        # 标记为激活状态
+        task.status = "downloading"
+        task.start_time = task.start_time or datetime.now()
+        with self._state_cond:
+            self.active_tasks[task.task_id] = task
+
+        # 执行下载（最多重试max_retries次）
+        success = False
+        for retry in range(self.max_retries):
+            if retry > 0:
+                logger.info(f"重试下载 {task.resource_name} (第{retry + 1}次)")
+
+            success = self._execute_download(task)
+
+            if success:
+                break
+            else:
+                time.sleep(2 ** retry)  # 指数退避
+
+        # 浏览器通道解析出真实URL后，把传输交给HTTP通道，立刻处理下一个点击
+        if success and lane == "browser" and task.lane == "http":
+            logger.debug(f"任务转交HTTP通道: {task.resource_name}")
+            with self._state_cond:
+                self.active_tasks.pop(task.task_id, None)
+            self.http_queue.put(task)
+            return
+
+        # 更新任务状态
+        task.end_time = datetime.now()
+        if success:
+            task.progress = 100.0
+            task.error_message = None
+            logger.success(f"下载完成: {task.resource_name}")
+            self._finish_task(task, "completed")
+        else:
+            logger.error(f"下载失败: {task.resource_name} - {task.error_message}")
+            self._finish_task(task, "failed")
+
     def _execute_download(self, task: DownloadTask) -> bool:
         """
         执行单个下载任务
@@ -272,23 +619,32 @@ class DownloadManager:
             是否成功
         """
         try:
+            # 已有真实URL的任务直接走HTTP下载
+            if task.lane == "http":
+                return self._download_http(task)
+
             # 根据下载方式选择执行策略
             if task.download_method == "direct":
-                return self._download_direct(task)
+                success = self._download_direct(task)
             elif task.download_method == "preview_pdf":
-                return self._download_preview_pdf(task)
+                success = self._download_preview_pdf(task)
             elif task.download_method.startswith("preview"):
                 # 其他预览类型（视频、PPT、SB3等）暂时不支持
                 task.error_message = f"预览下载方式 '{task.download_method}' 暂未实现"
                 return False
             else:
                 # 尝试通用下载
-                if task.element_selector:
-                    return self._download_by_selector(task)
+                if task.element_selector or task.task_info.get("rid"):
+                    success = self._download_by_selector(task)
                 else:
                     task.error_message = f"不支持的下载方式: {task.download_method}"
                     return False
 
+            # 失败后页面状态不确定，下一次重新确认所在的Tab
+            if not success:
+                self._active_tab = None
+            return success
+
         except Exception as e:
             task.error_message = str(e)
             logger.error(f"下载执行失败: {task.resource_name} - {e}", exc_info=True)
@@ -308,23 +664,16 @@ class DownloadManager:
             # 确保在正确的Tab
             self._ensure_tab_context(task.tab_path)
 
-            # 等待元素加载
-            if not task.element_selector:
-                task.error_message = "没有有效的元素选择器"
-                return False
-
             logger.info(f"准备直接下载: {task.resource_name}")
 
             # 定位元素
-            element = self.page.locator(task.element_selector).first
-            if element.count() == 0:
-                task.error_message = f"找不到元素: {task.element_selector}"
+            element = self._locate_element(task)
+            if element is None:
                 return False
 
             # 点击下载
             with self.page.expect_download(timeout=self.download_timeout * 1000) as download_info:
                 element.click()
-                time.sleep(1)
 
             # 获取下载对象
             download = download_info.value
@@ -332,19 +681,17 @@ class DownloadManager:
             # 确定保存路径
             file_path = self._get_file_path(task)
 
-            # 保存文件
-            download.save_as(str(file_path))
+            # 保存文件（复制的同时计算摘要）
+            self._save_download(download, file_path, task)
 
             # 验证文件
             if os.path.getsize(file_path) > 0:
                 task.file_path = file_path
-
-                # 计算文件哈希
-                file_hash = self._calculate_file_hash(file_path)
                 logger.debug(f"直接下载完成: {file_path.name} (大小: {os.path.getsize(file_path)} bytes)")
 
                 # 保存下载记录
-                self._save_download_record(task, file_hash)
+                self._save_download_record(task, task.file_hash)
+                self._update_index(task, task.file_hash)
                 return True
             else:
                 task.error_message = "下载的文件大小为0"
@@ -358,7 +705,7 @@ class DownloadManager:
 
     def _download_preview_pdf(self, task: DownloadTask) -> bool:
         """
-        预览下载PDF（点击预览按钮，解析新标签页URL）
+        预览下载PDF（点击预览按钮，从新标签页的导航请求中读取PDF链接，不等待预览页加载）
 
         Args:
             task: 下载任务对象
@@ -370,62 +717,60 @@ class DownloadManager:
             # 确保在正确的Tab
             self._ensure_tab_context(task.tab_path)
 
-            # 等待元素加载
-            if not task.element_selector:
-                task.error_message = "没有有效的元素选择器"
-                return False
-
             logger.info(f"准备下载PDF: {task.resource_name}")
 
             # 定位元素
-            element = self.page.locator(task.element_selector).first
-            if element.count() == 0:
-                task.error_message = f"找不到元素: {task.element_selector}"
+            element = self._locate_element(task)
+            if element is None:
                 return False
 
-            # 点击预览，等待新标签页打开
-            with self.page.expect_popup(timeout=self.download_timeout * 1000) as popup_info:
-                element.click()
-                time.sleep(2)
-
-            # 获取新标签页
-            new_page = popup_info.value
-            new_page.wait_for_load_state("networkidle")
-            time.sleep(2)
-
-            # 获取新页面的URL
-            page_url = new_page.url
-            logger.debug(f"新标签页URL: {page_url}")
-
-            # 提取真实的PDF链接
-            pdf_url = self._extract_pdf_url_from_preview(page_url)
+            # 点击预览，新标签页由拦截器关闭
+            pdf_url = self.popup_interceptor.capture_url(element.click, self.download_timeout * 1000)
 
             if not pdf_url:
                 task.error_message = "无法从预览页面提取PDF链接"
-                new_page.close()
                 return False
 
             logger.info(f"提取到PDF链接: {pdf_url[:100]}...")
 
-            # 确定保存路径
-            file_path = self._get_file_path(task)
+            # 记录真实链接，由工作线程转交HTTP通道下载
+            task.url = pdf_url
+            return True
 
-            # 下载PDF文件
-            success = self._download_from_url(pdf_url, file_path, task)
+        except Exception as e:
+            task.error_message = f"PDF预览下载失败: {e}"
+            return False
 
-            # 关闭新标签页
-            new_page.close()
+    def _download_http(self, task: DownloadTask) -> bool:
+        """
+        HTTP通道下载（任务已有真实URL，不经过浏览器）
 
-            if success:
-                task.file_path = file_path
-                return True
-            else:
-                return False
+        Args:
+            task: 下载任务对象
 
-        except Exception as e:
-            task.error_message = f"PDF预览下载失败: {e}"
+        Returns:
+            是否成功
+        """
+        # 目标路径在首次尝试时确定，重试时沿用同一个 .part 文件续传
+        if task.target_path is None:
+            task.target_path = self._get_file_path(task)
+        file_path = task.target_path
+
+        if not self._download_from_url(task.url, file_path, task):
             return False
 
+        task.file_path = file_path
+        if task.not_modified:
+            if task.cached_entry["hash_algorithm"] == self.hash_algorithm:
+                task.file_hash = task.cached_entry["file_hash"]
+                task.hash_algorithm = self.hash_algorithm
+            logger.debug(f"服务器确认文件未变化: {file_path.name}")
+            return True
+
+        self._save_download_record(task, task.file_hash)
+        self._update_index(task, task.file_hash)
+        return True
+
     def _download_by_selector(self, task: DownloadTask) -> bool:
         """
         通过选择器下载（通用方法）
@@ -441,9 +786,8 @@ class DownloadManager:
             self._ensure_tab_context(task.tab_path)
 
             # 定位元素
-            element = self.page.locator(task.element_selector).first
-            if element.count() == 0:
-                task.error_message = f"找不到元素: {task.element_selector}"
+            element = self._locate_element(task)
+            if element is None:
                 return False
 
             # 获取元素文本
@@ -470,7 +814,11 @@ class DownloadManager:
 
     def _download_from_url(self, url: str, file_path: Path, task: DownloadTask) -> bool:
         """
-        从URL下载文件
+        从URL下载文件（支持断点续传和分段并行下载）
+
+        数据先写入 ``<文件名>.part``，重试时用HTTP Range从已下载的位置继续；
+        服务器支持Range且文件超过 split_threshold 时拆成多个分段并行下载。
+        全部完成后原子重命名为目标文件。
 
         Args:
             url: 下载URL
@@ -480,135 +828,320 @@ class DownloadManager:
         Returns:
             是否成功
         """
-        try:
-            # 设置请求头
-            headers = {
-                'User-Agent': Config.USER_AGENT,
-                'Accept': 'application/pdf,application/x-pdf,*/*',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7',
-                'Referer': 'https://manage.shengtongedu.cn/',
-            }
+        part_path = file_path.with_name(file_path.name + ".part")
 
-            # 获取页面的cookies用于认证
-            cookies = {}
-            page_cookies = self.page.context.cookies()
-            for cookie in page_cookies:
-                cookies[cookie['name']] = cookie['value']
-
-            logger.debug(f"使用 {len(cookies)} 个cookies进行认证")
-
-            # 发送请求
-            session = requests.Session()
-            if cookies:
-                session.cookies.update(cookies)
-
-            response = session.get(
+        try:
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            if offset and not task.etag:
+                # 没有ETag无法用If-Range确认资源未变化，续传可能把新内容拼接到旧数据后面，从头下载
+                logger.debug(f"临时文件没有可校验的ETag，重新下载: {part_path.name}")
+                os.remove(part_path)
+                offset = 0
+            headers = self._range_headers(task, offset)
+            if offset == 0 and task.cached_entry and file_path.exists():
+                # 索引中已有该资源，让服务器判断是否变化
+                headers['If-None-Match'] = task.cached_entry["etag"]
+
+            # 通过共享连接池发送请求（复用keep-alive连接和已同步的cookies）
+            response = self.http_pool.get(
                 url,
                 headers=headers,
                 stream=True,
                 timeout=self.download_timeout
             )
 
-            if response.status_code != 200:
-                task.error_message = f"HTTP错误: {response.status_code}"
+            if not self._check_download_response(response, task):
                 return False
 
-            # 获取文件大小
-            total_size = int(response.headers.get('content-length', 0))
+            if response.status_code == 304:
+                response.close()
+                task.not_modified = True
+                return True
 
-            # 写入文件
-            with open(file_path, 'wb') as f:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
+            # 摘要在写入时同步计算，不再回读整个文件
+            hasher = hashlib.new(self.hash_algorithm)
 
-                        # 更新进度
-                        if total_size > 0:
-                            task.progress = (downloaded / total_size) * 100
+            if response.status_code == 416 and offset > 0:
+                # 请求的起点超出文件末尾：只有临时文件大小与服务器给出的总大小一致时才视为已完整
+                response.close()
+                total = self._parse_content_range(response.headers.get("Content-Range")) or task.total_size
+                if total != offset:
+                    task.error_message = f"临时文件大小与服务器不一致: {offset}/{total} bytes"
+                    os.remove(part_path)
+                    return False
+                task.total_size = total
+                logger.debug(f"临时文件已完整: {part_path.name}")
+                self._update_hash_from_file(hasher, part_path)
+            elif response.status_code == 206:
+                task.total_size = self._parse_content_range(response.headers.get("Content-Range"))
+                task.etag = response.headers.get("ETag") or task.etag
+
+                if (offset == 0 and task.total_size
+                        and task.total_size >= self.split_threshold and self.split_parts > 1):
+                    response.close()
+                    if not self._download_segmented(url, part_path, task, hasher):
+                        return False
+                else:
+                    if offset > 0:
+                        logger.info(f"断点续传: {file_path.name} 从 {offset} 字节继续")
+                        # 续传时只需补算已下载部分的摘要
+                        self._update_hash_from_file(hasher, part_path)
+                    task.downloaded_bytes = offset
+                    self._write_response(response, part_path, "ab" if offset else "wb", task, hasher)
+            elif response.status_code == 200:
+                # 服务器不支持Range（或资源已变化），从头下载
+                task.total_size = int(response.headers.get('content-length', 0)) or None
+                task.etag = response.headers.get("ETag") or task.etag
+                task.downloaded_bytes = 0
+                self._write_response(response, part_path, "wb", task, hasher)
+            else:
+                task.error_message = f"HTTP错误: {response.status_code}"
+                response.close()
+                return False
 
             # 验证文件
-            if os.path.getsize(file_path) > 0:
-                # 计算文件哈希
-                file_hash = self._calculate_file_hash(file_path)
-                logger.debug(f"URL下载完成: {file_path.name} (大小: {os.path.getsize(file_path)} bytes)")
-                return True
-            else:
+            size = part_path.stat().st_size if part_path.exists() else 0
+            if size == 0:
                 task.error_message = "下载的文件大小为0"
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                if part_path.exists():
+                    os.remove(part_path)
                 return False
 
+            expected_size = task.total_size or task.expected_size
+            if expected_size and size != expected_size:
+                task.error_message = f"文件不完整: {size}/{expected_size} bytes"
+                if size > expected_size:
+                    os.remove(part_path)
+                return False
+
+            # 原子替换为最终文件
+            os.replace(part_path, file_path)
+            task.file_hash = hasher.hexdigest()
+            task.hash_algorithm = self.hash_algorithm
+            logger.debug(f"URL下载完成: {file_path.name} (大小: {size} bytes)")
+            return True
+
         except Exception as e:
+            # 保留 .part 文件，下一次重试从断点继续
             task.error_message = f"URL下载失败: {e}"
             return False
 
-    def _extract_pdf_url_from_preview(self, page_url: str) -> Optional[str]:
+    def _download_segmented(self, url: str, part_path: Path, task: DownloadTask, hasher) -> bool:
         """
-        从预览页面URL中提取真实的PDF链接
+        把大文件拆成多个Range分段并行下载，再按顺序合并到 .part 文件
 
-        Args:
-            page_url: 预览页面URL
+        每个分段写入独立的 ``.part.N`` 文件，同样支持断点续传；
+        摘要在顺序合并时计算。
+        """
+        total = task.total_size
+        segment_size = -(-total // self.split_parts)
+        segments = []
+        for index in range(self.split_parts):
+            start = index * segment_size
+            end = min(total, start + segment_size) - 1
+            if start <= end:
+                segments.append((part_path.with_name(f"{part_path.name}.{index}"), start, end))
+
+        if not task.etag:
+            # 没有ETag时上一次留下的分段无法校验，全部重新下载
+            for path, _, _ in segments:
+                if path.exists():
+                    path.unlink()
+        task.downloaded_bytes = sum(path.stat().st_size for path, _, _ in segments if path.exists())
+        logger.info(f"分段下载: {part_path.name[:-5]} ({total} bytes, {len(segments)} 段)")
+
+        with ThreadPoolExecutor(max_workers=len(segments),
+                                thread_name_prefix=f"{threading.current_thread().name}-Seg") as executor:
+            results = list(executor.map(
+                lambda segment: self._download_segment(url, *segment, task), segments))
+
+        if not all(results):
+            return False
 
-        Returns:
-            真实的PDF链接，如果提取失败则返回None
+        # 按顺序合并分段
+        with open(part_path, 'wb') as out:
+            for path, _, _ in segments:
+                self._copy_with_hash(path, out, hasher)
+        for path, _, _ in segments:
+            path.unlink()
+
+        return True
+
+    def _download_segment(self, url: str, segment_path: Path, start: int, end: int,
+                          task: DownloadTask) -> bool:
+        """下载单个Range分段（已下载部分直接跳过）"""
+        try:
+            expected = end - start + 1
+            offset = segment_path.stat().st_size if segment_path.exists() else 0
+            if offset >= expected:
+                return True
+
+            headers = self._range_headers(task, start + offset, end)
+            response = self.http_pool.get(url, headers=headers, stream=True,
+                                          timeout=self.download_timeout)
+
+            if not self._check_download_response(response, task):
+                return False
+
+            if response.status_code != 206:
+                task.error_message = f"分段下载失败: HTTP {response.status_code}"
+                response.close()
+                # 资源已变化，分段作废
+                if response.status_code == 200 and segment_path.exists():
+                    segment_path.unlink()
+                return False
+
+            self._write_response(response, segment_path, "ab" if offset else "wb", task)
+            return segment_path.stat().st_size == expected
+
+        except Exception as e:
+            task.error_message = f"分段下载失败: {e}"
+            return False
+
+    def _range_headers(self, task: DownloadTask, start: int, end: Optional[int] = None) -> Dict[str, str]:
+        """构造Range请求头（关闭压缩，保证字节偏移与文件一致）"""
+        headers = {
+            'Range': f"bytes={start}-{end if end is not None else ''}",
+            'Accept-Encoding': 'identity',
+        }
+        if start > 0 and task.etag:
+            # 资源在两次请求之间发生变化时，服务器会返回完整内容
+            headers['If-Range'] = task.etag
+        return headers
+
+    def _check_download_response(self, response, task: DownloadTask) -> bool:
+        """检查认证失败，需要时等待cookies重新同步"""
+        if response.status_code in (401, 403):
+            task.error_message = f"HTTP认证失败: {response.status_code}"
+            response.close()
+            # 等待浏览器线程重新同步cookies后再由重试逻辑重新下载
+            # 唤醒等待中的主线程去重新同步
+            with self._state_cond:
+                self._state_cond.notify_all()
+            self.http_pool.wait_for_cookie_sync(timeout=10)
+            return False
+        return True
+
+    def _write_response(self, response, path: Path, mode: str, task: DownloadTask, hasher=None):
+        """把响应流写入文件并更新进度（可同时更新摘要）"""
+        with open(path, mode) as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    if hasher:
+                        hasher.update(chunk)
+                    with self._progress_lock:
+                        task.downloaded_bytes += len(chunk)
+                        if task.total_size:
+                            task.progress = min(100.0, task.downloaded_bytes / task.total_size * 100)
+
+    def _update_hash_from_file(self, hasher, path: Path):
+        """把已有文件内容计入摘要"""
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                hasher.update(chunk)
+
+    def _copy_with_hash(self, src: Path, dst, hasher):
+        """把文件内容复制到已打开的目标文件，同时更新摘要"""
+        with open(src, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                dst.write(chunk)
+                hasher.update(chunk)
+
+    def _save_download(self, download, file_path: Path, task: DownloadTask):
+        """
+        保存Playwright下载对象，复制的同时计算摘要
+
+        浏览器已把文件下载到临时路径，这里一次流式复制完成保存和摘要计算，
+        代替 save_as 之后再整文件回读。
         """
+        hasher = hashlib.new(self.hash_algorithm)
+        part_path = file_path.with_name(file_path.name + ".part")
+
         try:
-            # 解析URL
-            parsed = urlparse(page_url)
-
-            # 方法1: 从查询参数中提取双重编码的URL
-            query_params = parse_qs(parsed.query)
-            if 'url' in query_params:
-                encoded_url = query_params['url'][0]
-                # 双重解码
-                pdf_url = unquote(unquote(encoded_url))
-                if pdf_url.startswith('https://') and '.pdf' in pdf_url.lower():
-                    return pdf_url
-
-            # 方法2: 从URL片段中提取
-            if parsed.fragment:
-                # 片段中可能包含查询参数
-                fragment_parts = parsed.fragment.split('?')
-                if len(fragment_parts) > 1:
-                    fragment_params = parse_qs(fragment_parts[1])
-                    if 'url' in fragment_params:
-                        encoded_url = fragment_params['url'][0]
-                        pdf_url = unquote(unquote(encoded_url))
-                        if pdf_url.startswith('https://') and '.pdf' in pdf_url.lower():
-                            return pdf_url
-
-            # 方法3: 正则匹配OSS链接
-            oss_pattern = r'(https://public-[a-zA-Z0-9-]+\.oss[^&"\']+\.pdf)'
-            matches = re.findall(oss_pattern, page_url)
-            if matches:
-                return unquote(unquote(matches[0]))
+            source = download.path()
+        except Exception:
+            # 远程浏览器没有本地临时文件，只能先保存再计算
+            source = None
+
+        if source:
+            with open(part_path, 'wb') as out:
+                self._copy_with_hash(Path(source), out, hasher)
+            os.replace(part_path, file_path)
+            task.file_hash = hasher.hexdigest()
+        else:
+            download.save_as(str(file_path))
+            task.file_hash = FileUtils.hash_file(file_path, self.hash_algorithm, self.chunk_size)
+
+        task.hash_algorithm = self.hash_algorithm
 
+    @staticmethod
+    def _parse_content_range(content_range: Optional[str]) -> Optional[int]:
+        """从 Content-Range: bytes 0-99/1234 中解析文件总大小"""
+        if not content_range or "/" not in content_range:
             return None
+        total = content_range.rsplit("/", 1)[1].strip()
+        return int(total) if total.isdigit() else None
 
-        except Exception as e:
-            logger.debug(f"提取PDF链接失败: {e}")
+    def _extract_pdf_url_from_preview(self, page_url: str) -> Optional[str]:
+        """从预览页面URL中提取真实的PDF链接"""
+        return extract_pdf_url_from_preview(page_url)
+
+    def _locate_element(self, task: DownloadTask) -> Optional[Locator]:
+        """
+        定位任务对应的页面元素（调用方需先切换到任务所在的Tab）
+
+        按检测时打上的标记直接定位；标记已不在页面上（重新渲染）时重新检测当前Tab，
+        按文本和同名序号找回同一个资源并更新任务的标记。找不到时设置错误信息并返回None
+        """
+        rid = task.task_info.get("rid")
+        if rid:
+            element = self.page.locator(rid_selector(rid))
+            if element.count() == 1:
+                return element
+
+            resource = self.tab_explorer.detector.relocate(task.task_info) if self.tab_explorer else None
+            if not resource or not resource.get("rid"):
+                task.error_message = f"元素标记已失效且重新检测未找到: {task.resource_name}"
+                return None
+            logger.debug(f"元素标记已失效，重新检测后定位: {task.resource_name} -> {resource['selector']}")
+            task.task_info.update(rid=resource["rid"], selector=resource["selector"])
+            task.element_selector = resource["selector"]
+            return self.page.locator(task.element_selector)
+
+        if not task.element_selector:
+            task.error_message = "没有有效的元素选择器"
             return None
+        element = self.page.locator(task.element_selector).first
+        if element.count() == 0:
+            task.error_message = f"找不到元素: {task.element_selector}"
+            return None
+        return element
+
+    def _set_active_tab(self, tab_path: Optional[List[str]]):
+        """记录页面当前所在的Tab（None表示未知）"""
+        self._active_tab = list(tab_path) if tab_path else None
 
     def _ensure_tab_context(self, tab_path: List[str]):
         """
         确保页面在正确的Tab上下文中
 
+        页面已在该Tab（按内存中记录的当前Tab判断）时直接返回；否则逐级检查并点击
+
         Args:
             tab_path: Tab路径列表
         """
         try:
-            if len(tab_path) < 1:
+            if len(tab_path) < 1 or list(tab_path) == self._active_tab:
                 return
+            self._active_tab = None
 
             # 激活一级Tab
             primary_tab = self.page.locator(f'.el-tabs__header.is-top .el-tabs__item:has-text("{tab_path[0]}")').first
             if primary_tab.count() > 0:
                 if "is-active" not in (primary_tab.get_attribute("class") or ""):
                     primary_tab.click()
-                    self.page.wait_for_load_state("networkidle")
-                    time.sleep(Config.CLICK_WAIT)
+                    self.waiter.tab_ready(primary_tab)
 
             # 如果有二级Tab，激活二级Tab
             if len(tab_path) > 1:
@@ -617,8 +1150,9 @@ class DownloadManager:
                 if secondary_tab.count() > 0:
                     if "is-active" not in (secondary_tab.get_attribute("class") or ""):
                         secondary_tab.click()
-                        self.page.wait_for_load_state("networkidle")
-                        time.sleep(Config.CLICK_WAIT)
+                        self.waiter.tab_ready(secondary_tab)
+
+            self._active_tab = list(tab_path)
 
         except Exception as e:
             logger.debug(f"切换Tab上下文失败: {e}")
@@ -633,8 +1167,13 @@ class DownloadManager:
         Returns:
             完整的文件路径
         """
+        # 索引中已有该资源时沿用原路径（资源变化时覆盖旧文件）
+        entry = task.cached_entry or (self.index.lookup(task.resource_key) if self.index else None)
+        if entry and entry["file_path"]:
+            return self._reserve_path(Path(entry["file_path"]), task.resource_key)
+
         # 基础目录
-        base_dir = task.destination_dir or self.base_download_dir
+        base_dir = Path(task.destination_dir or self.base_download_dir)
 
         # 课程信息
         lesson_info = task.lesson_info
@@ -666,8 +1205,7 @@ class DownloadManager:
         # 确保目录存在
         file_dir.mkdir(parents=True, exist_ok=True)
 
-        # 生成文件名
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 生成文件名（不带时间戳，重复运行时路径保持稳定）
         safe_file_name = self._sanitize_filename(task.file_name)
 
         # 获取文件扩展名
@@ -675,25 +1213,50 @@ class DownloadManager:
 
         # 如果文件名已经有正确的扩展名，就不再加了
         if safe_file_name.lower().endswith(tuple(self.file_type_extensions.values())):
-            filename = f"{timestamp}_{safe_file_name}"
+            filename = safe_file_name
         else:
-            filename = f"{timestamp}_{safe_file_name}{extension}"
+            filename = f"{safe_file_name}{extension}"
 
-        return file_dir / filename
+        return self._reserve_path(file_dir / filename, task.resource_key)
+
+    def _reserve_path(self, file_path: Path, resource_key: str) -> Path:
+        """
+        为资源占用一个文件路径
+
+        同名文件属于其他资源（本次运行中或索引中）时，在文件名后追加序号。
+        """
+        with self._path_lock:
+            candidate = file_path
+            number = 1
+            while True:
+                owner = self._reserved_paths.get(candidate)
+                if owner is None and self.index:
+                    owner = self.index.owner_of(candidate)
+                if owner is None or owner == resource_key:
+                    break
+                number += 1
+                candidate = file_path.with_name(f"{file_path.stem}_{number}{file_path.suffix}")
+
+            self._reserved_paths[candidate] = resource_key
+            return candidate
+
+    def _update_index(self, task: DownloadTask, file_hash: str):
+        """下载成功后更新持久化索引"""
+        if not self.index or not task.file_path:
+            return
+
+        try:
+            self.index.record(task.resource_key, task.file_path, file_hash,
+                              hash_algorithm=task.hash_algorithm or self.hash_algorithm,
+                              url=task.url, etag=task.etag, resource_name=task.resource_name)
+        except Exception as e:
+            logger.debug(f"更新下载索引失败: {e}")
 
     def _save_download_record(self, task: DownloadTask, file_hash: str):
-        """保存下载记录到JSON文件"""
+        """追加下载记录到同目录的 下载记录.jsonl（由记录日志的写线程落盘）"""
         try:
             record_dir = task.file_path.parent if task.file_path else self.base_download_dir
-            record_file = record_dir / "下载记录.json"
-
-            # 读取现有记录
-            records = []
-            if record_file.exists():
-                with open(record_file, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
 
-            # 添加新记录
             record = {
                 "timestamp": datetime.now().isoformat(),
                 "task_id": task.task_id,
@@ -702,29 +1265,18 @@ class DownloadManager:
                 "file_name": task.file_path.name if task.file_path else "未知",
                 "file_size": os.path.getsize(task.file_path) if task.file_path and task.file_path.exists() else 0,
                 "file_hash": file_hash,
+                "hash_algorithm": task.hash_algorithm,
                 "tab_path": " > ".join(task.tab_path),
                 "status": task.status,
                 "lesson_info": task.lesson_info,
                 "download_method": task.download_method
             }
 
-            records.append(record)
-
-            # 保存记录
-            with open(record_file, 'w', encoding='utf-8') as f:
-                json.dump(records, f, ensure_ascii=False, indent=2)
+            self.record_log.append(record_dir / RECORD_LOG_NAME, record)
 
         except Exception as e:
             logger.debug(f"保存下载记录失败: {e}")
 
-    def _calculate_file_hash(self, file_path: Path) -> str:
-        """计算文件的MD5哈希值"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-
     def _sanitize_filename(self, filename: str) -> str:
         """清理文件名中的非法字符"""
         # 替换非法字符为下划线，限制长度
@@ -760,7 +1312,9 @@ class DownloadManager:
         report_data = {
             "generated_at": datetime.now().isoformat(),
             "statistics": self.get_stats(),
+            "http_pool": self.http_pool.get_stats(),
             "completed_tasks": [task.to_dict() for task in self.completed_tasks],
+            "skipped_tasks": [task.to_dict() for task in self.skipped_tasks],
             "failed_tasks": [task.to_dict() for task in self.failed_tasks],
             "summary": {
                 "total_files": len(self.completed_tasks),
@@ -791,9 +1345,25 @@ class DownloadManager:
         try:
             logger.separator("开始资源探索与下载")
 
+            # 启用嗅探时先启动下载管理器，探索过程中捕获到的资源立即开始下载
+            sniffed_futures = []
+            sniffed_names = set()
+            if self.journal:
+                self.journal.mark_lesson(lesson_info, "started")
+            if self.sniffer:
+                self.start()
+                self.sniffer.begin_lesson(lesson_info, download_dir, self)
+
             # 1. 探索所有Tab中的资源
             logger.info("探索所有Tab中的资源...")
-            all_resources = self.tab_explorer.explore_all_tabs()
+            try:
+                all_resources = self.tab_explorer.explore_all_tabs()
+            finally:
+                if self.sniffer:
+                    sniffed_names = self.sniffer.captured_names()
+                    self.sniffer.end_lesson()
+                    sniffed_futures = list(self.sniffer.futures)
+                    logger.info(f"网络响应捕获 {len(sniffed_futures)} 个资源")
 
             # 汇总统计
             total_resources = sum(len(resources) for resources in all_resources.values())
@@ -807,40 +1377,60 @@ class DownloadManager:
                 if len(resources) > 3:
                     logger.debug(f"    ... 还有 {len(resources) - 3} 个资源")
 
-            if total_resources == 0:
+            if total_resources == 0 and not sniffed_futures:
                 logger.warning("未发现任何资源，跳过下载")
+                if self.is_running:
+                    self.stop()
                 return False
 
-            # 2. 过滤出可下载的资源（目前只支持PDF和直接下载）
+            # 2. 过滤出可下载的资源（PDF、直接下载以及已带有真实URL的资源）
             downloadable_resources = []
             for tab_path, resources in all_resources.items():
                 for resource in resources:
-                    # 只处理PDF和直接下载的资源
-                    if resource['resource_type'] == 'pdf' or resource['download_method'] == 'direct':
+                    # 有URL的资源走HTTP通道，PDF和直接下载的资源走浏览器通道
+                    # 已通过网络响应捕获的资源不再点击页面
+                    if not resource.get('url') and resource['file_name'].lower() in sniffed_names:
+                        continue
+                    if (resource.get('url') or resource['resource_type'] == 'pdf'
+                            or resource['download_method'] == 'direct'):
                         # 添加课时信息和下载目录
                         resource['lesson_info'] = lesson_info
                         resource['destination_dir'] = download_dir
                         downloadable_resources.append(resource)
 
-            logger.info(f"筛选出 {len(downloadable_resources)} 个可下载资源（PDF和直接下载）")
+            http_count = sum(1 for resource in downloadable_resources if resource.get('url'))
+            logger.info(f"筛选出 {len(downloadable_resources)} 个可下载资源 "
+                        f"(HTTP通道 {http_count} 个, 浏览器通道 {len(downloadable_resources) - http_count} 个)")
 
-            if len(downloadable_resources) == 0:
+            if len(downloadable_resources) == 0 and not sniffed_futures:
                 logger.warning("没有可下载的资源（目前只支持PDF和直接下载）")
+                if self.is_running:
+                    self.stop()
                 return False
 
             # 3. 启动下载管理器
-            self.start()
+            if not self.is_running:
+                self.start()
 
             # 4. 添加下载任务
-            task_ids = self.add_batch_tasks(downloadable_resources)
-
-            # 5. 等待下载完成（最多10分钟）
-            self.wait_for_completion(timeout=600)
-
-            # 6. 获取统计信息
-            stats = self.get_stats()
+            futures = sniffed_futures + self.add_batch_tasks(downloadable_resources)
+            if self.journal:
+                self.journal.mark_lesson(lesson_info, "explored")
+
+            # 5. 等待本课时添加的任务完成（最多10分钟）
+            self.wait_for_tasks(futures, timeout=600)
+
+            # 6. 统计本课时任务的结果
+            statuses = [future.result().status if future.done() else "pending" for future in futures]
+            completed, skipped = statuses.count("completed"), statuses.count("skipped")
+            if self.journal:
+                self.journal.mark_lesson(lesson_info, "done" if completed + skipped == len(statuses) else "failed")
             logger.info(
-                f"下载统计: {stats['completed']}成功, {stats['failed']}失败, 成功率: {stats['success_rate']:.1f}%")
+                f"下载统计: {completed}成功, {statuses.count('failed')}失败, {skipped}已存在跳过, "
+                f"{statuses.count('pending')}未完成")
+            pool_stats = self.http_pool.get_stats()
+            logger.info(f"连接复用: {pool_stats['reused_connections']}次复用, "
+                        f"{pool_stats['new_connections']}次新建连接")
 
             # 7. 导出报告
             report_path = download_dir / "下载报告.json"
@@ -850,7 +1440,7 @@ class DownloadManager:
             self.stop()
 
             logger.success(f"资源下载完成！报告: {report_path}")
-            return stats['completed'] > 0
+            return completed + skipped > 0
 
         except Exception as e:
             logger.error(f"探索下载失败: {e}", exc_info=True)
@@ -861,9 +1451,13 @@ class DownloadManager:
 class SimpleDownloader:
     """简化版下载器"""
 
-    def __init__(self, page: Page):
+    def __init__(self, page: Page, sniffer: Optional[NetworkResourceSniffer] = None):
+        """
+        Args:
+            sniffer: 已挂载到页面的网络响应嗅探器（BrowserManager 启用 sniff_responses 时的 browser.sniffer）
+        """
         self.page = page
-        self.download_manager = DownloadManager(page, max_concurrent=2)
+        self.download_manager = DownloadManager(page, max_concurrent=2, sniffer=sniffer)
 
     def download_resources(self, lesson_info: Dict, download_dir: Path) -> bool:
         """
@@ -0,0 +1,176 @@
+# http_client.py
+"""
+共享HTTP连接池
+多个工作线程复用同一组keep-alive连接，cookies由浏览器上下文统一同步
+"""
+import time
+import threading
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from logger import logger
+
+
+class HttpSessionPool:
+    """线程安全的HTTP会话池"""
+
+    def __init__(self,
+                 pool_size: int = 4,
+                 headers: Optional[Dict[str, str]] = None,
+                 connect_retries: int = 2,
+                 requests_per_second: float = 0):
+        """
+        初始化会话池
+
+        每个线程持有自己的Session对象，但所有Session挂载同一个HTTPAdapter
+        （urllib3连接池本身是线程安全的）并共享同一个cookie jar，
+        因此连接和认证信息在线程之间复用。
+
+        Args:
+            pool_size: 每个主机保持的最大连接数（一般等于并发下载数）
+            headers: 所有请求共用的请求头
+            connect_retries: 建立连接失败时的自动重试次数
+            requests_per_second: 所有线程合计的请求速率上限，0表示不限速
+        """
+        self.pool_size = max(1, pool_size)
+        self.headers = dict(headers or {})
+
+        self._adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=False,
+            max_retries=Retry(total=connect_retries, connect=connect_retries,
+                              read=0, status=0, backoff_factor=0.5)
+        )
+        self._cookies = requests.cookies.RequestsCookieJar()
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._lock = threading.Lock()
+
+        # 全局限速（按固定间隔分配请求时间片）
+        self._min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
+        self._next_slot = 0.0
+
+        # cookies同步状态（401/403时标记过期，由浏览器线程重新同步）
+        self._cookies_synced = threading.Event()
+        self._cookies_stale = False
+
+        # 统计信息
+        self.request_count = 0
+        self.cookie_sync_count = 0
+        self.auth_failure_count = 0
+
+    @property
+    def session(self) -> requests.Session:
+        """获取当前线程的Session"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            session.headers.update(self.headers)
+            session.headers["Connection"] = "keep-alive"
+            session.cookies = self._cookies
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """发送GET请求"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """发送POST请求"""
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送请求，并在认证失败时标记cookies过期"""
+        self._wait_for_rate_limit()
+        response = self.session.request(method, url, **kwargs)
+
+        with self._lock:
+            self.request_count += 1
+            if response.status_code in (401, 403):
+                self.auth_failure_count += 1
+                self._cookies_stale = True
+                self._cookies_synced.clear()
+
+        return response
+
+    def _wait_for_rate_limit(self):
+        """等待分配到的请求时间片"""
+        if not self._min_interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._min_interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+    def sync_cookies(self, cookies: List[Dict]):
+        """
+        用浏览器上下文的cookies替换当前cookie jar
+
+        Args:
+            cookies: BrowserContext.cookies() 返回的cookie列表
+        """
+        with self._lock:
+            self._cookies.clear()
+            for cookie in cookies:
+                self._cookies.set(cookie["name"], cookie["value"],
+                                  domain=cookie.get("domain", ""),
+                                  path=cookie.get("path", "/"))
+            self._cookies_stale = False
+            self.cookie_sync_count += 1
+        self._cookies_synced.set()
+
+        logger.debug(f"HTTP会话池已同步 {len(cookies)} 个cookies")
+
+    @property
+    def cookies_stale(self) -> bool:
+        """cookies是否因认证失败需要重新同步"""
+        return self._cookies_stale
+
+    def wait_for_cookie_sync(self, timeout: float) -> bool:
+        """等待浏览器线程重新同步cookies"""
+        return self._cookies_synced.wait(timeout)
+
+    def get_stats(self) -> Dict:
+        """获取连接复用统计"""
+        new_connections = 0
+        pooled_requests = 0
+
+        # urllib3连接池记录了新建连接数和经过该池的请求数
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += getattr(pool, "num_connections", 0)
+            pooled_requests += getattr(pool, "num_requests", 0)
+
+        return {
+            "sessions": len(self._sessions),
+            "pool_size": self.pool_size,
+            "requests": self.request_count,
+            "new_connections": new_connections,
+            "reused_connections": max(0, pooled_requests - new_connections),
+            "connection_reuse_rate": ((pooled_requests - new_connections) / pooled_requests * 100
+                                      if pooled_requests > 0 else 0),
+            "cookie_syncs": self.cookie_sync_count,
+            "auth_failures": self.auth_failure_count,
+        }
+
+    def close(self):
+        """关闭所有会话和连接"""
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+        self._adapter.close()
+        self._local = threading.local()
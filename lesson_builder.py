@@ -0,0 +1,180 @@
+# lesson_builder.py
+"""
+课时列表构建器
+单元 → 课时接口请求在有界线程池中并发执行，所有线程共享一个keep-alive连接池并遵守全局限速，
+结果保存为 lessons_info.json 格式，支持一次为 courses_data.json 中的多门课程构建
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from config import Config, API_MAX_WORKERS, API_REQUESTS_PER_SECOND
+from logger import logger
+from http_client import HttpSessionPool
+from utils import APIUtils, FileUtils
+
+LESSONS_INFO_FILE = Path("lessons_info.json")
+
+
+class LessonListBuilder:
+    """并发课时列表构建器"""
+
+    def __init__(self, token: str,
+                 max_workers: int = API_MAX_WORKERS,
+                 requests_per_second: float = API_REQUESTS_PER_SECOND):
+        """
+        Args:
+            token: API Token
+            max_workers: 并发请求线程数
+            requests_per_second: 所有线程合计的请求速率上限（0表示不限速）
+        """
+        self.token = token
+        self.max_workers = max(1, max_workers)
+        self.session = HttpSessionPool(
+            pool_size=self.max_workers,
+            headers=Config.get_api_headers(token),
+            requests_per_second=requests_per_second
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+    def build_course(self, course_code: str) -> Optional[List[Dict]]:
+        """构建单门课程的课时列表（lessons_info.json 格式），接口请求失败时返回None"""
+        return self.build_courses([course_code])[course_code]
+
+    def build_courses(self, course_codes: List[str]) -> Dict[str, Optional[List[Dict]]]:
+        """
+        构建多门课程的课时列表
+
+        先并发获取所有课程的单元，再把所有 (课程, 单元) 的课时请求放进同一个线程池，
+        每门课程的结果仍按接口返回的单元顺序排列。
+
+        Returns:
+            {课程编码: 课时列表}，单元或任一单元的课时获取失败的课程为None（不返回不完整的列表）
+        """
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="LessonApi") as executor:
+            units_by_course = dict(zip(course_codes, executor.map(
+                lambda code: APIUtils.fetch_course_units(code, self.token, session=self.session),
+                course_codes)))
+
+            unit_jobs: List[Tuple[str, Dict]] = [(code, unit) for code in course_codes
+                                                 for unit in units_by_course[code] or []]
+            sessions_list = executor.map(
+                lambda job: APIUtils.fetch_unit_sessions(job[0], APIUtils.unit_code_of(job[1]),
+                                                         self.token, session=self.session),
+                unit_jobs)
+
+            lessons_by_course: Dict[str, Optional[List[Dict]]] = {
+                code: [] if units_by_course[code] is not None else None for code in course_codes}
+            for (code, unit), sessions in zip(unit_jobs, sessions_list):
+                if sessions is None:
+                    lessons_by_course[code] = None
+                elif lessons_by_course[code] is not None:
+                    lessons_by_course[code].extend(APIUtils.build_lesson_entries(unit, sessions))
+
+        failed = [code for code, lessons in lessons_by_course.items() if lessons is None]
+        for code in failed:
+            logger.error(f"获取课时列表失败: {code}")
+
+        stats = self.session.get_stats()
+        lesson_count = sum(len(lessons) for lessons in lessons_by_course.values() if lessons)
+        logger.success(f"课时列表构建完成: {len(course_codes) - len(failed)}/{len(course_codes)} 门课程, "
+                       f"{len(unit_jobs)} 个单元, {lesson_count} 个课时, {stats['requests']} 次请求, "
+                       f"耗时 {time.time() - start_time:.1f}秒")
+        return lessons_by_course
+
+    def fetch_resources(self, course_code: str, lessons: List[Dict]) -> List[Optional[List[Dict]]]:
+        """并发获取多个课时的资源列表（顺序与 lessons 一致，获取失败的课时为None）"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ResourceApi") as executor:
+            return list(executor.map(
+                lambda lesson: APIUtils.fetch_session_resources(
+                    course_code, lesson["unit_code"], lesson["session_code"], self.token, session=self.session),
+                lessons))
+
+
+def save_lessons_info(lessons_by_course: Dict[str, Optional[List[Dict]]],
+                      output_dir: Optional[Path] = None) -> List[Path]:
+    """
+    保存课时列表
+
+    单门课程且未指定目录时写入 lessons_info.json；否则每门课程写入 <目录>/<课程编码>.json。
+    获取失败（None）的课程不写入，保留已有的文件
+    """
+    if output_dir is None and len(lessons_by_course) == 1:
+        lessons = next(iter(lessons_by_course.values()))
+        if lessons is None:
+            return []
+        FileUtils.save_json(lessons, LESSONS_INFO_FILE)
+        return [LESSONS_INFO_FILE]
+
+    output_dir = Path(output_dir or "lessons_info")
+    FileUtils.ensure_directory(output_dir)
+
+    paths = []
+    for course_code, lessons in lessons_by_course.items():
+        if lessons is None:
+            continue
+        path = output_dir / f"{course_code}.json"
+        FileUtils.save_json(lessons, path)
+        paths.append(path)
+    return paths
+
+
+if __name__ == '__main__':
+    import argparse
+    from browser_manager import BrowserManager
+
+    parser = argparse.ArgumentParser(description="通过接口构建课时列表（lessons_info.json 格式）")
+    parser.add_argument("course_codes", nargs="*", help="课程编码（不填时配合 --all 使用）")
+    parser.add_argument("--all", action="store_true", help="构建 courses_data.json 中的所有课程")
+    parser.add_argument("--changed", action="store_true", help="只构建最近一次目录同步中新增或修改的课程")
+    parser.add_argument("--output", type=Path, help="输出目录（每门课程一个文件）")
+    parser.add_argument("--workers", type=int, default=API_MAX_WORKERS, help="并发请求线程数")
+    parser.add_argument("--rps", type=float, default=API_REQUESTS_PER_SECOND, help="每秒请求数上限")
+    args = parser.parse_args()
+
+    course_codes = args.course_codes
+    if args.all:
+        from course_catalog import open_catalog
+
+        catalog = open_catalog()
+        course_codes = [course["courseCode"] for course in (catalog.list_courses() if catalog else [])
+                        if course.get("courseCode")]
+    elif args.changed:
+        from course_sync import read_latest_changes, changed_course_codes
+
+        latest_changes = read_latest_changes()
+        course_codes = changed_course_codes(latest_changes) if latest_changes else []
+        if not course_codes:
+            logger.info("最近一次同步没有发生变化的课程")
+            raise SystemExit(0)
+    if not course_codes:
+        parser.print_help()
+        raise SystemExit(1)
+
+    # 浏览器只用于获取Token
+    with BrowserManager(headless=True) as browser:
+        token = browser.get_token() if browser.login() else None
+    if not token:
+        logger.error("获取Token失败")
+        raise SystemExit(1)
+
+    with LessonListBuilder(token, max_workers=args.workers, requests_per_second=args.rps) as builder:
+        results = builder.build_courses(course_codes)
+
+    failed_codes = [code for code, lessons in results.items() if lessons is None]
+    for path in save_lessons_info(results, args.output):
+        logger.success(f"课时列表已保存: {path}")
+    if failed_codes:
+        logger.error(f"{len(failed_codes)} 门课程获取课时列表失败: {', '.join(failed_codes)}")
+        raise SystemExit(1)
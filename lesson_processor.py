@@ -8,6 +8,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from logger import logger
 import time
+from wait_strategy import LOADING_GONE_SCRIPT, TAB_PANE_READY_SCRIPT, wait_stats
+from resource_classifier import classifier
 from config import (
     IMPLICITLY_WAIT_TIME,
     RESOURCE_TAB_WHITE_KEYWORDS,
@@ -27,6 +29,24 @@ class LessonProcessor:
         self.lesson_list = []
         self.resource_metadata = []  # 存储所有资源元数据
 
+    def _wait_page_ready(self, name, pane_id=None, timeout=IMPLICITLY_WAIT_TIME):
+        """等待加载遮罩消失（传入pane_id时等待该Tab面板显示），代替固定等待，并记录耗时"""
+        if pane_id:
+            script = f"return ({TAB_PANE_READY_SCRIPT})(arguments[0]);"
+        else:
+            script = f"return ({LOADING_GONE_SCRIPT})(null);"
+
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda driver: driver.execute_script(script, pane_id))
+        except TimeoutException:
+            timed_out = True
+            logger.debug(f"⚠️ 等待页面就绪超时: {name}")
+        finally:
+            wait_stats.record(name, time.perf_counter() - start, timed_out=timed_out)
+
     def get_lesson_list(self):
         """获取当前课程下的所有课时树形结构列表"""
         try:
@@ -69,7 +89,7 @@ class LessonProcessor:
                 EC.element_to_be_clickable((By.XPATH, lesson_xpath))
             )
             lesson_ele.click()
-            time.sleep(0.8)
+            self._wait_page_ready("lesson_ready")
             logger.info(f"✅ 成功进入课时详情页: {lesson_name}")
             return True
         except TimeoutException:
@@ -88,17 +108,26 @@ class LessonProcessor:
             real_url = download_btn.get_attribute("data-url") or download_btn.get_attribute("href")
             if real_url and real_url.startswith(("http://", "https://")):
                 return real_url
-            # 点击按钮后从网络日志提取
+            # 点击按钮后从网络日志提取（轮询到下载请求出现为止）
             download_btn.click()
-            time.sleep(0.5)
-            logs = self.driver.get_log("performance")
-            for log in logs:
-                log_msg = log["message"]
-                if "download" in log_msg or any(file_type in log_msg for file_type in SUPPORT_FILE_TYPES):
-                    if '"url":"' in log_msg:
-                        download_url = log_msg.split('"url":"')[1].split('"')[0]
-                        return download_url
-            return None
+            found = {}
+
+            def find_download_url(driver):
+                for log in driver.get_log("performance"):
+                    log_msg = log["message"]
+                    if "download" in log_msg or any(file_type in log_msg for file_type in SUPPORT_FILE_TYPES):
+                        if '"url":"' in log_msg:
+                            found["url"] = log_msg.split('"url":"')[1].split('"')[0]
+                            return True
+                return False
+
+            start = time.perf_counter()
+            try:
+                WebDriverWait(self.driver, 3, poll_frequency=0.1).until(find_download_url)
+            except TimeoutException:
+                pass
+            wait_stats.record("download_request", time.perf_counter() - start, timed_out="url" not in found)
+            return found.get("url")
         except StaleElementReferenceException:
             logger.debug("⚠️ 下载按钮元素过期，跳过该资源")
             return None
@@ -107,14 +136,8 @@ class LessonProcessor:
             return None
 
     def judge_resource_type(self, resource_name):
-        """判断资源文件类型 - 原方法完全保留"""
-        if not resource_name:
-            return "unknown"
-        resource_name = resource_name.lower().strip()
-        for file_type in SUPPORT_FILE_TYPES:
-            if resource_name.endswith(f".{file_type}"):
-                return file_type
-        return "other"
+        """判断资源文件类型（按后缀，规则编译在 resource_classifier 中）"""
+        return classifier.file_type(resource_name)
 
     # ===================== 【核心重构 替换原2个方法 根治误点问题 无任何冗余】 =====================
     def explore_all_valid_resource_tabs(self):
@@ -164,7 +187,8 @@ class LessonProcessor:
                 # 安全点击有效资源Tab
                 try:
                     tab_ele.click()
-                    time.sleep(0.7)  # Vue异步渲染等待，完美适配你的前端框架
+                    # Vue异步渲染：等待该Tab面板 aria-hidden=false 且加载遮罩消失
+                    self._wait_page_ready("tab_ready", tab_ele.get_attribute("aria-controls"))
                     logger.info(f"✅ 探索有效资源Tab → {current_tab_name}")
                 except StaleElementReferenceException:
                     logger.debug(f"⚠️ Tab元素已刷新，跳过 → {current_tab_name}")
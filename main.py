@@ -4,16 +4,21 @@
 # @Date   : 2026
 import os
 import sys
-from browser_manager import BrowserManager
-from lesson_processor import LessonProcessor
-from collect_courses import CourseCollector
-from utils import init_logger, check_dir
+import argparse
+from pathlib import Path
 from logger import logger
 from config import LOG_DIR, DOWNLOAD_DIR
+from batch_runner import run_batch_job, EXIT_INVALID_JOB
 
 
 class ShentongSpider:
     def __init__(self):
+        # 交互流程的模块只在交互模式下加载，批量模式不依赖它们
+        from browser_manager import BrowserManager
+        from lesson_processor import LessonProcessor
+        from collect_courses import CourseCollector
+        from utils import init_logger, check_dir
+
         # 初始化目录
         check_dir(LOG_DIR)
         check_dir(DOWNLOAD_DIR)
@@ -103,6 +108,40 @@ class ShentongSpider:
             sys.exit(0)
 
 
+def parse_args():
+    """命令行参数（指定 --job 或 --course 时进入无交互的批量模式）"""
+    parser = argparse.ArgumentParser(description="圣通教育资源爬虫")
+    parser.add_argument("--job", type=Path, help="批量任务配置文件（JSON），字段见 batch_runner.DEFAULT_JOB")
+    parser.add_argument("--course", dest="courses", action="append",
+                        help="课程编码/ID/完整名称/通配符模式，可重复指定")
+    parser.add_argument("--lessons", help="课时范围，如 all、2-5、1,3,6-8")
+    parser.add_argument("--types", help="只下载这些资源类型，逗号分隔，如 pdf,video")
+    parser.add_argument("--concurrency", dest="max_concurrent", type=int, help="HTTP下载并发数")
+    parser.add_argument("--pool-size", dest="browser_pool_size", type=int, help="浏览器上下文数量")
+    parser.add_argument("--parallel-courses", action="store_true", default=None, help="多门课程同时处理")
+    parser.add_argument("--show-browser", dest="headless", action="store_false", default=None, help="显示浏览器窗口")
+    parser.add_argument("--no-block-requests", dest="block_requests", action="store_false", default=None,
+                        help="不拦截图片/字体/音视频等请求（显示浏览器时默认不拦截）")
+    parser.add_argument("--summary", dest="summary_file", help="汇总文件路径")
+    parser.add_argument("--no-revalidate", dest="revalidate", action="store_false", default=None,
+                        help="已下载的资源直接跳过，不向服务器确认是否变化")
+    parser.add_argument("--resume", action="store_true", default=None,
+                        help="根据进度日志跳过已完成的课时，并恢复上次未完成的下载")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.resume and not (args.job or args.courses):
+        # 进度日志只在批量模式中记录，交互模式无法恢复
+        logger.error("--resume 只能用于批量模式，请同时指定 --job 或 --course")
+        sys.exit(EXIT_INVALID_JOB)
+    if args.job or args.courses:
+        overrides = vars(args).copy()
+        job_path = overrides.pop("job")
+        types = overrides.pop("types")
+        overrides["resource_types"] = [t.strip() for t in types.split(",") if t.strip()] if types else None
+        sys.exit(run_batch_job(job_path, overrides))
+
     spider = ShentongSpider()
     spider.run()
\ No newline at end of file
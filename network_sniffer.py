@@ -0,0 +1,239 @@
+# network_sniffer.py
+"""
+网络响应嗅探器
+监听页面的XHR/fetch响应，从前端拉取的资源列表JSON中直接提取OSS链接、文件名和大小，
+提交到下载管理器的HTTP通道，大部分资源不再需要点击页面或打开预览弹窗
+"""
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, unquote
+from playwright.sync_api import Page, Response
+from logger import logger
+from resource_classifier import classifier
+
+# 资源链接、文件名、大小常见的字段名（按优先级排列）
+URL_KEYS = ["url", "fileUrl", "ossUrl", "resourceUrl", "downloadUrl", "filePath", "path", "src"]
+NAME_KEYS = ["fileName", "resourceName", "originalName", "name", "title"]
+SIZE_KEYS = ["fileSize", "size", "length"]
+# 分组（Tab/分类）名称常见的字段名
+GROUP_KEYS = ["tabName", "typeName", "categoryName", "name", "title"]
+
+RESOURCE_EXTENSIONS = (".pdf", ".ppt", ".pptx", ".doc", ".docx", ".xls", ".xlsx", ".mp4", ".mp3",
+                       ".sb3", ".zip", ".rar", ".7z", ".jpg", ".jpeg", ".png", ".gif")
+
+
+def _file_url(value: Any) -> Optional[str]:
+    """判断字段值是否是指向资源文件的HTTP链接"""
+    if not isinstance(value, str) or not value.startswith(("http://", "https://")):
+        return None
+    path = unquote(urlparse(value).path).lower()
+    return value if path.endswith(RESOURCE_EXTENSIONS) else None
+
+
+def _object_key(url: str) -> str:
+    """去掉签名参数后的对象地址（同一对象每次请求的签名不同）"""
+    return urlparse(url)._replace(query="").geturl()
+
+
+def extract_resources_from_json(payload: Any) -> List[Dict]:
+    """
+    从任意结构的JSON中提取资源
+
+    任何带有资源文件链接的对象都视为一个资源，名称和大小从同一对象的常见字段中读取，
+    与DOM探索一样只保留目标类型（classifier.is_target）的资源；
+    包含资源的上层对象的名称（如Tab名、分类名）记录为 group_path。
+
+    Returns:
+        [{"url", "file_name", "size", "resource_type", "group_path"}, ...]（按对象地址去重）
+    """
+    resources = []
+    seen = set()
+
+    def visit(node: Any, group_path: List[str]):
+        if isinstance(node, list):
+            for item in node:
+                visit(item, group_path)
+            return
+        if not isinstance(node, dict):
+            return
+
+        url = None
+        for key in URL_KEYS + [key for key in node if key not in URL_KEYS]:
+            url = _file_url(node.get(key))
+            if url:
+                break
+
+        if url and _object_key(url) not in seen:
+            seen.add(_object_key(url))
+            resource = _build_resource(node, url)
+            if classifier.is_target(resource["resource_type"], resource["file_name"]):
+                resource["group_path"] = group_path
+                resources.append(resource)
+
+        if not url:
+            label = next((node[key].strip() for key in GROUP_KEYS
+                          if isinstance(node.get(key), str) and node[key].strip()), None)
+            if label:
+                group_path = group_path + [label]
+
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                visit(value, group_path)
+
+    visit(payload, [])
+    return resources
+
+
+def _build_resource(node: Dict, url: str) -> Dict:
+    """根据资源对象构建资源信息"""
+    url_name = unquote(urlparse(url).path).rsplit("/", 1)[-1]
+    extension = "." + url_name.rsplit(".", 1)[-1].lower() if "." in url_name else ""
+
+    file_name = next((node[key].strip() for key in NAME_KEYS
+                      if isinstance(node.get(key), str) and node[key].strip()), url_name)
+    if extension and not file_name.lower().endswith(extension):
+        file_name += extension
+
+    size = None
+    for key in SIZE_KEYS:
+        try:
+            size = int(node[key])
+            break
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    return {
+        "url": url,
+        "file_name": file_name,
+        "size": size,
+        "resource_type": classifier.resource_type(file_name),
+    }
+
+
+class NetworkResourceSniffer:
+    """页面响应嗅探器（按课时/Tab归类捕获到的资源）"""
+
+    def __init__(self):
+        self.page: Optional[Page] = None
+        self._lock = threading.Lock()
+
+        # 当前课时范围
+        self.lesson_info: Optional[Dict] = None
+        self.download_dir: Optional[Path] = None
+        self.download_manager = None
+        self.tab_path: List[str] = ["网络捕获"]
+        self.captured: List[Dict] = []
+        self.futures: List[Future] = []
+        self._seen_urls = set()
+
+        # 统计信息
+        self.response_count = 0
+        self.resource_count = 0
+
+    def attach(self, page: Page):
+        """开始监听页面响应"""
+        self.page = page
+        page.on("response", self._on_response)
+        logger.debug("网络响应嗅探已启用")
+
+    def detach(self):
+        """停止监听"""
+        if self.page:
+            self.page.remove_listener("response", self._on_response)
+            self.page = None
+
+    def begin_lesson(self, lesson_info: Dict, download_dir: Path, download_manager=None):
+        """
+        开始捕获一个课时的资源
+
+        Args:
+            download_manager: 已启动的下载管理器，捕获到的资源立即作为HTTP任务提交；为None时只记录
+        """
+        with self._lock:
+            self.lesson_info = lesson_info
+            self.download_dir = download_dir
+            self.download_manager = download_manager
+            self.tab_path = ["网络捕获"]
+            self.captured = []
+            self.futures = []
+            self._seen_urls = set()
+
+    def set_tab(self, tab_path: List[str]):
+        """记录当前激活的Tab，之后捕获的资源归入该Tab"""
+        with self._lock:
+            self.tab_path = list(tab_path)
+
+    def end_lesson(self) -> List[Dict]:
+        """结束当前课时的捕获，返回捕获到的资源"""
+        with self._lock:
+            captured = self.captured
+            self.lesson_info = None
+            self.download_manager = None
+        return captured
+
+    def captured_names(self) -> set:
+        """当前课时已捕获资源的文件名（小写），用于跳过DOM中重复的资源"""
+        with self._lock:
+            return {resource["file_name"].lower() for resource in self.captured}
+
+    def _on_response(self, response: Response):
+        """响应回调：解析JSON响应中的资源"""
+        if self.lesson_info is None:
+            return
+
+        try:
+            if response.request.resource_type not in ("xhr", "fetch") or response.status != 200:
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            payload = response.json()
+        except Exception:
+            return
+
+        self.response_count += 1
+        resources = extract_resources_from_json(payload)
+        if resources:
+            self._submit(resources, response.url)
+
+    def _submit(self, resources: List[Dict], source_url: str):
+        """记录捕获到的资源，并提交到下载管理器"""
+        with self._lock:
+            new_resources = []
+            for resource in resources:
+                key = _object_key(resource["url"])
+                if key in self._seen_urls:
+                    continue
+                self._seen_urls.add(key)
+
+                resource.update({
+                    "resource_name": resource["file_name"],
+                    "download_method": "http",
+                    "tab_path": self.tab_path.copy(),
+                    "lesson_info": self.lesson_info,
+                    "destination_dir": self.download_dir,
+                    "expected_size": resource.pop("size"),
+                    "source": "network",
+                })
+                new_resources.append(resource)
+
+            self.captured.extend(new_resources)
+            self.resource_count += len(new_resources)
+            manager = self.download_manager
+
+        if not new_resources:
+            return
+
+        logger.info(f"从网络响应捕获 {len(new_resources)} 个资源: {urlparse(source_url).path}")
+        if manager:
+            futures = manager.add_batch_tasks(new_resources)
+            with self._lock:
+                self.futures.extend(futures)
+
+    def get_stats(self) -> Dict:
+        """获取嗅探统计"""
+        return {
+            "json_responses": self.response_count,
+            "resources": self.resource_count,
+        }
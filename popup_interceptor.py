@@ -0,0 +1,236 @@
+# popup_interceptor.py
+"""
+预览弹窗拦截
+点击预览按钮前在浏览器上下文上挂载路由：弹出页的第一个导航请求URL中带有PDF链接时直接读取并中止加载，
+不再等待预览页（PDF阅读器）加载完成。点击后新打开的页面无论成功与否都会关闭，关闭失败的计入泄漏数
+"""
+import re
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs, unquote
+from logger import logger
+
+# 路由匹配所有请求，由处理函数判断是否是弹出页的导航请求
+ROUTE_PATTERN = "**/*"
+
+
+def extract_pdf_url_from_preview(page_url: str) -> Optional[str]:
+    """
+    从预览页面URL中提取真实的PDF链接
+
+    Args:
+        page_url: 预览页面URL
+
+    Returns:
+        真实的PDF链接，如果提取失败则返回None
+    """
+    try:
+        # 解析URL
+        parsed = urlparse(page_url)
+
+        # 方法1: 从查询参数中提取双重编码的URL
+        query_params = parse_qs(parsed.query)
+        if 'url' in query_params:
+            encoded_url = query_params['url'][0]
+            # 双重解码
+            pdf_url = unquote(unquote(encoded_url))
+            if pdf_url.startswith('https://') and '.pdf' in pdf_url.lower():
+                return pdf_url
+
+        # 方法2: 从URL片段中提取
+        if parsed.fragment:
+            # 片段中可能包含查询参数
+            fragment_parts = parsed.fragment.split('?')
+            if len(fragment_parts) > 1:
+                fragment_params = parse_qs(fragment_parts[1])
+                if 'url' in fragment_params:
+                    encoded_url = fragment_params['url'][0]
+                    pdf_url = unquote(unquote(encoded_url))
+                    if pdf_url.startswith('https://') and '.pdf' in pdf_url.lower():
+                        return pdf_url
+
+        # 方法3: 正则匹配OSS链接
+        oss_pattern = r'(https://public-[a-zA-Z0-9-]+\.oss[^&"\']+\.pdf)'
+        matches = re.findall(oss_pattern, page_url)
+        if matches:
+            return unquote(unquote(matches[0]))
+
+        return None
+
+    except Exception as e:
+        logger.debug(f"提取PDF链接失败: {e}")
+        return None
+
+
+class PopupStats:
+    """弹出页统计（线程安全）"""
+
+    FIELDS = ("intercepted", "loaded", "closed", "leaked")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(self.FIELDS, 0)
+
+    def record(self, name: str):
+        """
+        计数一次
+
+        Args:
+            name: intercepted（在导航请求中取到链接并中止加载）/ loaded（请求中没有链接，等待页面加载后读取）/
+                  closed（已关闭）/ leaked（关闭失败）
+        """
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def log_summary(self):
+        """输出弹出页统计，有泄漏时给出警告"""
+        stats = self.get_stats()
+        if not stats["closed"] and not stats["leaked"]:
+            return
+        logger.info(f"预览弹出页: 请求阶段拦截 {stats['intercepted']} 个, 加载后读取 {stats['loaded']} 个, "
+                    f"已关闭 {stats['closed']} 个")
+        if stats["leaked"]:
+            logger.warning(f"有 {stats['leaked']} 个预览弹出页未能关闭")
+
+
+# 进程内共享的弹出页统计
+popup_stats = PopupStats()
+
+
+class _BasePopupInterceptor:
+    """
+    只在一次点击期间挂载路由（其余时间请求不经过这里），调用方需保证同一页面同一时间只有一次点击
+    """
+
+    def __init__(self, page, stats: PopupStats = popup_stats):
+        self.page = page
+        self.stats = stats
+
+    @staticmethod
+    def _is_popup_navigation(request, known_pages: List) -> bool:
+        """点击前不存在的页面（弹出页）的主框架导航请求"""
+        try:
+            frame = request.frame
+            return (request.is_navigation_request() and frame.parent_frame is None
+                    and not any(frame.page is page for page in known_pages))
+        except Exception:
+            # Service Worker 等请求没有所属框架
+            return False
+
+    def _should_abort(self, request, known_pages: List) -> bool:
+        """弹出页的导航请求中已经带有PDF链接，不需要再加载页面"""
+        return (self._is_popup_navigation(request, known_pages)
+                and extract_pdf_url_from_preview(request.url) is not None)
+
+    def _new_pages(self, known_pages: List) -> List:
+        return [page for page in self.page.context.pages
+                if not any(page is known for known in known_pages) and not page.is_closed()]
+
+    def _closed(self, page, error: Optional[Exception] = None):
+        if error is None and page.is_closed():
+            self.stats.record("closed")
+        else:
+            self.stats.record("leaked")
+            logger.warning(f"关闭预览弹出页失败: {error or page.url}")
+
+
+class PopupInterceptor(_BasePopupInterceptor):
+    """预览弹窗拦截（同步版）"""
+
+    def capture_url(self, click: Callable[[], None], timeout_ms: int) -> Optional[str]:
+        """
+        执行点击并从弹出页的导航请求中读取PDF链接
+
+        请求URL中没有链接时（例如链接在URL片段中，不会出现在请求里）退化为等待弹出页加载后读取页面地址
+
+        Raises:
+            playwright的TimeoutError: 点击后没有打开新页面
+        """
+        context = self.page.context
+        known_pages = list(context.pages)
+
+        def handle_route(route):
+            try:
+                if self._should_abort(route.request, known_pages):
+                    route.abort()
+                else:
+                    route.fallback()
+            except Exception as e:
+                # 弹出页已关闭时请求随之取消
+                logger.debug(f"处理弹出页请求失败: {e}")
+
+        context.route(ROUTE_PATTERN, handle_route)
+        try:
+            with context.expect_event(
+                    "request", predicate=lambda request: self._is_popup_navigation(request, known_pages),
+                    timeout=timeout_ms) as request_info:
+                click()
+            request = request_info.value
+            logger.debug(f"弹出页导航请求: {request.url}")
+
+            url = extract_pdf_url_from_preview(request.url)
+            if url:
+                self.stats.record("intercepted")
+                return url
+
+            self.stats.record("loaded")
+            popup = request.frame.page
+            popup.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+            return extract_pdf_url_from_preview(popup.url)
+        finally:
+            context.unroute(ROUTE_PATTERN, handle_route)
+            for popup in self._new_pages(known_pages):
+                try:
+                    popup.close()
+                    self._closed(popup)
+                except Exception as e:
+                    self._closed(popup, e)
+
+
+class AsyncPopupInterceptor(_BasePopupInterceptor):
+    """预览弹窗拦截（异步版，行为与 PopupInterceptor 一致）"""
+
+    async def capture_url(self, click: Callable[[], Awaitable[None]], timeout_ms: int) -> Optional[str]:
+        """执行点击并从弹出页的导航请求中读取PDF链接"""
+        context = self.page.context
+        known_pages = list(context.pages)
+
+        async def handle_route(route):
+            try:
+                if self._should_abort(route.request, known_pages):
+                    await route.abort()
+                else:
+                    await route.fallback()
+            except Exception as e:
+                logger.debug(f"处理弹出页请求失败: {e}")
+
+        await context.route(ROUTE_PATTERN, handle_route)
+        try:
+            async with context.expect_event(
+                    "request", predicate=lambda request: self._is_popup_navigation(request, known_pages),
+                    timeout=timeout_ms) as request_info:
+                await click()
+            request = await request_info.value
+            logger.debug(f"弹出页导航请求: {request.url}")
+
+            url = extract_pdf_url_from_preview(request.url)
+            if url:
+                self.stats.record("intercepted")
+                return url
+
+            self.stats.record("loaded")
+            popup = request.frame.page
+            await popup.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+            return extract_pdf_url_from_preview(popup.url)
+        finally:
+            await context.unroute(ROUTE_PATTERN, handle_route)
+            for popup in self._new_pages(known_pages):
+                try:
+                    await popup.close()
+                    self._closed(popup)
+                except Exception as e:
+                    self._closed(popup, e)
@@ -0,0 +1,183 @@
+# progress_journal.py
+"""
+进度日志
+以JSON Lines格式记录每个课时（开始/探索完成/完成/失败）和每个下载任务（入队/完成/跳过/失败及原因）的状态，
+程序中断后用 --resume 重放日志：跳过已完成的课时，未完成的HTTP任务直接重新入队而不必重新探索页面
+（链接的签名已过期时重新探索课时，获取新的链接）
+"""
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+from logger import logger
+from record_log import DownloadRecordLog, read_record_log
+
+JOURNAL_FILE_NAME = "progress_journal.jsonl"
+
+# 任务信息中需要持久化的字段（选择器等页面状态重启后无效，不记录）
+TASK_FIELDS = ["resource_type", "resource_name", "file_name", "download_method", "url", "expected_size",
+               "tab_path", "lesson_info", "destination_dir", "source"]
+
+FINAL_TASK_STATES = ("completed", "skipped")
+
+# 带有这些查询参数（不区分大小写）的链接是会过期的签名链接
+SIGNATURE_PARAMS = ("signature", "ossaccesskeyid", "x-oss-signature", "x-oss-credential", "x-amz-signature")
+# 签名在这么多秒内到期的链接按已过期处理（恢复后还要排队下载）
+SIGNATURE_EXPIRY_MARGIN = 300
+
+
+def signed_url_expired(url: str, now: Optional[float] = None) -> bool:
+    """
+    签名链接是否已过期（或即将过期）
+
+    OSS V1 签名用 Expires（Unix时间戳），V4 签名用 x-oss-date + x-oss-expires（秒）；
+    带签名参数但读不出有效期的链接按已过期处理，不带签名参数的链接不会过期
+    """
+    query = {key.lower(): values[0] for key, values in parse_qs(urlparse(url).query).items()}
+    if not any(param in query for param in SIGNATURE_PARAMS):
+        return False
+
+    try:
+        if "expires" in query:
+            expires_at = int(query["expires"])
+        else:
+            signed_at = datetime.strptime(query["x-oss-date"], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            expires_at = signed_at.timestamp() + int(query["x-oss-expires"])
+    except (KeyError, ValueError):
+        return True
+    return expires_at - SIGNATURE_EXPIRY_MARGIN <= (time.time() if now is None else now)
+
+
+def lesson_key(lesson_info: Dict) -> str:
+    """课时唯一键（课程 + 课时编码，缺失时用完整名称）"""
+    course = lesson_info.get("course_code") or lesson_info.get("course_name", "")
+    session = lesson_info.get("session_code") or lesson_info.get("full_name", "")
+    return f"{course}/{session}"
+
+
+class ProgressJournal:
+    """课时/任务进度日志"""
+
+    def __init__(self, journal_path: Path, resume: bool = False):
+        """
+        Args:
+            journal_path: 日志文件路径
+            resume: 是否重放已有日志；否则清空日志重新开始
+        """
+        self.journal_path = Path(journal_path)
+        self.writer = DownloadRecordLog()
+
+        # 重放得到的最新状态
+        self.lessons: Dict[str, Dict] = {}
+        self.tasks: Dict[str, Dict] = {}
+        self._tasks_by_lesson: Dict[str, List[Dict]] = {}
+
+        if resume and self.journal_path.exists():
+            self._replay()
+        elif self.journal_path.exists():
+            self.journal_path.unlink()
+
+    def _replay(self):
+        """按顺序重放日志，每个课时/任务只保留最后的状态"""
+        for record in read_record_log(self.journal_path):
+            if record.get("kind") == "lesson":
+                self.lessons[record["key"]] = record
+            elif record.get("kind") == "task":
+                previous = self.tasks.get(record["key"], {})
+                # 结束记录不重复保存任务信息，沿用入队时的记录
+                self.tasks[record["key"]] = {**previous, **record}
+
+        for task in self.tasks.values():
+            self._tasks_by_lesson.setdefault(task.get("lesson"), []).append(task)
+
+        done = sum(1 for record in self.lessons.values() if record["state"] == "done")
+        logger.info(f"已读取进度日志: {done}/{len(self.lessons)} 个课时已完成, "
+                    f"{len(self.pending_tasks())} 个下载任务待恢复")
+
+    def _append(self, record: Dict):
+        self.writer.append(self.journal_path, record)
+
+    def mark_lesson(self, lesson_info: Dict, state: str, **details):
+        """
+        记录课时状态
+
+        Args:
+            state: started / explored / done / failed
+            details: 附加信息（如 unresolved: 未能解析链接的资源数）
+        """
+        record = {"kind": "lesson", "key": lesson_key(lesson_info), "state": state, **details}
+        self.lessons[record["key"]] = record
+        self._append(record)
+
+    def lesson_state(self, lesson_info: Dict) -> Optional[str]:
+        """课时的最新状态，没有记录返回None"""
+        record = self.lessons.get(lesson_key(lesson_info))
+        return record["state"] if record else None
+
+    def needs_exploration(self, lesson_info: Dict) -> bool:
+        """
+        恢复时课时是否需要重新打开页面探索
+
+        已完成的课时不需要；已探索完成的课时如果所有资源都已解析出链接且签名未过期，
+        未完成的任务会从日志直接恢复，也不需要重新探索
+        """
+        return self._needs_exploration(lesson_key(lesson_info))
+
+    def _needs_exploration(self, key: str) -> bool:
+        record = self.lessons.get(key)
+        if record is None or record["state"] == "started":
+            return True
+        if record["state"] == "done":
+            return False
+        if record.get("unresolved"):
+            return True
+        # 没有链接或签名已过期的任务需要重新探索才能得到可用的链接
+        urls = [(task.get("task") or {}).get("url") for task in self._lesson_tasks(key)
+                if task["state"] not in FINAL_TASK_STATES]
+        return any(not url or signed_url_expired(url) for url in urls)
+
+    def task_enqueued(self, task):
+        """记录任务入队（DownloadTask）"""
+        task_info = {field: task.task_info[field] for field in TASK_FIELDS if field in task.task_info}
+        if task.url and "url" not in task_info:
+            task_info["url"] = task.url
+        self._append({"kind": "task", "key": task.resource_key, "state": "enqueued",
+                      "lesson": lesson_key(task.lesson_info or {}), "task": task_info})
+
+    def task_finished(self, task):
+        """记录任务结果（DownloadTask）"""
+        record = {"kind": "task", "key": task.resource_key, "state": task.status}
+        if task.status == "failed":
+            record["reason"] = task.error_message
+        if task.file_path:
+            record["file_path"] = str(task.file_path)
+        self._append(record)
+
+    def _lesson_tasks(self, key: str) -> List[Dict]:
+        return self._tasks_by_lesson.get(key, [])
+
+    def pending_tasks(self) -> List[Dict]:
+        """
+        需要重新入队的任务信息（入队后未结束或失败、带有链接、所属课时未完成且不需要重新探索）
+
+        需要重新探索的课时（包括链接签名已过期的课时），其任务会在探索时用新的链接重新生成，
+        这里不再恢复，避免同一资源同时下载两次
+        """
+        pending = []
+        for task in self.tasks.values():
+            task_info = task.get("task")
+            if task["state"] in FINAL_TASK_STATES or not task_info or not task_info.get("url"):
+                continue
+            if self._needs_exploration(task.get("lesson")) or self.lessons[task["lesson"]]["state"] == "done":
+                continue
+
+            task_info = dict(task_info)
+            if task_info.get("destination_dir"):
+                task_info["destination_dir"] = Path(task_info["destination_dir"])
+            pending.append(task_info)
+        return pending
+
+    def close(self):
+        """写完所有已提交的记录"""
+        self.writer.close()
@@ -0,0 +1,196 @@
+# record_log.py
+"""
+下载记录日志
+以JSON Lines格式追加写入下载记录，由单个写线程批量写入、按时间间隔fsync，
+并提供压缩/导出命令生成旧版 下载记录.json 数组
+"""
+import os
+import json
+import time
+import queue
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from logger import logger
+
+RECORD_LOG_NAME = "下载记录.jsonl"
+LEGACY_RECORD_NAME = "下载记录.json"
+
+
+class DownloadRecordLog:
+    """追加写入的下载记录日志（多线程提交，单线程写入）"""
+
+    def __init__(self, flush_interval: float = 1.0, batch_size: int = 200):
+        """
+        Args:
+            flush_interval: fsync间隔（秒）：每批记录写入后立即flush到系统缓冲区，
+                            距上次fsync超过该间隔才再次fsync，停止时fsync剩余部分
+            batch_size: 单批最多写入的记录数
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._queue: "queue.Queue[Optional[Tuple[Path, Dict]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written_count = 0
+
+    def append(self, log_path: Path, record: Dict):
+        """提交一条记录（立即返回，由写线程落盘）"""
+        self._ensure_writer()
+        self._queue.put((Path(log_path), record))
+
+    def close(self):
+        """写完所有已提交的记录并停止写线程"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+        if thread:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_writer(self):
+        """按需启动写线程"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer_loop,
+                                                name="RecordLogWriter", daemon=True)
+                self._thread.start()
+
+    def _writer_loop(self):
+        """写线程：批量写入，按间隔fsync"""
+        handles = {}
+        dirty = set()  # 写入后尚未fsync的文件
+        last_sync = time.monotonic()
+
+        try:
+            while True:
+                if dirty and time.monotonic() - last_sync >= self.flush_interval:
+                    self._sync(dirty, handles)
+                    last_sync = time.monotonic()
+
+                # 有未fsync的数据时最多等到下一次fsync的时间点
+                timeout = max(0.0, last_sync + self.flush_interval - time.monotonic()) if dirty else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+
+                # 一次取出队列中已积累的记录
+                batch = []
+                stopping = False
+                while True:
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    dirty |= self._write_batch(batch, handles)
+                if stopping:
+                    break
+        finally:
+            self._sync(dirty, handles)
+            for f in handles.values():
+                f.close()
+
+    def _write_batch(self, batch: List[Tuple[Path, Dict]], handles: Dict) -> set:
+        """写入一批记录并flush，返回写入过的文件"""
+        touched = set()
+
+        for log_path, record in batch:
+            try:
+                f = handles.get(log_path)
+                if f is None:
+                    log_path.parent.mkdir(parents=True, exist_ok=True)
+                    f = handles[log_path] = open(log_path, 'a', encoding='utf-8')
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                touched.add(log_path)
+                self.written_count += 1
+            except Exception as e:
+                logger.debug(f"写入下载记录失败: {log_path} - {e}")
+
+        for log_path in touched:
+            try:
+                handles[log_path].flush()
+            except Exception as e:
+                logger.debug(f"写入下载记录失败: {log_path} - {e}")
+        return touched
+
+    @staticmethod
+    def _sync(dirty: set, handles: Dict):
+        """fsync所有未同步的文件"""
+        for log_path in dirty:
+            try:
+                os.fsync(handles[log_path].fileno())
+            except Exception as e:
+                logger.debug(f"同步下载记录失败: {log_path} - {e}")
+        dirty.clear()
+
+
+def read_record_log(log_path: Path) -> List[Dict]:
+    """读取JSON Lines记录（跳过写入中断产生的不完整行）"""
+    records = []
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.debug(f"跳过不完整的记录行: {log_path}")
+    return records
+
+
+def compact_record_log(log_path: Path) -> Path:
+    """
+    把 下载记录.jsonl 合并进同目录的 下载记录.json 数组，然后清空jsonl
+
+    只应在没有下载任务运行时执行。
+    """
+    log_path = Path(log_path)
+    legacy_path = log_path.with_name(LEGACY_RECORD_NAME)
+
+    records = []
+    if legacy_path.exists():
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    records.extend(read_record_log(log_path))
+
+    # 先写临时文件再替换，避免中途失败损坏旧记录
+    tmp_path = legacy_path.with_name(legacy_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, legacy_path)
+
+    open(log_path, 'w').close()
+    return legacy_path
+
+
+def compact_all(base_dir: Path) -> int:
+    """压缩目录下所有下载记录日志，返回处理的文件数"""
+    count = 0
+    for log_path in sorted(Path(base_dir).rglob(RECORD_LOG_NAME)):
+        legacy_path = compact_record_log(log_path)
+        logger.info(f"已导出: {legacy_path}")
+        count += 1
+    return count
+
+
+if __name__ == '__main__':
+    import sys
+    from config import Config
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        base_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else Config.DOWNLOAD_BASE_DIR
+        logger.success(f"共导出 {compact_all(base_dir)} 个下载记录文件")
+    else:
+        logger.info("用法: python record_log.py export [下载目录]")
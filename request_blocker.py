@@ -0,0 +1,148 @@
+# request_blocker.py
+"""
+请求拦截
+在浏览器上下文上挂载路由，按请求类型和域名的允许/拦截名单中止发现资源用不到的请求（课程封面、图标、字体、
+视频封面、第三方统计脚本），并按上下文统计拦截的请求数和估算节省的流量，课时结束时取出作为该课时的统计
+"""
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+from config import (BLOCK_REQUESTS, BLOCK_RESOURCE_TYPES, BLOCK_HOSTS, ALLOW_RESOURCE_TYPES, ALLOW_HOSTS,
+                    BLOCK_ESTIMATED_BYTES, BLOCK_ESTIMATED_BYTES_DEFAULT)
+from logger import logger
+
+ROUTE_PATTERN = "**/*"
+
+
+def resolve_block_requests(block_requests: Optional[bool], headless: bool) -> bool:
+    """是否拦截请求：未指定时按配置开关，只在无头运行时开启（显示浏览器时通常是在调试页面）"""
+    if block_requests is None:
+        return BLOCK_REQUESTS and headless
+    return block_requests
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    """域名本身或其子域名在名单中"""
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class BlockProfile:
+    """拦截规则：允许名单优先，其次按请求类型或域名拦截"""
+
+    def __init__(self,
+                 block_types: Iterable[str] = BLOCK_RESOURCE_TYPES,
+                 block_hosts: Iterable[str] = BLOCK_HOSTS,
+                 allow_types: Iterable[str] = ALLOW_RESOURCE_TYPES,
+                 allow_hosts: Iterable[str] = ALLOW_HOSTS):
+        self.block_types = frozenset(block_types)
+        self.block_hosts = tuple(block_hosts)
+        self.allow_types = frozenset(allow_types)
+        self.allow_hosts = tuple(allow_hosts)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.allow_types:
+            return False
+        host = (urlparse(url).hostname or "").lower()
+        if _host_matches(host, self.allow_hosts):
+            return False
+        return resource_type in self.block_types or _host_matches(host, self.block_hosts)
+
+
+class BlockStats:
+    """拦截统计（按上下文计数，线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict] = {}  # 上下文 -> 上次取出后的计数
+        self._total = self._empty()
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {"requests": 0, "bytes": 0, "by_type": {}}
+
+    def record(self, key: int, resource_type: str):
+        size = BLOCK_ESTIMATED_BYTES.get(resource_type, BLOCK_ESTIMATED_BYTES_DEFAULT)
+        with self._lock:
+            for stats in (self._pending.setdefault(key, self._empty()), self._total):
+                stats["requests"] += 1
+                stats["bytes"] += size
+                stats["by_type"][resource_type] = stats["by_type"].get(resource_type, 0) + 1
+
+    def take(self, key: int) -> Dict:
+        """取出并清零某个上下文的计数 {requests, bytes（估算）, by_type}"""
+        with self._lock:
+            return self._pending.pop(key, None) or self._empty()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self._total, "by_type": dict(self._total["by_type"])}
+
+
+def format_block_stats(stats: Dict) -> str:
+    """拦截统计的简短描述"""
+    by_type = ", ".join(f"{name} {count}" for name, count in
+                        sorted(stats["by_type"].items(), key=lambda pair: -pair[1]))
+    return f"拦截 {stats['requests']} 个请求（{by_type}），约节省 {stats['bytes'] / 1024 / 1024:.1f} MB"
+
+
+class _BaseRequestBlocker:
+    """同一个拦截器可以挂载到多个上下文，计数按上下文分开"""
+
+    def __init__(self, profile: Optional[BlockProfile] = None):
+        self.profile = profile or BlockProfile()
+        self.stats = BlockStats()
+
+    def _should_block(self, key: int, route) -> bool:
+        request = route.request
+        if not self.profile.should_block(request.resource_type, request.url):
+            return False
+        self.stats.record(key, request.resource_type)
+        return True
+
+    def take_lesson_stats(self, context) -> Dict:
+        """取出上下文自上次取出后的拦截计数（课时结束时调用，即该课时的统计）"""
+        return self.stats.take(id(context))
+
+    def log_summary(self):
+        """输出累计的拦截统计"""
+        stats = self.stats.get_stats()
+        if stats["requests"]:
+            logger.info(f"请求拦截: 共{format_block_stats(stats)}")
+
+
+class RequestBlocker(_BaseRequestBlocker):
+    """请求拦截（同步版）"""
+
+    def attach(self, context):
+        """在上下文上挂载拦截路由"""
+        key = id(context)
+
+        def handle_route(route):
+            try:
+                if self._should_block(key, route):
+                    route.abort("blockedbyclient")
+                else:
+                    route.fallback()
+            except Exception as e:
+                logger.debug(f"处理请求拦截失败: {e}")
+
+        context.route(ROUTE_PATTERN, handle_route)
+
+
+class AsyncRequestBlocker(_BaseRequestBlocker):
+    """请求拦截（异步版，行为与 RequestBlocker 一致）"""
+
+    async def attach(self, context):
+        """在上下文上挂载拦截路由"""
+        key = id(context)
+
+        async def handle_route(route):
+            try:
+                if self._should_block(key, route):
+                    await route.abort("blockedbyclient")
+                else:
+                    await route.fallback()
+            except Exception as e:
+                logger.debug(f"处理请求拦截失败: {e}")
+
+        await context.route(ROUTE_PATTERN, handle_route)
@@ -0,0 +1,215 @@
+# resource_classifier.py
+"""
+资源分类器
+扩展名、关键词、图标、类名等所有分类规则集中在一处，按规则表的优先级得出资源类型、下载方式、
+文件名和是否为目标资源（与原先各处逐条规则查找的结果一致），检测器、嗅探器和课时处理层共用一个实例
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+from config import SUPPORT_FILE_TYPES
+
+# ===================== 分类规则（列表顺序即优先级，同时命中多条时取排在前面的） =====================
+# 文件扩展名 -> 资源类型（在小写文本中查找）
+EXTENSION_TYPES = [
+    (".mp4", "video"),
+    (".mp3", "audio"),
+    (".pdf", "pdf"),
+    (".pptx", "ppt"),
+    (".ppt", "ppt"),
+    (".sb3", "sb3"),
+    (".zip", "zip"),
+    (".rar", "archive"),
+    (".doc", "document"),
+    (".docx", "document"),
+    (".xls", "spreadsheet"),
+    (".xlsx", "spreadsheet"),
+    (".jpg", "image"),
+    (".jpeg", "image"),
+    (".png", "image"),
+    (".gif", "image"),
+]
+
+# 关键词 -> 资源类型（元素文本区分大小写；上下文文本转小写后查找）
+KEYWORD_TYPES = [
+    ("视频", "video"),
+    ("课件", "ppt"),
+    ("PPT", "ppt"),
+    ("资料", "pdf"),
+    ("编程题", "pdf"),
+    ("程序", "zip"),
+    ("讲义", "pdf"),
+    ("教辅", "downloadable"),
+    ("备课", "pdf"),
+    ("项目文件", "sb3"),
+    ("预置代码", "sb3"),
+    # 按钮文本
+    ("预览", "preview"),
+    ("下载", "direct"),
+    ("查看", "preview"),
+    ("播放", "preview"),
+]
+
+# 图标文件名 -> 资源类型
+ICON_TYPES = [
+    ("video.png", "video"),
+    ("ppt.png", "ppt"),
+    ("sb3.png", "sb3"),
+    ("zip.png", "zip"),
+    ("pdf.png", "pdf"),
+    ("doc.png", "document"),
+    ("xls.png", "spreadsheet"),
+    ("jpg.png", "image"),
+    ("png.png", "image"),
+]
+
+# 类名含 item_ppt 时，文本（小写）中的关键词 -> 资源类型
+ITEM_PPT_CLASS = "item_ppt"
+ITEM_PPT_TYPES = [
+    ("pptx", "ppt"),
+    ("ppt", "ppt"),
+    ("pdf", "pdf"),
+    ("sb3", "sb3"),
+]
+
+# 需要下载的目标资源：类型、扩展名、关键词（只看元素文本的前 TARGET_TEXT_LIMIT 个字符）
+TARGET_TYPES = ["pdf", "ppt", "video", "sb3", "zip", "archive", "downloadable", "document", "spreadsheet"]
+TARGET_EXTENSIONS = [".pdf", ".pptx", ".ppt", ".mp4", ".sb3", ".zip", ".rar", ".doc", ".docx", ".xls", ".xlsx"]
+TARGET_KEYWORDS = ["下载", "讲义", "课件", "资料", "视频", "程序", "教辅", "备课"]
+TARGET_TEXT_LIMIT = 200
+
+# 类型未知时，含这些关键词或扩展名的元素仍视为可下载
+DOWNLOAD_KEYWORDS = ["下载", "导出", "保存", "获取"]
+DOWNLOADABLE_EXTENSIONS = [".mp4", ".pdf", ".pptx", ".ppt", ".sb3", ".zip", ".rar"]
+
+# 提取文件名时按资源类型查找的扩展名
+FILE_NAME_EXTENSIONS = {
+    "video": [".mp4", ".avi", ".mov", ".wmv"],
+    "ppt": [".pptx", ".ppt"],
+    "pdf": [".pdf"],
+    "sb3": [".sb3"],
+    "zip": [".zip", ".rar", ".7z"],
+    "document": [".doc", ".docx"],
+    "spreadsheet": [".xls", ".xlsx"],
+    "image": [".jpg", ".jpeg", ".png", ".gif"],
+}
+
+# 下载方式：预览按钮按资源类型区分；没有按钮文本时这些类型直接下载
+PREVIEW_METHODS = {"pdf": "preview_pdf", "video": "preview_video", "ppt": "preview_ppt", "sb3": "preview_sb3"}
+DIRECT_TYPES = ["zip", "archive", "downloadable"]
+
+UNSAFE_FILE_NAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def _ranked(rules: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """去掉重复的规则词（保留排在前面的）"""
+    return list({token: (token, value) for token, value in reversed(rules)}.values())[::-1]
+
+
+class ResourceClassifier:
+    """
+    资源分类器
+
+    规则表在初始化时整理成按优先级排列的 (规则词, 值) 列表（扩展名预先转小写），
+    分类时元素文本只转一次小写，每张规则表从前往后查找，命中即返回
+    """
+
+    def __init__(self):
+        self.extension_rules = [(ext.lower(), resource_type) for ext, resource_type in _ranked(EXTENSION_TYPES)]
+        self.keyword_rules = _ranked(KEYWORD_TYPES)
+        self.icon_rules = _ranked(ICON_TYPES)
+        self.item_ppt_rules = _ranked(ITEM_PPT_TYPES)
+        self.file_extension_rules = {resource_type: [ext.lower() for ext in extensions]
+                                     for resource_type, extensions in FILE_NAME_EXTENSIONS.items()}
+        self.target_types = frozenset(TARGET_TYPES)
+        self.target_extensions = [ext.lower() for ext in TARGET_EXTENSIONS]
+        self.downloadable_extensions = [ext.lower() for ext in DOWNLOADABLE_EXTENSIONS]
+
+        # 课时处理层按文件名后缀判断类型
+        self._file_type_pattern = re.compile(
+            r"\.(" + "|".join(sorted(map(re.escape, SUPPORT_FILE_TYPES), key=len, reverse=True)) + r")\Z")
+
+    # ===================== 分类 =====================
+    def resource_type(self, text: str, class_name: str = "", icon_src: Optional[str] = None,
+                      context: str = "", text_lower: Optional[str] = None) -> str:
+        """
+        识别资源类型
+
+        依次检查：元素文本中的扩展名 → 元素文本中的关键词 → 图标 → 上下文关键词 → item_ppt 类名
+        """
+        text_lower = text.lower() if text_lower is None else text_lower
+        for rules, haystack in ((self.extension_rules, text_lower), (self.keyword_rules, text),
+                                (self.icon_rules, icon_src), (self.keyword_rules, context.lower())):
+            if haystack:
+                for token, resource_type in rules:
+                    if token in haystack:
+                        return resource_type
+        if ITEM_PPT_CLASS in class_name:
+            return next((resource_type for token, resource_type in self.item_ppt_rules if token in text_lower),
+                        "unknown")
+        return "unknown"
+
+    @staticmethod
+    def download_method(text: str, resource_type: str) -> str:
+        """识别下载方式（下载按钮直接下载，预览按钮按类型区分，否则按类型猜测）"""
+        if "下载" in text:
+            return "direct"
+        if "预览" in text:
+            return PREVIEW_METHODS.get(resource_type, "preview")
+        return "direct" if resource_type in DIRECT_TYPES else "preview"
+
+    def file_name(self, text: str, resource_type: str) -> str:
+        """从元素文本中提取文件名（按规则顺序取第一个前面有内容的该类型扩展名，截到该扩展名）"""
+        text = text.strip()
+        text_lower = text.lower()
+        for ext in self.file_extension_rules.get(resource_type, ()):
+            if ext in text_lower:
+                name = text.split(ext, 1)[0]
+                if name:
+                    return UNSAFE_FILE_NAME_CHARS.sub('_', name + ext)
+        return UNSAFE_FILE_NAME_CHARS.sub('_', text)[:100]
+
+    def is_downloadable(self, text: str, text_lower: Optional[str] = None) -> bool:
+        """类型未知的元素是否仍可下载（含下载类关键词或可下载的扩展名）"""
+        text_lower = text.lower() if text_lower is None else text_lower
+        return (any(keyword in text for keyword in DOWNLOAD_KEYWORDS)
+                or any(ext in text_lower for ext in self.downloadable_extensions))
+
+    def is_target(self, resource_type: str, text: str) -> bool:
+        """是否是需要下载的目标资源（扩展名/关键词只看文本前 TARGET_TEXT_LIMIT 个字符）"""
+        if resource_type in self.target_types:
+            return True
+        text = text[:TARGET_TEXT_LIMIT]
+        text_lower = text.lower()
+        return (any(ext in text_lower for ext in self.target_extensions)
+                or any(keyword in text for keyword in TARGET_KEYWORDS))
+
+    def classify(self, text: str, class_name: str = "", icon_src: Optional[str] = None,
+                 context: str = "") -> Optional[Dict]:
+        """
+        分类单个元素
+
+        Returns:
+            {resource_type, download_method, file_name, is_target}，不是资源元素时返回None
+        """
+        text_lower = text.lower()
+        resource_type = self.resource_type(text, class_name, icon_src, context, text_lower)
+        if resource_type == "unknown" and not self.is_downloadable(text, text_lower):
+            return None
+
+        return {
+            "resource_type": resource_type,
+            "download_method": self.download_method(text, resource_type),
+            "file_name": self.file_name(text, resource_type),
+            "is_target": self.is_target(resource_type, text),
+        }
+
+    def file_type(self, file_name: str) -> str:
+        """按文件名后缀判断文件类型（SUPPORT_FILE_TYPES 之一），空文件名返回unknown，其他返回other"""
+        if not file_name:
+            return "unknown"
+        match = self._file_type_pattern.search(file_name.lower().strip())
+        return match.group(1) if match else "other"
+
+
+# 进程内共享的分类器（规则只编译一次）
+classifier = ResourceClassifier()
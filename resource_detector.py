@@ -3,105 +3,205 @@
 智能资源检测器
 根据Tab路径、元素特征和文件类型识别资源
 """
-import re
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from playwright.sync_api import Page, Locator
 from logger import logger
-from config import Config
+from wait_strategy import PageWaiter
+from resource_classifier import classifier
+
+# 检测时给每个候选元素打上的唯一标记，下载时按标记直接定位（代替按类名/文本猜测的选择器）
+RID_ATTRIBUTE = "data-st-rid"
+
+# 候选元素快照记录的页面端函数（整页快照和逐元素检测共用）
+_RECORD_HELPERS = """
+    const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const textOf = el => (el.textContent || '').toLowerCase();
+
+    const cssPath = el => {
+        const parts = [];
+        for (; el && el.nodeType === 1 && el !== document.body; el = el.parentElement) {
+            if (el.id) {
+                parts.unshift('#' + CSS.escape(el.id));
+                return parts.join(' > ');
+            }
+            let index = 1;
+            for (let sib = el.previousElementSibling; sib; sib = sib.previousElementSibling) {
+                if (sib.tagName === el.tagName) index++;
+            }
+            parts.unshift(`${el.tagName.toLowerCase()}:nth-of-type(${index})`);
+        }
+        return ['body', ...parts].join(' > ');
+    };
+
+    const iconOf = el => {
+        const img = el.querySelector('img') || (el.parentElement && el.parentElement.querySelector('img'));
+        return img ? img.getAttribute('src') : null;
+    };
+
+    const contextOf = el => {
+        const parentText = el.parentElement ? el.parentElement.innerText : '';
+        if (parentText && parentText.length > 10) return parentText;
+        const prevText = el.previousElementSibling ? el.previousElementSibling.innerText : '';
+        return prevText && prevText.length > 5 ? prevText : '';
+    };
+
+    const urlOf = el => {
+        for (const attr of ['data-url', 'href']) {
+            const url = el.getAttribute(attr);
+            if (url && /^https?:\\/\\//.test(url)) return url;
+        }
+        const link = el.querySelector("a[href^='http'], [data-url^='http']");
+        return link ? (link.getAttribute('data-url') || link.getAttribute('href')) : null;
+    };
+
+    // 祖先元素自身的文本节点包含“下载”/“预览”
+    const hasActionParent = el => {
+        for (let p = el.parentElement; p; p = p.parentElement) {
+            for (const node of p.childNodes) {
+                if (node.nodeType === 3 && /下载|预览/.test(node.textContent)) return true;
+            }
+        }
+        return false;
+    };
+
+    const recordOf = (el, rid) => ({
+        text: (el.innerText || '').trim(),
+        className: el.getAttribute('class') || '',
+        iconSrc: iconOf(el),
+        contextText: contextOf(el).slice(0, 500),
+        url: urlOf(el),
+        path: cssPath(el),
+        rid: rid,
+        hasParent: hasActionParent(el),
+    });
+"""
+
+# 单次遍历当前激活的Tab面板，一次性返回所有候选元素的快照（代替逐元素的locator往返）
+SNAPSHOT_SCRIPT = """
+({extensions, classes, buttonTexts, ridAttribute}) => {
+""" + _RECORD_HELPERS + """
+    // 最内层的可见Tab面板（二级Tab面板优先），没有面板时扫描整个页面
+    const panes = Array.from(document.querySelectorAll('.el-tab-pane'))
+        .filter(pane => visible(pane) && !Array.from(pane.querySelectorAll('.el-tab-pane')).some(visible));
+    const roots = panes.length ? panes : [document.body];
+
+    // 打标记（本次快照中重复的标记重新分配）
+    const seenRids = new Set();
+    const stamp = el => {
+        let rid = el.getAttribute(ridAttribute);
+        if (!rid || seenRids.has(rid)) {
+            window.__stRidSeq = (window.__stRidSeq || 0) + 1;
+            rid = 'r' + window.__stRidSeq;
+            el.setAttribute(ridAttribute, rid);
+        }
+        seenRids.add(rid);
+        return rid;
+    };
+
+    const records = [];
+    for (const root of roots) {
+        for (const el of root.querySelectorAll('*')) {
+            if (!visible(el)) continue;
+            const text = textOf(el);
+
+            // 包含扩展名的最内层元素（子元素都不包含该扩展名）
+            const isFile = extensions.some(ext => text.includes(ext) &&
+                !Array.from(el.children).some(child => textOf(child).includes(ext)));
+            const isSpecial = classes.some(cls => el.classList.contains(cls));
+            const isButton = el.matches('span.file_btn, button, a') &&
+                buttonTexts.some(label => text.includes(label));
+            if (!isFile && !isSpecial && !isButton) continue;
+
+            records.push(recordOf(el, stamp(el)));
+        }
+    }
+    return records;
+}
+"""
+
+# 逐元素检测：单个元素的快照记录（一次往返）。已有且在页面中唯一的标记沿用，
+# 否则（含框架复制出的重复标记）分配新标记
+ELEMENT_SCRIPT = """
+(el, ridAttribute) => {
+""" + _RECORD_HELPERS + """
+    let rid = el.getAttribute(ridAttribute);
+    if (!rid || document.querySelectorAll(`[${ridAttribute}="${rid}"]`).length !== 1) {
+        window.__stRidSeq = (window.__stRidSeq || 0) + 1;
+        rid = 'r' + window.__stRidSeq;
+        el.setAttribute(ridAttribute, rid);
+    }
+    return recordOf(el, rid);
+}
+"""
+
+
+def rid_selector(rid: str) -> str:
+    """标记对应的选择器"""
+    return f'[{RID_ATTRIBUTE}="{rid}"]'
 
 
 class ResourceDetector:
     """资源检测器"""
 
-    def __init__(self, page: Page):
+    def __init__(self, page: Page, detection_mode: str = "snapshot"):
+        """
+        Args:
+            page: 浏览器页面
+            detection_mode: "snapshot" 在页面内单次遍历DOM后由Python分类；
+                            "locator" 逐元素通过locator查询（旧方式，快照失败时也会回退到此方式）
+        """
         self.page = page
+        self.detection_mode = detection_mode
 
-        # 资源类型映射
-        self.resource_type_mapping = {
-            # 文件扩展名 -> 类型
-            ".mp4": "video",
-            ".mp3": "audio",
-            ".pdf": "pdf",
-            ".pptx": "ppt",
-            ".ppt": "ppt",
-            ".sb3": "sb3",
-            ".zip": "zip",
-            ".rar": "archive",
-            ".doc": "document",
-            ".docx": "document",
-            ".xls": "spreadsheet",
-            ".xlsx": "spreadsheet",
-            ".jpg": "image",
-            ".jpeg": "image",
-            ".png": "image",
-            ".gif": "image",
-
-            # 关键词 -> 类型
-            "视频": "video",
-            "课件": "ppt",
-            "PPT": "ppt",
-            "资料": "pdf",
-            "编程题": "pdf",
-            "程序": "zip",
-            "讲义": "pdf",
-            "教辅": "downloadable",
-            "备课": "pdf",
-            "项目文件": "sb3",
-            "预置代码": "sb3",
-
-            # 按钮文本 -> 下载方式
-            "预览": "preview",
-            "下载": "direct",
-            "查看": "preview",
-            "播放": "preview",
-        }
+        # 扫描范围：文件扩展名、特殊类名和操作按钮文本
+        self.scan_extensions = [".mp4", ".pptx", ".pdf", ".sb3", ".zip", ".rar",
+                                ".doc", ".docx", ".xls", ".xlsx", ".jpg", ".png"]
+        self.scan_classes = ["item_ppt", "resource_box", "tag_file", "video_item"]
+        self.button_texts = ["预览", "下载", "查看", "播放"]
 
-        # 图标映射
-        self.icon_mapping = {
-            "video.png": "video",
-            "ppt.png": "ppt",
-            "sb3.png": "sb3",
-            "zip.png": "zip",
-            "pdf.png": "pdf",
-            "doc.png": "document",
-            "xls.png": "spreadsheet",
-            "jpg.png": "image",
-            "png.png": "image",
-        }
-        self.target_resource_types = [
-            "pdf", "ppt", "video", "sb3", "zip", "archive",
-            "downloadable", "document", "spreadsheet"
-        ]
-
-        # 新增：需要检测的文件扩展名
-        self.target_extensions = [
-            ".pdf", ".pptx", ".ppt", ".mp4", ".sb3", ".zip",
-            ".rar", ".doc", ".docx", ".xls", ".xlsx"
-        ]
-    def _is_target_resource(self, resource_type: str, element_text: str) -> bool:
-        """判断是否是需要下载的目标资源"""
-        # 检查资源类型
-        if resource_type in self.target_resource_types:
-            return True
-
-        # 检查文本中是否包含目标扩展名
-        text_lower = element_text.lower()
-        for ext in self.target_extensions:
-            if ext in text_lower:
-                return True
-
-        # 检查是否包含特定关键词
-        target_keywords = ["下载", "讲义", "课件", "资料", "视频", "程序", "教辅", "备课"]
-        for keyword in target_keywords:
-            if keyword in element_text:
-                return True
-
-        return False
+        # 分类规则见 resource_classifier
+        self.classifier = classifier
 
     def detect_resources_in_tab(self, tab_path: List[str]) -> List[Dict]:
-        """在指定Tab中检测资源 - 优化版"""
+        """在指定Tab中检测资源"""
+        if self.detection_mode == "snapshot":
+            try:
+                records = self.page.evaluate(SNAPSHOT_SCRIPT, self._snapshot_args())
+                return self._classify_snapshot(records, tab_path)
+            except Exception as e:
+                logger.warning(f"DOM快照检测失败，回退到逐元素检测: {e}")
+
+        return self._detect_resources_by_locator(tab_path)
+
+    def _snapshot_args(self) -> Dict:
+        """快照脚本参数"""
+        return {
+            "extensions": self.scan_extensions,
+            "classes": self.scan_classes,
+            "buttonTexts": self.button_texts,
+            "ridAttribute": RID_ATTRIBUTE,
+        }
+
+    def _classify_snapshot(self, records: List[Dict], tab_path: List[str]) -> List[Dict]:
+        """对DOM快照中的候选记录逐条分类"""
+        resources = []
+        for record in records:
+            if not record.get("text"):
+                continue
+            result = self.classifier.classify(record["text"], record.get("className") or "",
+                                              record.get("iconSrc"), record.get("contextText") or "")
+            if result and result["is_target"]:
+                resources.append(self._record_info(record, result, tab_path))
+
+        resources = self._deduplicate_resources(resources)
+        logger.info(f"在Tab '{' > '.join(tab_path)}' 中检测到 {len(resources)} 个目标资源"
+                    f"（快照候选 {len(records)} 个）")
+        return resources
+
+    def _detect_resources_by_locator(self, tab_path: List[str]) -> List[Dict]:
+        """逐元素通过locator检测资源"""
         resources = []
 
         try:
@@ -117,10 +217,7 @@ class ResourceDetector:
             for element in all_elements:
                 resource_info = self._analyze_element(element, tab_path)
                 if resource_info:
-                    # 过滤掉非目标资源
-                    if self._is_target_resource(resource_info["resource_type"],
-                                                resource_info["element_text"]):
-                        resources.append(resource_info)
+                    resources.append(resource_info)
 
             # 去重
             resources = self._deduplicate_resources(resources)
@@ -137,10 +234,7 @@ class ResourceDetector:
         file_elements = []
 
         # 查找包含文件扩展名的元素
-        file_extensions = [".mp4", ".pptx", ".pdf", ".sb3", ".zip", ".rar",
-                           ".doc", ".docx", ".xls", ".xlsx", ".jpg", ".png"]
-
-        for ext in file_extensions:
+        for ext in self.scan_extensions:
             try:
                 elements = self.page.locator(f"*:has-text('{ext}')").all()
                 for elem in elements:
@@ -151,8 +245,7 @@ class ResourceDetector:
                 continue
 
         # 查找特定类名的元素
-        special_classes = ["item_ppt", "resource_box", "tag_file", "video_item"]
-        for cls in special_classes:
+        for cls in self.scan_classes:
             try:
                 elements = self.page.locator(f".{cls}").all()
                 file_elements.extend(elements)
@@ -166,8 +259,7 @@ class ResourceDetector:
         button_elements = []
 
         # 查找预览和下载按钮
-        button_texts = ["预览", "下载", "查看", "播放"]
-        for text in button_texts:
+        for text in self.button_texts:
             try:
                 elements = self.page.locator(f"span.file_btn:has-text('{text}'), "
                                              f"button:has-text('{text}'), "
@@ -179,251 +271,59 @@ class ResourceDetector:
         return button_elements
 
     def _analyze_element(self, element: Locator, tab_path: List[str]) -> Optional[Dict]:
-        """分析单个元素，提取资源信息"""
+        """分析单个元素（一次读取元素的快照记录并打标记），提取资源信息"""
         try:
-            # 获取元素文本
-            element_text = element.inner_text().strip()
-            if not element_text:
-                return None
-
-            # 获取元素选择器
-            selector = self._generate_selector(element)
-
-            # 获取元素类名
-            class_name = element.get_attribute("class") or ""
-
-            # 获取图标信息
-            icon_src = self._get_icon_src(element)
-
-            # 获取父元素上下文
-            context_text = self._get_context_text(element)
-
-            # 识别资源类型
-            resource_type = self._identify_resource_type(
-                element_text, class_name, icon_src, context_text
-            )
-
-            # 识别下载方式
-            download_method = self._identify_download_method(element_text, resource_type)
-
-            # 提取文件名
-            file_name = self._extract_file_name(element_text, resource_type)
-
-            # 如果不是有效的资源类型，跳过
-            if resource_type == "unknown" and not self._is_downloadable(element_text):
-                return None
-
-            # 构建资源信息
-            resource_info = {
-                "element_text": element_text[:200],
-                "selector": selector,
-                "class_name": class_name,
-                "resource_type": resource_type,
-                "download_method": download_method,
-                "file_name": file_name,
-                "tab_path": tab_path.copy(),  # 复制tab路径
-                "icon_src": icon_src,
-                "context_text": context_text[:100],
-                "full_info": {
-                    "tab_hierarchy": tab_path,
-                    "element_details": {
-                        "text": element_text,
-                        "class": class_name,
-                        "has_parent": self._has_parent_with_text(element, "下载") or
-                                      self._has_parent_with_text(element, "预览")
-                    }
-                }
-            }
-
-            return resource_info
-
+            return self._analyze_record(element.evaluate(ELEMENT_SCRIPT, RID_ATTRIBUTE), tab_path)
         except Exception as e:
             logger.debug(f"分析元素失败: {e}")
             return None
 
-    def _identify_resource_type(self, text: str, class_name: str,
-                                icon_src: str, context: str) -> str:
-        """识别资源类型"""
-        text_lower = text.lower()
-        context_lower = context.lower()
-
-        # 检查文件扩展名
-        for ext, rtype in self.resource_type_mapping.items():
-            if ext.startswith(".") and ext in text_lower:
-                return rtype
-
-        # 检查关键词
-        for keyword, rtype in self.resource_type_mapping.items():
-            if not keyword.startswith(".") and keyword in text:
-                return rtype
-
-        # 检查图标
-        if icon_src:
-            for icon_key, rtype in self.icon_mapping.items():
-                if icon_key in icon_src:
-                    return rtype
-
-        # 检查上下文
-        for keyword, rtype in self.resource_type_mapping.items():
-            if not keyword.startswith(".") and keyword in context_lower:
-                return rtype
-
-        # 检查类名
-        if "item_ppt" in class_name:
-            if "pptx" in text_lower or "ppt" in text_lower:
-                return "ppt"
-            elif "pdf" in text_lower:
-                return "pdf"
-            elif "sb3" in text_lower:
-                return "sb3"
-
-        return "unknown"
-
-    def _identify_download_method(self, text: str, resource_type: str) -> str:
-        """识别下载方式"""
-        text_lower = text.lower()
-
-        # 根据按钮文本判断
-        if "下载" in text:
-            return "direct"
-        elif "预览" in text:
-            # 预览按钮可能有多种处理方式
-            if resource_type == "pdf":
-                return "preview_pdf"  # PDF预览需要特殊处理
-            elif resource_type == "video":
-                return "preview_video"
-            elif resource_type == "ppt":
-                return "preview_ppt"
-            elif resource_type == "sb3":
-                return "preview_sb3"
-            else:
-                return "preview"
-        else:
-            # 根据资源类型猜测
-            if resource_type in ["zip", "archive", "downloadable"]:
-                return "direct"
-            else:
-                return "preview"
-
-    def _extract_file_name(self, text: str, resource_type: str) -> str:
-        """从元素文本中提取文件名"""
-        # 清理文本
-        text = text.strip()
-
-        # 尝试提取文件扩展名
-        file_extensions = {
-            "video": [".mp4", ".avi", ".mov", ".wmv"],
-            "ppt": [".pptx", ".ppt"],
-            "pdf": [".pdf"],
-            "sb3": [".sb3"],
-            "zip": [".zip", ".rar", ".7z"],
-            "document": [".doc", ".docx"],
-            "spreadsheet": [".xls", ".xlsx"],
-            "image": [".jpg", ".jpeg", ".png", ".gif"]
+    def _analyze_record(self, record: Dict, tab_path: List[str]) -> Optional[Dict]:
+        """对单个元素的快照记录分类并构建资源信息，非资源元素或非目标资源返回None"""
+        if not record["text"]:
+            return None
+        result = self.classifier.classify(record["text"], record["className"], record["iconSrc"],
+                                          record["contextText"])
+        if result is None or not result["is_target"]:
+            return None
+        return self._record_info(record, result, tab_path)
+
+    @staticmethod
+    def _record_info(record: Dict, result: Dict, tab_path: List[str]) -> Dict:
+        """由快照记录和分类结果构建资源信息（有标记时按标记定位，否则按CSS路径）"""
+        rid = record.get("rid")
+        return ResourceDetector._resource_info(
+            record["text"], rid_selector(rid) if rid else record["path"], record.get("className", ""),
+            record.get("iconSrc"), record.get("contextText", ""), record.get("url"),
+            record.get("hasParent", False), tab_path, result, rid)
+
+    @staticmethod
+    def _resource_info(element_text: str, selector: str, class_name: str, icon_src: Optional[str],
+                       context_text: str, resource_url: Optional[str], has_parent: bool,
+                       tab_path: List[str], result: Dict, rid: Optional[str] = None) -> Dict:
+        """由分类结果构建资源信息"""
+        return {
+            "element_text": element_text[:200],
+            "selector": selector,
+            "rid": rid,
+            "class_name": class_name,
+            "resource_type": result["resource_type"],
+            "download_method": result["download_method"],
+            "file_name": result["file_name"],
+            "tab_path": tab_path.copy(),  # 复制tab路径
+            "url": resource_url,
+            "icon_src": icon_src,
+            "context_text": context_text[:100],
+            "full_info": {
+                "tab_hierarchy": tab_path,
+                "element_details": {
+                    "text": element_text,
+                    "class": class_name,
+                    "has_parent": has_parent
+                }
+            }
         }
 
-        # 查找已知扩展名
-        if resource_type in file_extensions:
-            for ext in file_extensions[resource_type]:
-                if ext in text.lower():
-                    # 提取文件名部分
-                    parts = text.split(ext, 1)
-                    if parts[0]:
-                        filename = parts[0] + ext
-                        # 清理文件名
-                        filename = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', filename)
-                        return filename
-
-        # 如果没有找到扩展名，返回清理后的文本
-        safe_name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', text)
-        return safe_name[:100]
-
-    def _get_icon_src(self, element: Locator) -> Optional[str]:
-        """获取图标src"""
-        try:
-            # 查找元素内的img
-            img = element.locator("img").first
-            if img.count() > 0:
-                return img.get_attribute("src")
-
-            # 查找兄弟或父元素中的img
-            parent = element.locator("xpath=..")
-            img = parent.locator("img").first
-            if img.count() > 0:
-                return img.get_attribute("src")
-        except:
-            pass
-
-        return None
-
-    def _get_context_text(self, element: Locator) -> str:
-        """获取上下文文本（父元素或兄弟元素的文本）"""
-        try:
-            # 获取父元素的文本
-            parent = element.locator("xpath=..")
-            if parent.count() > 0:
-                parent_text = parent.inner_text()
-                if parent_text and len(parent_text) > 10:
-                    return parent_text
-
-            # 获取前一个兄弟元素的文本
-            prev_sibling = element.locator("xpath=preceding-sibling::*[1]")
-            if prev_sibling.count() > 0:
-                sibling_text = prev_sibling.inner_text()
-                if sibling_text and len(sibling_text) > 5:
-                    return sibling_text
-        except:
-            pass
-
-        return ""
-
-    def _generate_selector(self, element: Locator) -> str:
-        """生成元素选择器"""
-        try:
-            # 尝试使用类名
-            class_name = element.get_attribute("class")
-            if class_name:
-                classes = class_name.split()
-                for cls in classes:
-                    if cls and cls not in ["el-", "is-", "has-"] and len(cls) > 3:
-                        return f".{cls}"
-
-            # 尝试使用文本生成选择器
-            text = element.inner_text().strip()
-            if text and len(text) < 50:
-                # 清理文本用于选择器
-                clean_text = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '', text)
-                if clean_text:
-                    return f"text='{clean_text}'"
-        except:
-            pass
-
-        return ""
-
-    def _has_parent_with_text(self, element: Locator, text: str) -> bool:
-        """检查父元素是否包含特定文本"""
-        try:
-            parents = element.locator(f"xpath=ancestor::*[contains(text(), '{text}')]").all()
-            return len(parents) > 0
-        except:
-            return False
-
-    def _is_downloadable(self, text: str) -> bool:
-        """判断元素是否可下载"""
-        # 检查是否包含下载相关的关键词
-        download_keywords = ["下载", "导出", "保存", "获取"]
-        for keyword in download_keywords:
-            if keyword in text:
-                return True
-
-        # 检查是否包含文件扩展名
-        file_exts = [".mp4", ".pdf", ".pptx", ".ppt", ".sb3", ".zip", ".rar"]
-        for ext in file_exts:
-            if ext in text.lower():
-                return True
-
-        return False
-
     def _deduplicate_resources(self, resources: List[Dict]) -> List[Dict]:
         """去重资源列表"""
         seen = set()
@@ -439,8 +339,29 @@ class ResourceDetector:
                 seen.add(key)
                 unique_resources.append(resource)
 
+        # 同一Tab内文本相同的资源按出现顺序编号，标记失效后据此找回同一个资源
+        occurrences = {}
+        for resource in unique_resources:
+            text = resource.get("element_text", "")
+            resource["occurrence"] = occurrences.get(text, 0)
+            occurrences[text] = resource["occurrence"] + 1
+
         return unique_resources
 
+    def relocate(self, resource: Dict) -> Optional[Dict]:
+        """
+        标记失效（页面重新渲染）后重新检测资源所在的Tab，按文本和同名序号找回同一个资源
+
+        调用方需先切换到资源所在的Tab；找不到时返回None
+        """
+        return self._match_resource(resource, self.detect_resources_in_tab(resource.get("tab_path", [])))
+
+    @staticmethod
+    def _match_resource(resource: Dict, candidates: List[Dict]) -> Optional[Dict]:
+        return next((candidate for candidate in candidates
+                     if candidate["element_text"] == resource.get("element_text")
+                     and candidate["occurrence"] == resource.get("occurrence", 0)), None)
+
     def get_current_tab_hierarchy(self) -> List[str]:
         """
         获取当前Tab的层级路径
@@ -478,6 +399,15 @@ class TabExplorer:
     def __init__(self, page: Page):
         self.page = page
         self.detector = ResourceDetector(page)
+        self.waiter = PageWaiter(page)
+
+        # Tab切换监听（如网络嗅探器需要知道之后的响应属于哪个Tab）
+        self.tab_listeners: List[Callable[[List[str]], None]] = []
+
+    def _notify_tab(self, tab_path: List[str]):
+        """通知监听方即将激活的Tab"""
+        for listener in self.tab_listeners:
+            listener(tab_path)
 
     def explore_all_tabs(self) -> Dict[str, List[Dict]]:
         """
@@ -500,13 +430,12 @@ class TabExplorer:
                         continue
 
                     logger.info(f"探索一级Tab: {primary_name}")
+                    self._notify_tab([primary_name])
 
                     # 点击激活Tab
                     if "is-active" not in (primary_tab.get_attribute("class") or ""):
                         primary_tab.click()
-                        self.page.wait_for_load_state("networkidle")
-                        import time
-                        time.sleep(Config.CLICK_WAIT)
+                        self.waiter.tab_ready(primary_tab)
 
                     # 探索当前一级Tab下的二级Tab
                     secondary_resources = self._explore_secondary_tabs(primary_name)
@@ -561,13 +490,12 @@ class TabExplorer:
                     tab_key = " > ".join(tab_path)
 
                     logger.info(f"探索二级Tab: {tab_key}")
+                    self._notify_tab(tab_path)
 
                     # 点击激活二级Tab
                     if "is-active" not in (secondary_tab.get_attribute("class") or ""):
                         secondary_tab.click()
-                        self.page.wait_for_load_state("networkidle")
-                        import time
-                        time.sleep(Config.CLICK_WAIT)
+                        self.waiter.tab_ready(secondary_tab)
 
                     # 检测资源
                     resources = self.detector.detect_resources_in_tab(tab_path)
@@ -116,7 +116,7 @@ def test_download_manager():
         time.sleep(5)
 
         # 创建下载管理器
-        download_manager = DownloadManager(browser.page, max_concurrent=1)
+        download_manager = DownloadManager(browser.page, max_concurrent=1, sniffer=browser.sniffer)
 
         try:
             # 启动下载管理器
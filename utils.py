@@ -1,12 +1,17 @@
 # utils.py
+import os
 import time
 import json
 import re
+import hashlib
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
 import requests
-from config import Config
+from config import Config, SESSION_RESOURCE_URL, API_MAX_WORKERS, API_REQUESTS_PER_SECOND
 from logger import logger
+from http_client import HttpSessionPool
 
 
 class FileUtils:
@@ -36,6 +41,38 @@ class FileUtils:
             logger.error(f"保存JSON文件失败: {file_path}", exc_info=True)
             return False
 
+    @staticmethod
+    def save_json_stream(items: Iterable[Any], file_path: Path, indent: int = 2) -> int:
+        """
+        边产出边写入JSON数组（格式与 save_json 一致）
+
+        先写入同目录的临时文件，全部写完后替换目标文件；中途失败（包括 items 抛出异常）时删除临时文件并重新抛出，
+        原文件保持不变。
+
+        Returns:
+            写入的元素数
+        """
+        file_path = Path(file_path)
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+        count = 0
+
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("[")
+                for item in items:
+                    f.write(",\n" if count else "\n")
+                    f.write(textwrap.indent(json.dumps(item, ensure_ascii=False, indent=indent), " " * indent))
+                    f.flush()
+                    count += 1
+                f.write("\n]" if count else "]")
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        os.replace(tmp_path, file_path)
+        logger.debug(f"数据已保存到: {file_path}")
+        return count
+
     @staticmethod
     def load_json(file_path: Path) -> Optional[Any]:
         """从JSON文件加载数据"""
@@ -52,6 +89,15 @@ class FileUtils:
             logger.error(f"加载JSON文件失败: {file_path}", exc_info=True)
             return None
 
+    @staticmethod
+    def hash_file(file_path: Path, algorithm: str = "md5", chunk_size: int = 1024 * 1024) -> str:
+        """计算文件哈希值"""
+        hasher = hashlib.new(algorithm)
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
     @staticmethod
     def create_lesson_folder(base_dir: Path, lesson_info: Dict) -> Path:
         """创建课时文件夹"""
@@ -86,76 +132,143 @@ class APIUtils:
     @staticmethod
     def get_all_courses(token: str) -> List[Dict]:
         """
-        获取所有课程（分页）
+        获取所有课程（分页，按页码顺序合并）
         注意：这个函数现在主要用于测试，实际应该使用本地保存的课程数据
-        """
-        logger.progress("通过API获取所有课程列表...")
 
-        api_session = requests.Session()
-        api_session.headers.update(Config.get_api_headers(token))
+        Raises:
+            RuntimeError: 有页面获取失败（见 iter_courses）
+        """
+        all_courses = list(APIUtils.iter_courses(token))
+        logger.success(f"已获取全部 {len(all_courses)} 门课程")
+        return all_courses
 
-        all_courses = []
-        page_num = 0
+    @staticmethod
+    def iter_courses(token: str,
+                     max_workers: int = API_MAX_WORKERS,
+                     requests_per_second: float = API_REQUESTS_PER_SECOND) -> Iterator[Dict]:
+        """
+        逐页产出课程
 
-        while True:
-            logger.progress(f"请求第 {page_num + 1} 页课程数据...")
-
-            payload = {
-                "campusIdList": Config.CAMPUS_ID_LIST,
-                "platform": "OMO_WEB",
-                "pageSize": Config.PAGE_SIZE,
-                "pageNum": page_num,
-                "total": 0,
-                "seartchType": True
-            }
+        第一页返回总数后计算页数，其余页在线程池中并发请求（受全局限速约束），
+        仍按页码顺序产出，调用方可以在最后一页到达前开始处理。
+        第一页获取失败时不产出任何课程。
 
-            time.sleep(Config.API_REQUEST_DELAY)
+        Raises:
+            RuntimeError: 第一页之后的某一页获取失败（已产出的课程不完整，调用方不应保存或据此判断删除）
+        """
+        logger.progress("通过API获取所有课程列表...")
 
-            try:
-                response = api_session.post(
-                    Config.COURSE_LIST_URL,
-                    json=payload,
-                    timeout=Config.REQUEST_TIMEOUT
-                )
+        session = HttpSessionPool(
+            pool_size=max_workers,
+            headers=Config.get_api_headers(token),
+            requests_per_second=requests_per_second
+        )
 
-                if response.status_code != 200:
-                    logger.error(f"请求第 {page_num + 1} 页失败，状态码: {response.status_code}")
-                    break
+        try:
+            first_page = APIUtils._fetch_course_page(session, 0)
+            if not first_page:
+                return
+
+            records, total = first_page
+            logger.progress(f"第 1 页获取 {len(records)} 门课程", total=f"{len(records)}/{total}")
+            yield from records
+
+            page_count = -(-total // Config.PAGE_SIZE) if total else 1
+            if page_count <= 1:
+                return
+
+            logger.progress(f"共 {total} 门课程，并发请求剩余 {page_count - 1} 页...")
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="CoursePage") as executor:
+                futures = [executor.submit(APIUtils._fetch_course_page, session, page_num)
+                           for page_num in range(1, page_count)]
+
+                fetched = len(records)
+                try:
+                    for page_num, future in enumerate(futures, 1):
+                        page = future.result()
+                        if not page:
+                            raise RuntimeError(f"第 {page_num + 1} 页获取失败，课程列表不完整")
+
+                        records = page[0]
+                        fetched += len(records)
+                        logger.progress(f"第 {page_num + 1} 页获取 {len(records)} 门课程",
+                                        total=f"{fetched}/{total}")
+                        yield from records
+                finally:
+                    # 调用方提前停止时取消尚未开始的页面请求
+                    for future in futures:
+                        future.cancel()
+        finally:
+            session.close()
 
-                data = response.json()
+    @staticmethod
+    def _fetch_course_page(session: HttpSessionPool, page_num: int) -> Optional[Tuple[List[Dict], int]]:
+        """请求一页课程，返回 (课程列表, 课程总数)，失败返回None"""
+        payload = {
+            "campusIdList": Config.CAMPUS_ID_LIST,
+            "platform": "OMO_WEB",
+            "pageSize": Config.PAGE_SIZE,
+            "pageNum": page_num,
+            "total": 0,
+            "seartchType": True
+        }
 
-                if data.get("code") != 0:
-                    logger.warning(f"API返回非成功状态: {data.get('msg')}")
-                    break
+        try:
+            response = session.post(
+                Config.COURSE_LIST_URL,
+                json=payload,
+                timeout=Config.REQUEST_TIMEOUT
+            )
 
-                records = data.get("data", {}).get("list", [])
-                total = data.get("data", {}).get("total", 0)
+            if response.status_code != 200:
+                logger.error(f"请求第 {page_num + 1} 页失败，状态码: {response.status_code}")
+                return None
 
-                if not records:
-                    logger.info("无更多课程数据，结束分页拉取")
-                    break
+            data = response.json()
 
-                all_courses.extend(records)
-                logger.progress(
-                    f"第 {page_num + 1} 页获取 {len(records)} 门课程",
-                    total=f"{len(all_courses)}/{total}"
-                )
+            if data.get("code") != 0:
+                logger.warning(f"API返回非成功状态: {data.get('msg')}")
+                return None
 
-                if len(all_courses) >= total:
-                    logger.success(f"已获取全部 {total} 门课程")
-                    break
+            page_data = data.get("data", {})
+            return page_data.get("list", []), page_data.get("total", 0)
 
-                page_num += 1
+        except Exception as e:
+            logger.error(f"获取课程数据异常: {e}", exc_info=True)
+            return None
 
-            except Exception as e:
-                logger.error(f"获取课程数据异常: {e}", exc_info=True)
-                break
+    @staticmethod
+    def validate_token(token: str) -> bool:
+        """用一次最小的课程列表请求检查Token是否仍被服务器接受"""
+        payload = {
+            "campusIdList": Config.CAMPUS_ID_LIST,
+            "platform": "OMO_WEB",
+            "pageSize": 1,
+            "pageNum": 0,
+            "total": 0,
+            "seartchType": True
+        }
 
-        return all_courses
+        try:
+            response = requests.post(
+                Config.COURSE_LIST_URL,
+                json=payload,
+                headers=Config.get_api_headers(token),
+                timeout=Config.REQUEST_TIMEOUT
+            )
+            return response.status_code == 200 and response.json().get("code") == 0
+        except Exception as e:
+            logger.debug(f"Token校验请求失败: {e}")
+            return False
 
     @staticmethod
-    def fetch_course_units(course_code: str, token: str) -> List[Dict]:
-        """获取课程下的所有单元"""
+    def fetch_course_units(course_code: str, token: str, session=None) -> Optional[List[Dict]]:
+        """
+        获取课程下的所有单元（可传入共享的会话以复用连接）
+
+        Returns:
+            单元列表，请求失败时返回None（与没有单元的课程区分）
+        """
         logger.debug(f"获取课程单元，课程编码: {course_code}")
 
         headers = Config.get_api_headers(token)
@@ -166,7 +279,7 @@ class APIUtils:
         }
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 Config.UNIT_LIST_URL,
                 json=payload,
                 headers=headers,
@@ -175,7 +288,7 @@ class APIUtils:
 
             if response.status_code != 200:
                 logger.error(f"获取单元失败，状态码: {response.status_code}")
-                return []
+                return None
 
             data = response.json()
 
@@ -186,19 +299,24 @@ class APIUtils:
                     logger.success(f"获取到 {len(units)} 个单元")
                     return units
                 else:
-                    logger.warning("未找到courseUnit字段")
-                    return []
+                    logger.error("获取单元失败: 未找到courseUnit字段")
+                    return None
             else:
                 logger.error(f"获取单元失败: {data.get('msg')}")
-                return []
+                return None
 
         except Exception as e:
             logger.error(f"请求单元接口失败: {e}", exc_info=True)
-            return []
+            return None
 
     @staticmethod
-    def fetch_unit_sessions(course_code: str, unit_code: str, token: str) -> List[Dict]:
-        """获取指定单元下的所有课时"""
+    def fetch_unit_sessions(course_code: str, unit_code: str, token: str, session=None) -> Optional[List[Dict]]:
+        """
+        获取指定单元下的所有课时（可传入共享的会话以复用连接）
+
+        Returns:
+            课时列表，请求失败时返回None
+        """
         logger.debug(f"获取单元课时，课程编码: {course_code}, 单元编码: {unit_code}")
 
         headers = Config.get_api_headers(token)
@@ -210,7 +328,7 @@ class APIUtils:
         }
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 Config.SESSION_LIST_URL,
                 json=payload,
                 headers=headers,
@@ -219,57 +337,172 @@ class APIUtils:
 
             if response.status_code != 200:
                 logger.error(f"获取课时失败，状态码: {response.status_code}")
-                return []
+                return None
 
             data = response.json()
 
             if data.get("code") == 0:
-                sessions = data.get("data", [])
+                sessions = data.get("data") or []
                 logger.success(f"获取到 {len(sessions)} 个课时")
                 return sessions
             else:
                 logger.error(f"获取课时失败: {data.get('msg')}")
-                return []
+                return None
 
         except Exception as e:
             logger.error(f"请求课时接口失败: {e}", exc_info=True)
-            return []
+            return None
+
+    @staticmethod
+    def fetch_session_resources(course_code: str, unit_code: str, session_code: str, token: str,
+                                session=None) -> Optional[List[Dict]]:
+        """
+        获取课时下的所有资源（各Tab的文件名、大小和下载链接），不需要打开课时页面
+
+        Returns:
+            extract_resources_from_json 格式的资源列表，请求失败时返回None（与没有资源的空列表区分）
+        """
+        from network_sniffer import extract_resources_from_json
+
+        logger.debug(f"获取课时资源，课时编码: {session_code}")
+
+        if not SESSION_RESOURCE_URL:
+            logger.error("未配置课时资源接口 SESSION_RESOURCE_URL")
+            return None
+
+        headers = Config.get_api_headers(token)
+        payload = {
+            "campusIdList": Config.CAMPUS_ID_LIST,
+            "platform": "OMO_WEB",
+            "courseCode": course_code,
+            "courseUnitCode": unit_code,
+            "sessionCode": session_code
+        }
+
+        try:
+            response = (session or requests).post(
+                SESSION_RESOURCE_URL,
+                json=payload,
+                headers=headers,
+                timeout=Config.REQUEST_TIMEOUT
+            )
+
+            if response.status_code != 200:
+                logger.error(f"获取课时资源失败，状态码: {response.status_code}")
+                return None
+
+            data = response.json()
+
+            if data.get("code") == 0:
+                resources = extract_resources_from_json(data.get("data"))
+                logger.debug(f"获取到 {len(resources)} 个资源")
+                return resources
+            else:
+                logger.error(f"获取课时资源失败: {data.get('msg')}")
+                return None
+
+        except Exception as e:
+            logger.error(f"请求课时资源接口失败: {e}", exc_info=True)
+            return None
+
+    @staticmethod
+    def build_lesson_entries(unit: Dict, sessions: List[Dict]) -> List[Dict]:
+        """把单元和课时接口数据转换为 lessons_info.json 格式"""
+        unit_code = APIUtils.unit_code_of(unit)
+        unit_name = unit.get("unitName") or unit.get("courseUnitName") or unit.get("name", "")
+
+        lessons = []
+        for index, session in enumerate(sessions, 1):
+            session_name = session.get("sessionName") or session.get("name", "")
+            lessons.append({
+                "unit_num": unit.get("unitNum") or unit_name,
+                "unit_code": unit_code,
+                "unit_name": unit_name,
+                "session_num": session.get("sessionNum") or session.get("sort") or index,
+                "session_code": session.get("sessionCode") or session.get("code"),
+                "session_name": session_name,
+                "full_name": f"{unit_name} - {session_name}"
+            })
+
+        return lessons
+
+    @staticmethod
+    def unit_code_of(unit: Dict) -> Optional[str]:
+        """单元记录中的单元编码"""
+        return unit.get("courseUnitCode") or unit.get("unitCode") or unit.get("code")
 
 
 class UserInputUtils:
     """用户输入工具类"""
 
     @staticmethod
-    def select_course(courses_data: List[Dict]) -> Optional[Dict]:
-        """让用户选择课程"""
-        if not courses_data:
-            logger.error("没有可用的课程数据")
-            return None
+    def select_course(courses_data: Optional[List[Dict]] = None, catalog=None) -> Optional[Dict]:
+        """
+        让用户选择课程
+
+        Args:
+            courses_data: 课程列表；为None时从课程目录索引中选择
+            catalog: 课程目录索引（CourseCatalog），为None时自动打开；
+                     使用索引时只列出前20门课程，其余课程通过名称/编码查找
+        """
+        if courses_data is None:
+            if catalog is None:
+                from course_catalog import open_catalog
+                catalog = open_catalog()
+            if catalog is None or not catalog.count():
+                logger.error("没有可用的课程数据")
+                return None
+            candidates = catalog.list_courses(limit=20)
+        else:
+            if not courses_data:
+                logger.error("没有可用的课程数据")
+                return None
+            candidates = courses_data
 
         logger.separator("课程选择")
         logger.info("请选择要处理的课程：")
 
-        for i, course in enumerate(courses_data, 1):
-            course_name = course.get("courseName", f"课程{i}")
-            course_id = course.get("id", "未知ID")
-            logger.info(f"  {i:2d}. {course_name} (ID: {course_id})")
-
+        show_candidates = True
         while True:
+            if show_candidates:
+                for i, course in enumerate(candidates, 1):
+                    course_name = course.get("courseName", f"课程{i}")
+                    course_id = course.get("id", "未知ID")
+                    logger.info(f"  {i:2d}. {course_name} (ID: {course_id})")
+                if catalog is not None and len(candidates) < catalog.count():
+                    logger.info(f"  ... 共 {catalog.count()} 门课程，可输入名称或编码查找")
+                show_candidates = False
+
             try:
-                choice = input('\n请输入课程编号 (1-{}): '.format(len(courses_data))).strip()
+                choice = input('\n请输入课程编号 (1-{}){}: '.format(
+                    len(candidates), "，或名称/编码" if catalog is not None else "")).strip()
 
                 if not choice:
                     logger.info("使用默认选择第一个课程")
                     selected_index = 0
+                elif catalog is not None and not (choice.isdigit() and int(choice) <= len(candidates)):
+                    matches = catalog.search(choice)
+                    if not matches:
+                        logger.warning(f"没有找到匹配的课程: {choice}")
+                        continue
+                    candidates = matches
+                    if len(matches) > 1:
+                        show_candidates = True
+                        logger.info(f"找到 {len(matches)} 门匹配的课程：")
+                        continue
+                    selected_index = 0
                 else:
                     selected_index = int(choice) - 1
 
-                if 0 <= selected_index < len(courses_data):
-                    selected_course = courses_data[selected_index]
+                if 0 <= selected_index < len(candidates):
+                    selected_course = candidates[selected_index]
+                    if catalog is not None:
+                        # 索引中只有摘要字段，选中后再读取完整记录
+                        selected_course = catalog.get_by_id(selected_course["id"]) or selected_course
                     logger.success(f"已选择课程: {selected_course.get('courseName')}")
                     return selected_course
                 else:
-                    logger.warning(f"请输入1到{len(courses_data)}之间的数字")
+                    logger.warning(f"请输入1到{len(candidates)}之间的数字")
 
             except ValueError:
                 logger.warning("请输入有效的数字")
@@ -78,5 +78,23 @@ except Exception as e:
     print(f"❌ 模块间依赖验证失败: {e}")
     sys.exit(1)
 
+# 5. 验证下载索引的资源键
+print("\n5. 验证同一Tab内同名资源的索引键...")
+try:
+    from download_index import DownloadIndex
+
+    first = {"file_name": "讲义.pdf", "element_text": "讲义.pdf 预览", "occurrence": 0,
+             "tab_path": ["课前预习", "资料"], "lesson_info": {"session_code": "S001"}}
+    same_text = dict(first, occurrence=1)
+    other_text = dict(first, element_text="讲义.pdf 下载")
+    keys = {DownloadIndex.resource_key(info) for info in (first, same_text, other_text)}
+    if len(keys) != 3:
+        raise AssertionError(f"同名资源共用了索引键: {keys}")
+    print("✅ 同名资源的索引键互不相同")
+
+except Exception as e:
+    print(f"❌ 下载索引键验证失败: {e}")
+    sys.exit(1)
+
 print("\n✅ 所有导入修复验证通过！")
 print("\n现在可以运行程序了。")
\ No newline at end of file
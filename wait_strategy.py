@@ -0,0 +1,233 @@
+# wait_strategy.py
+"""
+页面就绪等待
+用具体的就绪信号代替固定的 sleep：Element-UI 加载遮罩消失、目标Tab面板 aria-hidden=false、
+列表行数在一段时间内不再变化、指定的XHR完成，并记录每类等待实际花费的时间
+"""
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Union
+from playwright.sync_api import Locator
+from config import WAIT_TIMEOUT_MS, WAIT_STABLE_MS
+from logger import logger
+
+# 页面中没有可见的 Element-UI 加载遮罩（root 为空时检查整个页面）
+LOADING_GONE_SCRIPT = """
+(rootId) => {
+    const root = rootId ? document.getElementById(rootId) : document;
+    if (!root) return false;
+    return !Array.from(root.querySelectorAll('.el-loading-mask')).some(
+        mask => mask.getClientRects().length > 0 && getComputedStyle(mask).display !== 'none'
+                && getComputedStyle(mask).visibility !== 'hidden');
+}
+"""
+
+# Tab面板已显示且面板内没有加载遮罩
+TAB_PANE_READY_SCRIPT = """
+(paneId) => {
+    const pane = document.getElementById(paneId);
+    if (!pane || pane.getAttribute('aria-hidden') === 'true' || pane.getClientRects().length === 0) return false;
+    return !Array.from(pane.querySelectorAll('.el-loading-mask')).some(
+        mask => mask.getClientRects().length > 0 && getComputedStyle(mask).display !== 'none');
+}
+"""
+
+# 匹配元素数量在 stableMs 毫秒内没有变化（状态保存在 window 上，key 区分不同的等待）
+STABLE_COUNT_SCRIPT = """
+({selector, key, stableMs}) => {
+    const count = document.querySelectorAll(selector).length;
+    const states = window.__stableCountWaits = window.__stableCountWaits || {};
+    const now = performance.now();
+    const state = states[key];
+    if (!state || state.count !== count) {
+        states[key] = {count, since: now};
+        return false;
+    }
+    return now - state.since >= stableMs;
+}
+"""
+
+
+class WaitStats:
+    """各类等待的耗时统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def record(self, name: str, seconds: float, timed_out: bool = False):
+        """记录一次等待"""
+        with self._lock:
+            stats = self._stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["timeouts"] += int(timed_out)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """按等待类型返回 {count, total, avg, max, timeouts}（秒）"""
+        with self._lock:
+            return {name: {**stats, "total": round(stats["total"], 3), "max": round(stats["max"], 3),
+                           "avg": round(stats["total"] / stats["count"], 3)}
+                    for name, stats in self._stats.items()}
+
+    def log_summary(self):
+        """输出等待耗时汇总"""
+        stats = self.get_stats()
+        if not stats:
+            return
+        logger.info("页面等待耗时统计:")
+        for name, item in sorted(stats.items(), key=lambda pair: -pair[1]["total"]):
+            logger.info(f"  {name}: {item['count']}次, 共{item['total']:.1f}秒, "
+                        f"平均{item['avg']:.2f}秒, 最长{item['max']:.2f}秒, 超时{item['timeouts']}次")
+
+
+# 进程内共享的等待统计
+wait_stats = WaitStats()
+
+_key_lock = threading.Lock()
+_key_counter = 0
+
+
+def _next_key() -> str:
+    """为每次行数稳定等待生成唯一键"""
+    global _key_counter
+    with _key_lock:
+        _key_counter += 1
+        return f"w{_key_counter}"
+
+
+class _BaseWaiter:
+    """
+    等待超时不抛出异常，只记录超时并返回False，调用方按原流程继续（与原先的固定等待行为一致）
+    """
+
+    def __init__(self, page, timeout_ms: int = WAIT_TIMEOUT_MS, stats: WaitStats = wait_stats):
+        self.page = page
+        self.timeout_ms = timeout_ms
+        self.stats = stats
+
+    @contextmanager
+    def _timed(self, name: str):
+        """计时并记录，超时或失败时标记 timed_out"""
+        start = time.perf_counter()
+        result = {"ok": True}
+        try:
+            yield result
+        except Exception as e:
+            result["ok"] = False
+            logger.debug(f"等待 {name} 未完成: {e}")
+        finally:
+            self.stats.record(name, time.perf_counter() - start, timed_out=not result["ok"])
+
+
+class PageWaiter(_BaseWaiter):
+    """页面就绪等待（同步版）"""
+
+    def page_ready(self, timeout_ms: Optional[int] = None) -> bool:
+        """网络空闲且加载遮罩消失"""
+        timeout = timeout_ms or self.timeout_ms
+        with self._timed("page_ready") as result:
+            self.page.wait_for_load_state("networkidle", timeout=timeout)
+            self.page.wait_for_function(LOADING_GONE_SCRIPT, arg=None, timeout=timeout)
+        return result["ok"]
+
+    def loading_gone(self, timeout_ms: Optional[int] = None) -> bool:
+        """加载遮罩消失"""
+        with self._timed("loading_gone") as result:
+            self.page.wait_for_function(LOADING_GONE_SCRIPT, arg=None, timeout=timeout_ms or self.timeout_ms)
+        return result["ok"]
+
+    def tab_ready(self, tab: Locator, timeout_ms: Optional[int] = None) -> bool:
+        """
+        Tab激活后等待其面板显示（aria-hidden=false）且面板内没有加载遮罩
+
+        Tab没有 aria-controls 时退化为等待Tab带上 is-active 并且页面加载遮罩消失
+        """
+        timeout = timeout_ms or self.timeout_ms
+        with self._timed("tab_ready") as result:
+            pane_id = tab.get_attribute("aria-controls")
+            if pane_id:
+                self.page.wait_for_function(TAB_PANE_READY_SCRIPT, arg=pane_id, timeout=timeout)
+            else:
+                tab.and_(self.page.locator(".is-active")).wait_for(timeout=timeout)
+                self.page.wait_for_function(LOADING_GONE_SCRIPT, arg=None, timeout=timeout)
+        return result["ok"]
+
+    def stable_count(self, selector: str, stable_ms: int = WAIT_STABLE_MS,
+                     timeout_ms: Optional[int] = None) -> bool:
+        """等待匹配元素的数量在 stable_ms 内不再变化（列表渲染完成）"""
+        with self._timed("stable_count") as result:
+            self.page.wait_for_function(
+                STABLE_COUNT_SCRIPT, arg={"selector": selector, "key": _next_key(), "stableMs": stable_ms},
+                polling=100, timeout=timeout_ms or self.timeout_ms)
+        return result["ok"]
+
+    def visible(self, target: Union[str, Locator], timeout_ms: Optional[int] = None) -> bool:
+        """等待元素可见"""
+        locator = self.page.locator(target) if isinstance(target, str) else target
+        with self._timed("visible") as result:
+            locator.first.wait_for(state="visible", timeout=timeout_ms or self.timeout_ms)
+        return result["ok"]
+
+    def hidden(self, target: Union[str, Locator], timeout_ms: Optional[int] = None) -> bool:
+        """等待元素隐藏或移除"""
+        locator = self.page.locator(target) if isinstance(target, str) else target
+        with self._timed("hidden") as result:
+            locator.first.wait_for(state="hidden", timeout=timeout_ms or self.timeout_ms)
+        return result["ok"]
+
+    def response(self, action: Callable[[], None], url_part: str, timeout_ms: Optional[int] = None) -> bool:
+        """执行操作并等待URL包含 url_part 的XHR完成（操作本身失败同样返回False）"""
+        with self._timed("response") as result:
+            with self.page.expect_response(lambda response: url_part in response.url,
+                                           timeout=timeout_ms or self.timeout_ms):
+                action()
+        return result["ok"]
+
+
+class AsyncPageWaiter(_BaseWaiter):
+    """页面就绪等待（异步版，行为与 PageWaiter 一致）"""
+
+    async def page_ready(self, timeout_ms: Optional[int] = None) -> bool:
+        """网络空闲且加载遮罩消失"""
+        timeout = timeout_ms or self.timeout_ms
+        with self._timed("page_ready") as result:
+            await self.page.wait_for_load_state("networkidle", timeout=timeout)
+            await self.page.wait_for_function(LOADING_GONE_SCRIPT, arg=None, timeout=timeout)
+        return result["ok"]
+
+    async def loading_gone(self, timeout_ms: Optional[int] = None) -> bool:
+        """加载遮罩消失"""
+        with self._timed("loading_gone") as result:
+            await self.page.wait_for_function(LOADING_GONE_SCRIPT, arg=None, timeout=timeout_ms or self.timeout_ms)
+        return result["ok"]
+
+    async def tab_ready(self, tab, timeout_ms: Optional[int] = None) -> bool:
+        """Tab面板显示且面板内没有加载遮罩"""
+        timeout = timeout_ms or self.timeout_ms
+        with self._timed("tab_ready") as result:
+            pane_id = await tab.get_attribute("aria-controls")
+            if pane_id:
+                await self.page.wait_for_function(TAB_PANE_READY_SCRIPT, arg=pane_id, timeout=timeout)
+            else:
+                await tab.and_(self.page.locator(".is-active")).wait_for(timeout=timeout)
+                await self.page.wait_for_function(LOADING_GONE_SCRIPT, arg=None, timeout=timeout)
+        return result["ok"]
+
+    async def stable_count(self, selector: str, stable_ms: int = WAIT_STABLE_MS,
+                           timeout_ms: Optional[int] = None) -> bool:
+        """等待匹配元素的数量在 stable_ms 内不再变化"""
+        with self._timed("stable_count") as result:
+            await self.page.wait_for_function(
+                STABLE_COUNT_SCRIPT, arg={"selector": selector, "key": _next_key(), "stableMs": stable_ms},
+                polling=100, timeout=timeout_ms or self.timeout_ms)
+        return result["ok"]
+
+    async def hidden(self, target, timeout_ms: Optional[int] = None) -> bool:
+        """等待元素隐藏或移除"""
+        locator = self.page.locator(target) if isinstance(target, str) else target
+        with self._timed("hidden") as result:
+            await locator.first.wait_for(state="hidden", timeout=timeout_ms or self.timeout_ms)
+        return result["ok"]